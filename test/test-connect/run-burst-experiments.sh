@@ -102,5 +102,5 @@ echo "All experiments complete in ${ELAPSED}s"
 echo "Logs in: $LOG_BASE"
 echo ""
 echo "Next: .venv/bin/python3 src/parse-experiments.py"
-echo "Then: .venv/bin/python3 src/burst-model.py --experimental experiments.json"
+echo "Then: .venv/bin/python3 src/burst-model.py --experimental experiments.npz"
 echo "========================================"
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the capacity models and the log parser.
+
+Times the computational core of each tool: fast_peak on single configs and
+on the capacity heatmap grid, mix_peak on a skew heatmap, simulate_burst
+(also with retries), the M_max bisection behind plot_duration_sensitivity,
+reshuffle-model's simulate and stability grids,
+and parse_log_dir on generated logs. Plot rendering is not timed (it is
+matplotlib's cost, not ours), and the burst model's result cache is off,
+so every repeat recomputes from scratch.
+
+Each case runs --repeat times and its minimum and median wall times are
+appended to benchmark-history.json, together with the commit and machine
+they were measured on. --compare checks the run against an earlier one
+and exits 1 if any case slowed down by more than --threshold.
+
+The synthetic log directories (switchboard.log + combined.log, see
+parse-experiments.py --benchmark) are written once to .cache/benchmark/
+and reused, since writing a 1 GB log takes longer than parsing it.
+
+Usage: cd test/test-connect && .venv/bin/python3 src/benchmark.py [--compare]
+"""
+
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from capacity import load_model
+
+HISTORY = Path("benchmark-history.json")
+LOG_CACHE = Path(".cache/benchmark")
+LOG_SIZES_MB = (10, 100, 1000)
+REPEAT = 5
+THRESHOLD = 0.20     # --compare fails on slowdowns beyond 20%...
+NOISE_FLOOR = 0.005  # ...that are also larger than 5ms (timer and scheduler noise)
+
+burst_model = load_model("burst-model.py")
+reshuffle_model = load_model("reshuffle-model.py")
+parse_experiments = load_model("parse-experiments.py")
+
+
+# ─── Cases ───────────────────────────────────────────────────────────────────
+
+def _capacity_grid():
+    # The plot_capacity_heatmap grid
+    N, M = np.meshgrid(np.arange(1, 51), np.linspace(1, 50, 50))
+    return burst_model.fast_peak(N, M, burst_model.X_DEFAULT,
+                                 burst_model.T_BURST_DEFAULT, with_error=True)
+
+
+def _skew_grid():
+    # One panel of the skew envelope (burst-model.py --mix zipf)
+    N, total = np.meshgrid(np.arange(1, 51), burst_model.MIX_TOTALS)
+    return burst_model.mix_peak(N, total, 1.0, burst_model.X_DEFAULT,
+                                burst_model.T_BURST_DEFAULT, 'zipf')
+
+
+def _shard_bisection():
+    # The sharding heatmap (burst-model.py --shards)
+    return burst_model.compute_sharding(burst_model.X_DEFAULT, burst_model.T_BURST_DEFAULT,
+                                        burst_model.S_MAX, access='uniform')
+
+
+def _duration_bisection():
+    # plot_duration_sensitivity's boundary curves, serially
+    N_range = np.arange(2, 51)
+    return [burst_model.bisect_m_max(N_range, burst_model.X_DEFAULT, T_burst,
+                                     burst_model.S_MAX)
+            for T_burst in (5, 10, 30, 60)]
+
+
+def _stability_heatmap():
+    # The plot_stability_heatmap grid
+    N, M = np.meshgrid(np.arange(1, 21), np.linspace(0.1, 20, 100))
+    return reshuffle_model.stability_ratio(N, M, 25.0)
+
+
+def _stability_cube():
+    # The 1000 x 2000 x 2 cube from the capacity.py example
+    return reshuffle_model.evaluate_stability(np.arange(1, 1001)[:, None, None],
+                                              np.linspace(0.1, 200, 2000)[None, :, None],
+                                              np.array([10.0, 25.0])[None, None, :])
+
+
+def _model_cases():
+    X, T = burst_model.X_DEFAULT, burst_model.T_BURST_DEFAULT
+    return [
+        ("burst.fast_peak[N=10,M=5]", lambda: burst_model.fast_peak(10, 5.0, X, T)),
+        ("burst.fast_peak[N=50,M=50]", lambda: burst_model.fast_peak(50, 50.0, X, T)),
+        ("burst.fast_peak[heatmap 50x50]", _capacity_grid),
+        ("burst.mix_peak[skew heatmap 50x50]", _skew_grid),
+        ("burst.simulate_burst[N=4,M=20]", lambda: burst_model.simulate_burst(4, 20.0, X, T)),
+        ("burst.simulate_burst[N=30,M=20]", lambda: burst_model.simulate_burst(30, 20.0, X, T)),
+        ("burst.simulate_burst[N=50,M=10,retries=3]",
+         lambda: burst_model.simulate_burst(50, 10.0, X, T, retries=3)),
+        ("burst.bisect_m_max[duration sensitivity]", _duration_bisection),
+        ("burst.compute_sharding[7x50]", _shard_bisection),
+        ("reshuffle.simulate[N=10,M=5]", lambda: reshuffle_model.simulate(10, 5.0, 25.0)),
+        ("reshuffle.simulate[N=20,M=10]", lambda: reshuffle_model.simulate(20, 10.0, 25.0)),
+        ("reshuffle.stability_ratio[heatmap 20x100]", _stability_heatmap),
+        ("reshuffle.evaluate_stability[cube 1000x2000x2]", _stability_cube),
+    ]
+
+
+def log_dir(size_mb):
+    """A run directory with about size_mb MB of logs, written on first use."""
+    path = LOG_CACHE / f"logs-{size_mb:g}mb"
+    done = path / ".complete"
+    if not done.exists():
+        path.mkdir(parents=True, exist_ok=True)
+        print(f"  (writing {size_mb:g} MB of synthetic logs to {path})", file=sys.stderr)
+        with open(path / "run-info.json", "w") as f:
+            json.dump({"clients": 10, "mutationInterval": 400, "duration": 30}, f)
+        # Most lines go to switchboard.log, the rest interleave from combined.log
+        parse_experiments.write_synthetic_log(path / "switchboard.log", size_mb * 0.75)
+        parse_experiments.write_synthetic_log(path / "combined.log", size_mb * 0.25, seed=1)
+        done.touch()
+    return path
+
+
+def _log_cases(sizes):
+    cases = []
+    for size_mb in sizes:
+        def run(size_mb=size_mb):
+            return parse_experiments.parse_log_dir(log_dir(size_mb))
+        cases.append((f"parse.parse_log_dir[{size_mb:g}MB]", run))
+    return cases
+
+
+def all_cases(log_sizes=LOG_SIZES_MB):
+    return _model_cases() + _log_cases(log_sizes)
+
+
+# ─── Timing and history ──────────────────────────────────────────────────────
+
+def time_case(func, repeat):
+    """Wall times of repeat calls of func, after one untimed warm-up call."""
+    func()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_suite(cases, repeat=REPEAT):
+    """Time every (name, func) case and return a history entry."""
+    results = {}
+    for name, func in cases:
+        times = time_case(func, repeat)
+        results[name] = {"min_s": min(times), "median_s": statistics.median(times),
+                         "repeat": repeat}
+        print(f"  {name:<48s} {min(times) * 1000:10.1f} ms  "
+              f"(median {statistics.median(times) * 1000:.1f})")
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} cpus",
+        "results": results,
+    }
+
+
+def load_history(path):
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return json.load(f)["runs"]
+
+
+def save_history(path, runs):
+    with open(path, "w") as f:
+        json.dump({"version": 1, "runs": runs}, f, indent=2)
+
+
+def find_baseline(runs, ref):
+    """The history entry to compare against: 'last', an index, or a commit."""
+    if not runs:
+        return None
+    if ref == "last":
+        return runs[-1]
+    try:
+        return runs[int(ref)]
+    except (ValueError, IndexError):
+        pass
+    matches = [r for r in runs if r.get("commit") and r["commit"].startswith(ref)]
+    return matches[-1] if matches else None
+
+
+def compare(current, baseline, threshold=THRESHOLD):
+    """
+    Print per-case changes against baseline, using minimum times.
+
+    Returns the names of cases that got slower by more than threshold
+    (as a fraction) and by more than NOISE_FLOOR seconds.
+    """
+    print(f"\nCompared with {baseline.get('commit') or '?'} ({baseline['timestamp']}), "
+          f"threshold +{threshold:.0%}:")
+    regressions = []
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"  {name:<48s}        new")
+            continue
+        now, before = result["min_s"], old["min_s"]
+        change = now / before - 1 if before > 0 else 0.0
+        regressed = change > threshold and now - before > NOISE_FLOOR
+        if regressed:
+            regressions.append(name)
+        print(f"  {name:<48s} {change:+8.1%}" + ("  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the capacity models and log parser")
+    parser.add_argument("--repeat", type=int, default=REPEAT,
+                        help=f"Timed runs per case (default: {REPEAT})")
+    parser.add_argument("--cases", metavar="PATTERN", default="*",
+                        help="Only run cases matching this glob, e.g. 'burst.*'")
+    parser.add_argument("--log-sizes", type=float, nargs="+", default=LOG_SIZES_MB,
+                        metavar="MB", help="Sizes of the generated parse_log_dir inputs "
+                                           "(default: 10 100 1000)")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit")
+    parser.add_argument("--history", type=Path, default=HISTORY,
+                        help=f"History file (default: {HISTORY})")
+    parser.add_argument("--no-save", action="store_true",
+                        help="Do not append this run to the history file")
+    parser.add_argument("--compare", nargs="?", const="last", metavar="REF",
+                        help="Fail if any case is slower than in an earlier run: "
+                             "'last' (default), a history index, or a commit prefix")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Allowed slowdown for --compare (default: {THRESHOLD})")
+    args = parser.parse_args()
+
+    cases = [(name, func) for name, func in all_cases(args.log_sizes)
+             if fnmatch.fnmatchcase(name, args.cases)]
+    if args.list:
+        for name, _ in cases:
+            print(name)
+        return
+    if not cases:
+        sys.exit(f"No cases match {args.cases!r}")
+
+    runs = load_history(args.history)
+    baseline = None
+    if args.compare:
+        baseline = find_baseline(runs, args.compare)
+        if baseline is None:
+            sys.exit(f"No run {args.compare!r} in {args.history} to compare against")
+
+    print(f"Running {len(cases)} benchmark cases ({args.repeat} repeats each)...")
+    current = run_suite(cases, args.repeat)
+
+    if not args.no_save:
+        save_history(args.history, runs + [current])
+        print(f"\nAppended to {args.history} ({len(runs) + 1} runs)")
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed beyond +{args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
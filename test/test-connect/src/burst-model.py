@@ -28,12 +28,20 @@ Post-consolidation parameters:
 """
 
 import argparse
+import bisect
+import heapq
 import json
 import os
 import math
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.colors import LinearSegmentedColormap
+
+from client_mix import DISTRIBUTIONS, client_rates, rate_matrix
+from experiment_store import find_store, load_experimental
+from profiling import StageProfiler, count, timed
+from result_cache import ResultCache, memoize, source_version
+from sharding import ACCESS_PATTERNS, shard_shares
+from sweep import map_grid, resolve_jobs, run_sweep, split_evenly
 
 # ─── Parameters ───────────────────────────────────────────────────────────────
 
@@ -44,6 +52,16 @@ T_POLL = 2.0        # poll interval (seconds)
 RTT = 0.05          # network round-trip time (seconds)
 X_DEFAULT = 25.0    # default processing time per op (ms)
 T_BURST_DEFAULT = 10.0  # default burst duration (seconds)
+EXACT_LIMIT = 5000  # fast_peak: pushes iterated exactly before the fluid model
+WORKERS = 1         # switchboard job-executor workers processing pushes in parallel
+DISPATCH = 'shared' # how pushes reach workers: 'shared' queue or per-client 'affinity'
+DOCUMENTS = 1       # documents the clients' ops are spread over (see sharding.py)
+ACCESS = 'uniform'  # client-to-document access: 'uniform', 'zipf' or 'partition'
+DOC_SKEW = 1.0      # zipf exponent of document popularity for ACCESS = 'zipf'
+RETRIES = None      # retries before a job over S_max is dead-lettered (None: only flag it)
+RETRY_BASE = 0.1    # executor retry backoff base (seconds, retryBaseDelayMs)
+RETRY_MAX = 5.0     # executor retry backoff cap (seconds, retryMaxDelayMs)
+_DEFAULT = object() # default for retries=: use RETRIES (None means "no retries")
 K_STORE = 12.0      # store amplification: each logical op creates ~K conflict
                      # entries due to index entries, metadata, sub-operations,
                      # bursty generation variance, and non-linear scan overhead.
@@ -51,6 +69,37 @@ K_STORE = 12.0      # store amplification: each logical op creates ~K conflict
                      #   boundary at (N-1)*M = S_max / (K * T_burst) ≈ 83
                      # Validation: K=12 gives peak=5760 for N=4,M=20,T=8
                      #   -> SURVIVES at S_max=10000, FAILS at S_max=1000
+SCAN_COST = 0.001   # index scan time per conflict entry (seconds), added to each job
+PARAMS_FILE = "burst-params.json"  # fitted K_STORE / X_ms / SCAN_COST (--calibrate)
+
+# ─── Result cache ─────────────────────────────────────────────────────────────
+
+_cache = None  # ResultCache, enabled from the CLI (see --no-cache)
+# Sources that cached results depend on, hashed into the cache version
+MODEL_SOURCES = ("burst-model.py", "client_mix.py", "sharding.py", "sweep.py",
+                 "result_cache.py")
+
+
+def model_constants():
+    """Constants that cached results depend on (part of every cache key)."""
+    return {'B': B, 'T_FLUSH': T_FLUSH, 'T_POLL': T_POLL, 'RTT': RTT,
+            'K_STORE': K_STORE, 'SCAN_COST': SCAN_COST, 'EXACT_LIMIT': EXACT_LIMIT,
+            'WORKERS': WORKERS, 'DISPATCH': DISPATCH, 'DOCUMENTS': DOCUMENTS,
+            'ACCESS': ACCESS, 'DOC_SKEW': DOC_SKEW, 'RETRIES': RETRIES,
+            'RETRY_BASE': RETRY_BASE, 'RETRY_MAX': RETRY_MAX}
+
+
+cached = memoize(lambda: _cache, model_constants)
+
+
+def _restore_constants(constants):
+    """Sweep worker initializer: apply the parent's model_constants()."""
+    globals().update(constants)
+
+
+def _pool_state():
+    """initializer / initargs that give sweep workers the CLI's constants (see sweep.py)."""
+    return {'initializer': _restore_constants, 'initargs': (model_constants(),)}
 
 # ─── Derived helpers ──────────────────────────────────────────────────────────
 
@@ -66,31 +115,275 @@ def ops_per_push(M):
     return min(B, M * T_FLUSH)
 
 
+def worker_load(N, workers, dispatch):
+    """
+    Clients feeding the busiest worker.
+
+    'shared': every worker takes the next push from one FCFS queue, so each
+    carries N / workers clients' worth of load. 'affinity': a client's
+    documents are pinned to one worker (client % workers), which keeps
+    per-document order but leaves ceil(N / workers) clients on the
+    busiest worker and idles workers beyond N.
+
+    N and workers may be scalars or arrays.
+    """
+    if dispatch == 'affinity':
+        return np.ceil(np.asarray(N, dtype=float) / workers)[()]
+    return (np.asarray(N, dtype=float) / workers)[()]
+
+
+def retry_delay(attempt):
+    """
+    Mean backoff before retry number `attempt` (1-based): the executor
+    waits min(RETRY_MAX, RETRY_BASE * 2^(attempt-1)) halved plus a uniform
+    jitter of the other half, 3/4 of it on average.
+    """
+    return 0.75 * min(RETRY_MAX, RETRY_BASE * 2 ** (attempt - 1))
+
+
+# ─── Load profiles ────────────────────────────────────────────────────────────
+
+class LoadProfile:
+    """
+    Piecewise-constant per-client rate M(t): rates[k] ops/sec on
+    [edges[k], edges[k+1]), zero before edges[0] and after edges[-1].
+
+    A plain burst is LoadProfile.square(M, T_burst). Profiles can also be
+    sampled from a function or read from a trace (see from_file and
+    parse-experiments.py --trace). duration (edges[-1]) plays the role of
+    T_burst: drain time is measured from it.
+    """
+
+    def __init__(self, edges, rates):
+        self.edges = np.asarray(edges, dtype=float)
+        self.rates = np.asarray(rates, dtype=float)
+        if self.edges.ndim != 1 or self.edges.size != self.rates.size + 1:
+            raise ValueError("need one more edge than rates")
+        if np.any(np.diff(self.edges) <= 0):
+            raise ValueError("edges must be strictly increasing")
+        if np.any(self.rates < 0):
+            raise ValueError("rates must be non-negative")
+
+    @classmethod
+    def square(cls, M, T_burst):
+        """Constant M for T_burst seconds: the classic burst."""
+        return cls([0.0, T_burst], [M])
+
+    @classmethod
+    def from_function(cls, func, duration, dt=0.5):
+        """Sample func(t) (vectorized or scalar) at the middle of dt-wide bins."""
+        edges = np.append(np.arange(0.0, duration, dt), duration)
+        mid = (edges[:-1] + edges[1:]) / 2
+        try:
+            rates = np.broadcast_to(np.asarray(func(mid), dtype=float), mid.shape)
+        except (TypeError, ValueError):
+            rates = np.array([float(func(t)) for t in mid])
+        return cls(edges, np.maximum(rates, 0.0))
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Read a trace: a CSV with a header and columns (t_s, M), or a .npy
+        array of shape (n, 2). Each row is a bin start and the rate from
+        there to the next row; the last bin is as wide as the one before it.
+        """
+        if str(path).endswith(".npy"):
+            data = np.load(path)
+        else:
+            data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+        data = np.asarray(data, dtype=float).reshape(-1, 2)
+        starts, rates = data[:, 0], data[:, 1]
+        width = starts[-1] - starts[-2] if len(starts) > 1 else 1.0
+        return cls(np.append(starts, starts[-1] + width), rates)
+
+    def scaled(self, factor):
+        """The same shape with every rate multiplied by factor."""
+        return LoadProfile(self.edges, self.rates * factor)
+
+    def cache_key(self):
+        return (self.edges, self.rates)
+
+    @property
+    def duration(self):
+        return float(self.edges[-1])
+
+    @property
+    def peak_rate(self):
+        return float(self.rates.max()) if self.rates.size else 0.0
+
+    @property
+    def mean_rate(self):
+        """Average rate over [0, duration] (total ops / duration)."""
+        return float(np.sum(self.rates * (np.diff(self.edges) / self.duration)))
+
+    def rate(self, t):
+        """M(t) for scalar or array t."""
+        k = np.searchsorted(self.edges, t, side='right') - 1
+        inside = (k >= 0) & (k < self.rates.size)
+        return np.where(inside, self.rates[np.clip(k, 0, self.rates.size - 1)], 0.0)[()]
+
+    def ops(self, t0, t1, clients=1):
+        """Ops that `clients` clients generate in [t0, t1]."""
+        overlap = np.minimum(t1, self.edges[1:]) - np.maximum(t0, self.edges[:-1])
+        return float(np.sum(clients * self.rates * np.maximum(overlap, 0.0)))
+
+    def max_rate(self, t0, t1):
+        """Highest rate of any bin overlapping [t0, t1]."""
+        hit = (self.edges[:-1] <= t1) & (self.edges[1:] > t0)
+        return float(self.rates[hit].max()) if hit.any() else 0.0
+
+    def push_times(self, N):
+        """
+        Interleaved push arrivals of N clients, and the rate behind each.
+
+        Within a bin pushes come every t_push(M)/N seconds (push i is from
+        client i % N); the phase carries over into the next bin unless
+        the rate dropped to zero in between.
+        """
+        times, rates = [], []
+        t_next = None
+        for start, end, M in zip(self.edges[:-1].tolist(), self.edges[1:].tolist(),
+                                 self.rates.tolist()):
+            if M <= 0 or N <= 0:
+                t_next = None
+                continue
+            Tp = t_push(M)
+            ia = Tp / N
+            t0 = start if t_next is None else max(start, t_next)
+            n = int(math.ceil(N * (end - t0) / Tp))
+            bin_times = [t0 + j * ia for j in range(n) if t0 + j * ia < end]
+            times += bin_times
+            rates += [M] * len(bin_times)
+            t_next = t0 + len(bin_times) * ia
+        return times, rates
+
+
+def as_profile(M, T_burst):
+    """M as a LoadProfile: itself, or a square burst of T_burst seconds."""
+    return M if isinstance(M, LoadProfile) else LoadProfile.square(M, T_burst)
+
+
+# ─── Client mixes ────────────────────────────────────────────────────────────
+
+def mix_rates(N, M):
+    """
+    M as per-client rates (one per client, see client_mix.client_rates)
+    if it is a rate vector, else None.
+    """
+    if isinstance(M, LoadProfile) or np.ndim(M) != 1:
+        return None
+    rates = np.asarray(M, dtype=float)
+    if rates.size != N:
+        raise ValueError(f"need one rate per client: got {rates.size} rates for N={N}")
+    if np.any(rates < 0):
+        raise ValueError("rates must be non-negative")
+    return rates
+
+
+def mix_push_times(rates, T_burst):
+    """
+    Push arrivals of clients with their own rates during a T_burst burst.
+
+    Client c pushes every t_push(rates[c]) seconds, c/N of a period into
+    the burst; with equal rates this is the interleaved schedule of
+    LoadProfile.push_times. Returns (times, rates, clients) in arrival
+    order (ties go to the lower client index).
+    """
+    N = len(rates)
+    times, clients = [], []
+    for c, M in enumerate(rates.tolist()):
+        if M <= 0:
+            continue
+        Tp = t_push(M)
+        t = (c / N + np.arange(math.ceil(T_burst / Tp))) * Tp
+        t = t[t < T_burst]
+        times.append(t)
+        clients.append(np.full(t.size, c))
+    if not times:
+        return [], [], []
+    times, clients = np.concatenate(times), np.concatenate(clients)
+    order = np.lexsort((clients, times))
+    return times[order].tolist(), rates[clients[order]].tolist(), clients[order].tolist()
+
+
+# ─── Sharding ────────────────────────────────────────────────────────────────
+
+def shard_factors(N, documents=None, access=None):
+    """
+    Conflict multipliers (a sharding.ShardShares) for N clients working on
+    `documents` documents (default DOCUMENTS) with access pattern `access`
+    (default ACCESS, zipf exponent DOC_SKEW). All 1.0 for one document.
+    """
+    documents = DOCUMENTS if documents is None else documents
+    access = ACCESS if access is None else access
+    return shard_shares(N, documents, access, DOC_SKEW)
+
+
 # ─── Analytical recurrence: server perspective ────────────────────────────────
 
-def simulate_burst_server(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX):
+def simulate_burst_server(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                          workers=None, dispatch=None, documents=None, access=None,
+                          retries=_DEFAULT):
     """
     Server perspective using analytical conflict formula.
 
     Each of N clients sends a push every T_push seconds during the burst.
-    Pushes arrive interleaved (every T_push/N seconds). Each push is processed
-    serially. As the queue builds, later pushes wait longer (W increases),
-    widening the conflict window.
+    Pushes arrive interleaved (every T_push/N seconds; push i is from client
+    i % N). Each push is processed by one of `workers` job-executor workers
+    (default WORKERS), picked by `dispatch` (default DISPATCH, see
+    worker_load). As the queue builds, later pushes wait longer (W increases),
+    widening the conflict window. All clients share the store, so the
+    conflict count does not depend on which worker runs the push.
 
     C_server(W) = (N-1) * M * (T_push + W + RTT)
+
+    M may also be a LoadProfile, in which case T_burst is ignored: pushes
+    follow the profile's rate (see LoadProfile.push_times), and T_push,
+    the push size and M in the conflict formula are those at each push.
+
+    Or M is a vector of per-client rates (see client_mix), and client c's
+    pushes see the conflicts of the others: (sum(M) - M[c]) in place of
+    (N-1) * M. The result then also names the client whose push hit the
+    peak ('peak_client') and splits its conflicts by source client
+    ('peak_sources').
+
+    With the ops spread over several documents (documents / access,
+    defaults DOCUMENTS / ACCESS, see shard_factors) a push only conflicts
+    with ops on its own document: the conflicts it sees are scaled by the
+    hottest shard's share, the index scan by the average share.
+
+    retries (default RETRIES) turns on the executor's retry policy. A push
+    over S_max then fails after its index scan, without applying its ops,
+    and is re-enqueued retry_delay(k) seconds later for its k-th retry.
+    After `retries` retries it is dead-lettered. A retry keeps the push's
+    stale timestamp, so its conflict window is measured from the original
+    arrival and only widens. The result adds 'dead_letters', 'retries'
+    (re-enqueued attempts) and 'wasted_time' (seconds of worker time spent
+    on failed attempts). With retries=None (RETRIES' default) an oversized
+    push is only flagged and processed as usual; pass None explicitly to
+    get that mode whatever RETRIES is.
     """
-    Tp = t_push(M)
-    opp = ops_per_push(M)
+    workers = WORKERS if workers is None else workers
+    dispatch = DISPATCH if dispatch is None else dispatch
+    retries = RETRIES if retries is _DEFAULT else retries
+    shards = shard_factors(N, documents, access)
+    rates = mix_rates(N, M)
+    if rates is None:
+        profile = as_profile(M, T_burst)
+        T_burst = profile.duration
     X_sec = X_ms / 1000.0
-    inter_arrival = Tp / N if N > 0 else Tp
 
     # Generate push arrival times
-    num_pushes = int(math.ceil(N * T_burst / Tp))
-    arrival_times = [i * inter_arrival for i in range(num_pushes)
-                     if i * inter_arrival < T_burst]
+    if rates is None:
+        arrival_times, arrival_rates = profile.push_times(N)
+        arrival_clients = None  # push i is from client i % N
+    else:
+        arrival_times, arrival_rates, arrival_clients = mix_push_times(rates, T_burst)
+        others = rates.sum() - rates
 
     if not arrival_times:
         return _empty_result('server', T_burst)
+    count("sim pushes", len(arrival_times))
 
     # Process pushes sequentially with analytical conflict formula
     ts_t = []
@@ -99,42 +392,103 @@ def simulate_burst_server(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S
     ts_ops = []
 
     server_free_at = 0.0
+    worker_free_at = [0.0] * workers  # a heap for 'shared', indexed for 'affinity'
     peak_conflicts = 0
     peak_time = 0.0
     failed = False
     fail_time = None
     cumulative_ops = 0
     queue_depth = 0
-
-    for i, arr_t in enumerate(arrival_times):
+    peak_client = None
+    dead_letters = 0
+    retried = 0
+    wasted_time = 0.0
+
+    # Clamp: can't exceed total store entries from OTHER clients during burst
+    if rates is None:
+        max_possible = K_STORE * (N - 1) * profile.mean_rate * T_burst
+
+    # Failed pushes waiting for their retry: (ready, seq, arrival, M, client, attempt).
+    # retry_ready holds every retry's ready time in order, the first
+    # `released` of them already popped, so ready retries are a binary search.
+    retry_queue = []
+    retry_ready = []
+    released = 0
+    i = 0  # next new arrival
+    while i < len(arrival_times) or retry_queue:
+        # Next push in FCFS order: a new arrival, or a retry whose backoff is over
+        if retry_queue and (i == len(arrival_times) or retry_queue[0][0] < arrival_times[i]):
+            ready, _, arr_t, M, client, attempt = heapq.heappop(retry_queue)
+            released += 1
+        else:
+            arr_t = ready = arrival_times[i]
+            M = arrival_rates[i]
+            client = i % N if arrival_clients is None else arrival_clients[i]
+            attempt = 0
+            i += 1
+        Tp = t_push(M)
+        opp = ops_per_push(M)
         # When does this push get processed?
-        proc_t = max(arr_t, server_free_at)
-        W = proc_t - arr_t  # queue wait
+        if workers == 1:
+            proc_t = max(ready, server_free_at)
+        elif dispatch == 'affinity':
+            worker = client % workers
+            proc_t = max(ready, worker_free_at[worker])
+        else:
+            proc_t = max(ready, worker_free_at[0])  # earliest free worker
+        W = proc_t - arr_t  # queue wait (and backoff) since the push was sent
 
         # Analytical conflict count (amplified by K_STORE)
-        conflicts = K_STORE * (N - 1) * M * (Tp + W + RTT)
-
-        # Clamp: can't exceed total store entries from OTHER clients during burst
-        max_possible = K_STORE * (N - 1) * M * T_burst
-        conflicts = min(conflicts, max_possible)
+        if rates is None:
+            conflicts = K_STORE * (N - 1) * M * (Tp + W + RTT)
+            conflicts = min(conflicts, max_possible)
+        else:
+            conflicts = K_STORE * others[client] * min(Tp + W + RTT, T_burst)
+        # Only the ops on the push's own document conflict
+        scan = conflicts * shards.scan
+        conflicts = conflicts * shards.peak
 
         if conflicts > peak_conflicts:
             peak_conflicts = conflicts
             peak_time = proc_t
+            peak_client = client
         if conflicts > S_max and not failed:
             failed = True
             fail_time = proc_t
 
         # Processing time: X per incoming op + small scan overhead for conflicts
         # The conflict count is a check (getConflicting query), not full reprocessing
-        scan_overhead = 0.001 * conflicts  # ~1ms per 1000 conflicts for index scan
-        processing = X_sec * opp + scan_overhead
-        server_free_at = proc_t + processing
-        cumulative_ops += int(opp)
+        scan_overhead = SCAN_COST * scan  # index scan of the conflict entries
+        rejected = retries is not None and conflicts > S_max
+        if rejected:
+            # The reshuffle check fails after the scan, before any op is applied
+            processing = scan_overhead
+            wasted_time += processing
+            if attempt < retries:
+                retried += 1
+                retry_at = proc_t + processing + retry_delay(attempt + 1)
+                heapq.heappush(retry_queue, (retry_at, len(ts_t), arr_t, M, client, attempt + 1))
+                bisect.insort(retry_ready, retry_at)
+            else:
+                dead_letters += 1
+        else:
+            processing = X_sec * opp + scan_overhead
+        if workers == 1:
+            server_free_at = proc_t + processing
+        elif dispatch == 'affinity':
+            worker_free_at[worker] = proc_t + processing
+            server_free_at = max(server_free_at, proc_t + processing)
+        else:
+            heapq.heapreplace(worker_free_at, proc_t + processing)
+            server_free_at = max(server_free_at, proc_t + processing)
+        if not rejected:
+            cumulative_ops += int(opp)
 
-        # Track queue depth
-        remaining_arrivals = sum(1 for t in arrival_times[i+1:]
-                                 if t <= proc_t) if i < len(arrival_times) - 1 else 0
+        # Track queue depth: later pushes that have already arrived, and
+        # retries whose backoff is over. Both lists are sorted: binary searches.
+        remaining_arrivals = bisect.bisect_right(arrival_times, proc_t) - i
+        if retry_queue:
+            remaining_arrivals += bisect.bisect_right(retry_ready, proc_t) - released
 
         ts_t.append(proc_t)
         ts_conflicts.append(conflicts)
@@ -148,13 +502,19 @@ def simulate_burst_server(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S
     ts_ops.append(cumulative_ops)
 
     t_arr = np.array(ts_t)
+    conflicts_arr = np.array(ts_conflicts)
+    queue_arr = np.array(ts_queue)
+    if workers > 1 and dispatch == 'affinity':
+        # Workers start pushes out of arrival order: put the series in time order
+        order = np.argsort(t_arr, kind='stable')
+        t_arr, conflicts_arr, queue_arr = t_arr[order], conflicts_arr[order], queue_arr[order]
     drain_time = max(0.0, t_arr[-1] - T_burst)
 
-    return {
+    result = {
         'perspective': 'server',
         't': t_arr,
-        'conflicts': np.array(ts_conflicts),
-        'queue': np.array(ts_queue),
+        'conflicts': conflicts_arr,
+        'queue': queue_arr,
         'cumulative_ops': np.array(ts_ops),
         'peak_conflicts': peak_conflicts,
         'peak_time': peak_time,
@@ -163,11 +523,22 @@ def simulate_burst_server(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S
         'fail_time': fail_time,
         'T_burst': T_burst,
     }
+    if retries is not None:
+        result.update(dead_letters=dead_letters, retries=retried, wasted_time=wasted_time)
+    if rates is not None:
+        # Conflicts are linear in each other client's rate
+        sources = np.where(np.arange(N) == peak_client, 0.0, rates)
+        result['peak_client'] = peak_client
+        result['peak_sources'] = (peak_conflicts * sources / others[peak_client]
+                                  if peak_client is not None and others[peak_client] > 0
+                                  else np.zeros(N))
+    return result
 
 
 # ─── Analytical recurrence: client perspective ───────────────────────────────
 
-def simulate_burst_client(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX):
+def simulate_burst_client(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                          others=None, documents=None, access=None, retries=_DEFAULT):
     """
     Client perspective using analytical conflict formula.
 
@@ -180,8 +551,51 @@ def simulate_burst_client(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S
 
     This is the primary bottleneck for moderate N, high M (confirmed
     experimentally: all 4 dead letters at S_max=1000 were client-side).
+
+    M may also be a LoadProfile (T_burst is then ignored). A poll brings
+    the ops the other clients generated since the previous poll, and the
+    local conflict rate is the highest rate seen in that window.
+
+    others is the combined rate of the other clients (default (N-1) * M).
+    If M is a vector of per-client rates (see client_mix), every client
+    is simulated with the others' total and the worst one is returned,
+    with its index ('client') and every client's peak ('client_peaks').
+
+    documents / access spread the ops over several documents as in
+    simulate_burst_server: a load job only conflicts with local ops on the
+    documents it touches, and with 'partition' access a client only
+    receives the ops of the clients sharing its document (the worst
+    client, on the busiest document, is simulated).
+
+    retries (default RETRIES; None turns it off) applies the executor's
+    retry policy to load jobs over S_max, as in simulate_burst_server, and
+    adds the same 'dead_letters', 'retries' and 'wasted_time' entries (for
+    this one client; with a rate vector also 'client_dead_letters' and
+    'client_wasted_time' per client).
     """
+    retries = RETRIES if retries is _DEFAULT else retries
+    rates = mix_rates(N, M)
+    if rates is not None:
+        runs = [simulate_burst_client(N, m, X_ms, T_burst, S_max, others=o,
+                                      documents=documents, access=access, retries=retries)
+                for m, o in zip(rates.tolist(), (rates.sum() - rates).tolist())]
+        peaks = np.array([r['peak_conflicts'] for r in runs])
+        worst = int(np.argmax(peaks)) if runs else 0
+        result = dict(runs[worst]) if runs else _empty_result('client', T_burst)
+        result['client'] = worst
+        result['client_peaks'] = peaks
+        if retries is not None:
+            result['client_dead_letters'] = np.array([r.get('dead_letters', 0)
+                                                      for r in runs], dtype=np.int64)
+            result['client_wasted_time'] = np.array([r.get('wasted_time', 0.0)
+                                                     for r in runs])
+        return result
+
+    profile = as_profile(M, T_burst)
+    incoming_profile = profile if others is None else as_profile(others, T_burst)
+    T_burst = profile.duration
     X_sec = X_ms / 1000.0
+    shards = shard_factors(N, documents, access)
 
     # Generate poll arrival times during burst (+ one transitional poll)
     poll_times = []
@@ -192,6 +606,7 @@ def simulate_burst_client(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S
 
     if not poll_times:
         return _empty_result('client', T_burst)
+    count("sim polls", len(poll_times))
 
     # Process polls sequentially
     ts_t = []
@@ -205,30 +620,46 @@ def simulate_burst_client(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S
     failed = False
     fail_time = None
     cumulative_ops = 0
-
-    for i, poll_t in enumerate(poll_times):
-        # Incoming ops from this poll
-        if poll_t <= T_burst:
-            incoming = (N - 1) * M * T_POLL
+    dead_letters = 0
+    retried = 0
+    wasted_time = 0.0
+
+    # Clamp: can't exceed total local store entries during burst
+    max_local = K_STORE * profile.mean_rate * T_burst
+
+    # Failed load jobs waiting for their retry: (ready, seq, poll, incoming, M, attempt),
+    # with their ready times in order in retry_ready (see simulate_burst_server)
+    retry_queue = []
+    retry_ready = []
+    released = 0
+    i = 0  # next poll
+    while i < len(poll_times) or retry_queue:
+        if retry_queue and (i == len(poll_times) or retry_queue[0][0] < poll_times[i]):
+            ready, _, poll_t, incoming, M, attempt = heapq.heappop(retry_queue)
+            released += 1
         else:
-            # Transitional: only burst overlap
-            burst_overlap = max(0.0, T_burst - (poll_t - T_POLL))
-            incoming = (N - 1) * M * burst_overlap
-        if incoming <= 0:
-            continue
+            poll_t = ready = poll_times[i]
+            attempt = 0
+            i += 1
+            # Incoming ops from this poll (the last one only sees the burst's tail)
+            incoming = (profile.ops(poll_t - T_POLL, poll_t, clients=N - 1) if others is None
+                        else incoming_profile.ops(poll_t - T_POLL, poll_t))
+            incoming *= shards.incoming
+            if incoming <= 0:
+                continue
+            M = profile.max_rate(poll_t - T_POLL, poll_t)
 
         # When does this poll get processed?
-        proc_t = max(poll_t, client_free_at)
-        W = proc_t - poll_t  # queue wait
+        proc_t = max(ready, client_free_at)
+        W = proc_t - poll_t  # queue wait (and backoff) since the poll
 
         # Analytical conflict count: local ops in the window (amplified by K_STORE)
         # Window = T_poll + W, capped by burst duration
         window = T_POLL + W
         conflicts = K_STORE * M * window
-
-        # Clamp: can't exceed total local store entries during burst
-        max_local = K_STORE * M * T_burst
         conflicts = min(conflicts, max_local)
+        scan = conflicts * shards.local_scan
+        conflicts = conflicts * shards.local_peak
 
         if conflicts > peak_conflicts:
             peak_conflicts = conflicts
@@ -238,14 +669,29 @@ def simulate_burst_client(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S
             fail_time = proc_t
 
         # Processing time: X per incoming op + small scan overhead for conflicts
-        scan_overhead = 0.001 * conflicts  # ~1ms per 1000 conflicts for index scan
-        processing = X_sec * incoming + scan_overhead
+        scan_overhead = SCAN_COST * scan  # index scan of the conflict entries
+        rejected = retries is not None and conflicts > S_max
+        if rejected:
+            # The reshuffle check fails after the scan, before any op is applied
+            processing = scan_overhead
+            wasted_time += processing
+            if attempt < retries:
+                retried += 1
+                retry_at = proc_t + processing + retry_delay(attempt + 1)
+                heapq.heappush(retry_queue, (retry_at, len(ts_t), poll_t, incoming, M,
+                                             attempt + 1))
+                bisect.insort(retry_ready, retry_at)
+            else:
+                dead_letters += 1
+        else:
+            processing = X_sec * incoming + scan_overhead
+            cumulative_ops += int(incoming)
         client_free_at = proc_t + processing
-        cumulative_ops += int(incoming)
 
-        # Queue depth estimate
-        remaining = sum(1 for t in poll_times[i+1:]
-                        if t <= proc_t) if i < len(poll_times) - 1 else 0
+        # Queue depth estimate (poll_times is sorted)
+        remaining = bisect.bisect_right(poll_times, proc_t) - i
+        if retry_queue:
+            remaining += bisect.bisect_right(retry_ready, proc_t) - released
 
         ts_t.append(proc_t)
         ts_conflicts.append(conflicts)
@@ -261,7 +707,7 @@ def simulate_burst_client(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S
     t_arr = np.array(ts_t)
     drain_time = max(0.0, t_arr[-1] - T_burst)
 
-    return {
+    result = {
         'perspective': 'client',
         't': t_arr,
         'conflicts': np.array(ts_conflicts),
@@ -274,6 +720,9 @@ def simulate_burst_client(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S
         'fail_time': fail_time,
         'T_burst': T_burst,
     }
+    if retries is not None:
+        result.update(dead_letters=dead_letters, retries=retried, wasted_time=wasted_time)
+    return result
 
 
 def _empty_result(perspective, T_burst):
@@ -294,10 +743,27 @@ def _empty_result(perspective, T_burst):
 
 # ─── Combined simulation ─────────────────────────────────────────────────────
 
-def simulate_burst(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX):
-    """Run both perspectives, return worst-case."""
-    server = simulate_burst_server(N, M, X_ms, T_burst, S_max)
-    client = simulate_burst_client(N, M, X_ms, T_burst, S_max)
+@cached
+def simulate_burst(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                   workers=None, dispatch=None, documents=None, access=None,
+                   retries=_DEFAULT):
+    """
+    Run both perspectives, return worst-case. workers / dispatch apply to
+    the server (see simulate_burst_server); each client has one executor.
+    documents / access spread the ops over several documents on both sides.
+    M may be a LoadProfile instead of a constant rate for T_burst seconds,
+    or a vector of per-client rates (the client side is then the worst client).
+
+    With retries (default RETRIES; None turns it off) both sides retry and
+    dead-letter jobs over S_max, and 'dead_letters' / 'wasted_time' total
+    the server and every client (N times the simulated client, or each
+    client of a mix).
+    """
+    retries = RETRIES if retries is _DEFAULT else retries
+    server = simulate_burst_server(N, M, X_ms, T_burst, S_max, workers, dispatch,
+                                   documents, access, retries)
+    client = simulate_burst_client(N, M, X_ms, T_burst, S_max, documents=documents,
+                                   access=access, retries=retries)
 
     if client['peak_conflicts'] >= server['peak_conflicts']:
         worst = client
@@ -306,7 +772,7 @@ def simulate_burst(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX):
         worst = server
         bottleneck = 'server'
 
-    return {
+    result = {
         'server': server,
         'client': client,
         'worst': worst,
@@ -320,80 +786,732 @@ def simulate_burst(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX):
         'drain_time': max(server['drain_time'], client['drain_time']),
         'survives': worst['peak_conflicts'] < S_max,
     }
+    if 'dead_letters' in server:
+        if 'client_dead_letters' in client:
+            client_dead = int(client['client_dead_letters'].sum())
+            client_wasted = float(client['client_wasted_time'].sum())
+        else:
+            client_dead = N * client['dead_letters']
+            client_wasted = N * client['wasted_time']
+        result['dead_letters'] = server['dead_letters'] + client_dead
+        result['wasted_time'] = server['wasted_time'] + client_wasted
+    return result
+
+
+# ─── Monte Carlo: stochastic arrivals ────────────────────────────────────────
+
+MC_PERCENTILES = (5, 50, 95, 99)
+MC_CHUNK = 500      # replicas advanced together (bounds the arrival arrays)
+CALL_OPS = np.array([1, 2, 3])  # generateOperations emits 1-3 ops per call
+
+
+def _call_ops(rng, calls):
+    """Total ops of `calls` generateOperations calls (array of call counts)."""
+    return rng.multinomial(calls, [1 / 3] * 3) @ CALL_OPS
+
+
+@cached
+def monte_carlo_burst(N, M, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                      replicas=2000, arrivals='poisson', jitter=0.1, seed=0):
+    """
+    Stochastic version of simulate_burst, run for many replicas at once.
+
+    Server: each client pushes on its own stream instead of the fixed
+    interleaving, either Poisson (exponential gaps, mean T_push) or
+    'jitter' (period T_push, random phase per client, Gaussian jitter of
+    jitter * T_push per push). Each push carries ops_per_push(M) ops on
+    average, drawn as the ops of ~opp/2 generateOperations calls of 1-3 ops.
+
+    Client: polls every T_POLL from a random phase (plus timer jitter in
+    'jitter' mode). The ops received per poll come from the calls the other
+    N-1 clients make in the poll window: a Poisson count, or the expected
+    count when arrivals='jitter'.
+
+    The server has WORKERS workers dispatched per DISPATCH, and both sides
+    spread their ops over DOCUMENTS documents, as in simulate_burst_server.
+
+    Both sides then run the same conflict / queue-wait recurrence as the
+    deterministic simulators, vectorized across replicas. The seed is the
+    same for every configuration (common random numbers), so differences
+    between configurations are not masked by sampling noise.
+
+    Returns P(peak > S_max) overall and per side, and percentiles
+    (MC_PERCENTILES) of the peak conflict count and the drain time.
+    """
+    count("mc replicas", replicas)
+    rng = np.random.default_rng(seed)
+    peaks, drains, server_fail, client_fail = [], [], [], []
+    for start in range(0, replicas, MC_CHUNK):
+        R = min(MC_CHUNK, replicas - start)
+        s_peak, s_drain = _mc_server(rng, R, N, M, X_ms / 1000.0, T_burst,
+                                     arrivals, jitter)
+        c_peak, c_drain = _mc_client(rng, R, N, M, X_ms / 1000.0, T_burst,
+                                     arrivals, jitter)
+        peaks.append(np.maximum(s_peak, c_peak))
+        drains.append(np.maximum(s_drain, c_drain))
+        server_fail.append(s_peak > S_max)
+        client_fail.append(c_peak > S_max)
+
+    peak = np.concatenate(peaks)
+    drain = np.concatenate(drains)
+    return {
+        'replicas': replicas,
+        'arrivals': arrivals,
+        'p_fail': float(np.mean(peak > S_max)),
+        'p_fail_server': float(np.mean(np.concatenate(server_fail))),
+        'p_fail_client': float(np.mean(np.concatenate(client_fail))),
+        'peak': {f"p{q}": float(v)
+                 for q, v in zip(MC_PERCENTILES, np.percentile(peak, MC_PERCENTILES))},
+        'drain_time': {f"p{q}": float(v)
+                       for q, v in zip(MC_PERCENTILES, np.percentile(drain, MC_PERCENTILES))},
+    }
+
+
+def _mc_server(rng, R, N, M, X_sec, T_burst, arrivals, jitter):
+    """Server recurrence for R replicas. Returns (peak, drain_time) arrays."""
+    Tp = t_push(M)
+    opp = ops_per_push(M)
+    # Pushes drawn per client: the mean count plus a wide Poisson margin
+    mean_pushes = T_burst / Tp
+    K = int(math.ceil(mean_pushes + 6 * math.sqrt(mean_pushes) + 5))
+
+    if arrivals == 'poisson':
+        times = np.cumsum(rng.exponential(Tp, size=(R, int(N), K)), axis=2)
+    else:
+        phase = rng.uniform(0.0, Tp, size=(R, int(N), 1))
+        times = phase + Tp * np.arange(K) + rng.normal(0.0, jitter * Tp, size=phase.shape[:2] + (K,))
+        times = np.maximum(times, 0.0)
+    times = times.reshape(R, -1)
+    times[times >= T_burst] = np.inf
+    order = np.argsort(times, axis=1)
+    times = np.take_along_axis(times, order, axis=1)
+    n_cols = int(np.isfinite(times).sum(axis=1).max(initial=0))
+    times = times[:, :n_cols]
+    client = order[:, :n_cols] // K  # column-major over (client, push) before sorting
+
+    # Ops per push: the ops of `calls` calls, rescaled to average exactly opp
+    calls = max(1, round(opp / 2))
+    ops = _call_ops(rng, np.full(times.shape, calls)) * (opp / (2 * calls))
+
+    c_scale = K_STORE * (N - 1) * M
+    max_possible = c_scale * T_burst
+    shards = shard_factors(N)
+    worker_free = np.zeros((R, WORKERS))
+    rows = np.arange(R)
+    peak = np.zeros(R)
+    with np.errstate(invalid='ignore'):  # inf - inf for replicas that are done
+        for j in range(times.shape[1]):
+            arr_t = times[:, j]
+            live = np.isfinite(arr_t)
+            if DISPATCH == 'affinity':
+                w = client[:, j] % WORKERS
+            else:
+                w = np.argmin(worker_free, axis=1)
+            free = worker_free[rows, w]
+            proc_t = np.maximum(arr_t, free)
+            W = proc_t - arr_t
+            conflicts = np.where(live, np.minimum(c_scale * (Tp + W + RTT), max_possible), 0.0)
+            np.maximum(peak, conflicts * shards.peak, out=peak)
+            worker_free[rows, w] = np.where(
+                live, proc_t + X_sec * ops[:, j] + SCAN_COST * shards.scan * conflicts, free)
+
+    return peak, np.maximum(0.0, worker_free.max(axis=1) - T_burst)
+
+
+def _mc_client(rng, R, N, M, X_sec, T_burst, arrivals, jitter):
+    """Client recurrence for R replicas. Returns (peak, drain_time) arrays."""
+    n_polls = int(math.ceil(T_burst / T_POLL)) + 3  # last one lands past T_burst
+    polls = rng.uniform(0.0, T_POLL, size=(R, 1)) + T_POLL * np.arange(n_polls)
+    if arrivals != 'poisson':
+        polls += rng.normal(0.0, jitter * T_POLL, size=polls.shape)
+    prev = np.concatenate([polls[:, :1] - T_POLL, polls[:, :-1]], axis=1)
+
+    # Calls made by the other clients in each poll window that overlaps the burst
+    overlap = np.maximum(0.0, np.minimum(polls, T_burst) - np.maximum(prev, 0.0))
+    shards = shard_factors(N)
+    expected_calls = (N - 1) * M / 2.0 * overlap * shards.incoming
+    if arrivals == 'poisson':
+        calls = rng.poisson(expected_calls)
+    else:
+        calls = np.rint(expected_calls).astype(np.int64)
+    incoming = _call_ops(rng, calls)
+
+    c_max = K_STORE * M * T_burst
+    free = np.zeros(R)
+    peak = np.zeros(R)
+    for j in range(n_polls):
+        live = incoming[:, j] > 0
+        proc_t = np.maximum(polls[:, j], free)
+        W = proc_t - polls[:, j]
+        conflicts = np.minimum(K_STORE * M * (polls[:, j] - prev[:, j] + W), c_max)
+        peak = np.where(live, np.maximum(peak, conflicts * shards.local_peak), peak)
+        free = np.where(live, proc_t + X_sec * incoming[:, j]
+                        + SCAN_COST * shards.local_scan * conflicts, free)
+
+    return peak, np.maximum(0.0, free - T_burst)
 
 
 # ─── Fast analytical peak (for heatmap) ──────────────────────────────────────
 
-def fast_peak(N, M, X_ms, T_burst):
+@cached
+def fast_peak(N, M, X_ms, T_burst, exact_limit=None, with_error=False,
+              workers=None, dispatch=None, k_store=None, scan_cost=None,
+              documents=None, access=None):
     """
     Fast peak estimate using closed-form queue-wait growth.
 
     For the server: pushes arrive every T_push/N seconds. Processing time
     grows as conflicts grow with queue wait. We iterate the recurrence
-    to find peak conflicts without full simulation overhead.
+    for the first `exact_limit` pushes (default EXACT_LIMIT), then hand the
+    queue state to the fluid model (see _server_fluid_wait) for however
+    many pushes remain.
 
     For the client: polls arrive every T_poll. Same recurrence approach.
 
-    Returns (peak_conflicts, bottleneck).
+    workers and dispatch (defaults WORKERS, DISPATCH) set up the server's
+    job executor as in simulate_burst_server. k_store and scan_cost
+    override K_STORE and SCAN_COST (used by calibration). documents and
+    access (defaults DOCUMENTS, ACCESS) spread the ops over several
+    documents: the recurrences run on the full conflict counts, with the
+    scan cost and the peak scaled by the shard shares (see shard_factors).
+
+    N, M, X_ms, T_burst, workers, k_store, scan_cost and documents may be
+    scalars or NumPy arrays (broadcast together). Every grid cell advances its recurrence in lockstep, and
+    cells drop out of the working set as soon as their burst is exhausted.
+
+    Returns (peak_conflicts, bottleneck). For array inputs both are arrays
+    of the broadcast shape, with bottleneck holding 'client' / 'server'.
+    With with_error=True a third element is added: the relative error of
+    the fluid model against the exact recurrence at the switch point
+    (NaN where the recurrence ran to completion).
     """
-    Tp = t_push(M)
-    opp = ops_per_push(M)
+    if exact_limit is None:
+        exact_limit = EXACT_LIMIT
+    workers = WORKERS if workers is None else workers
+    dispatch = DISPATCH if dispatch is None else dispatch
+    k_store = K_STORE if k_store is None else k_store
+    scan_cost = SCAN_COST if scan_cost is None else scan_cost
+    documents = DOCUMENTS if documents is None else documents
+    params = (N, M, X_ms, T_burst, workers, k_store, scan_cost, documents)
+    scalar = all(np.ndim(v) == 0 for v in params)
+    N, M, X_ms, T_burst, workers, k_store, scan_cost, documents = (
+        a.ravel() for a in np.broadcast_arrays(
+            np.asarray(N, dtype=float), np.asarray(M, dtype=float),
+            np.asarray(X_ms, dtype=float), np.asarray(T_burst, dtype=float),
+            np.asarray(workers, dtype=np.int64), np.asarray(k_store, dtype=float),
+            np.asarray(scan_cost, dtype=float), np.asarray(documents, dtype=np.int64)))
+    shape = np.broadcast_shapes(*(np.shape(v) for v in params))
+    Tp, opp, X_sec, inter_arrival = _push_schedule(N, M, X_ms)
+    shards = shard_factors(N, documents, access)
+
+    server_peak, fluid_error, _ = _server_peak_grid(
+        N, M, Tp, opp, X_sec, inter_arrival, T_burst, exact_limit, workers, dispatch,
+        k_store, scan_cost * shards.scan)
+    client_peak, _ = _client_peak_grid(N, M, X_sec, T_burst, k_store,
+                                       scan_cost * shards.local_scan,
+                                       others=(N - 1) * M * shards.incoming)
+    server_peak = server_peak * shards.peak
+    client_peak = client_peak * shards.local_peak
+
+    client_wins = client_peak >= server_peak
+    peak = np.where(client_wins, client_peak, server_peak)
+    if scalar:
+        result = (float(peak[0]), ('client' if client_wins[0] else 'server'))
+        return result + (float(fluid_error[0]),) if with_error else result
+    result = (peak.reshape(shape),
+              np.where(client_wins, 'client', 'server').reshape(shape))
+    return result + (fluid_error.reshape(shape),) if with_error else result
+
+
+def _push_schedule(N, M, X_ms):
+    """Array versions of t_push, ops_per_push, X in seconds and the push spacing."""
+    Tp = np.where(M > 0, np.minimum(B / np.where(M > 0, M, 1.0), T_FLUSH), T_FLUSH)
+    opp = np.minimum(B, M * T_FLUSH)
     X_sec = X_ms / 1000.0
-    inter_arrival = Tp / N if N > 0 else Tp
-
-    # Server peak via recurrence
-    num_pushes = int(math.ceil(N * T_burst / Tp))
-    server_free = 0.0
-    server_peak = 0.0
-    for i in range(min(num_pushes, 5000)):  # cap iterations
-        arr_t = i * inter_arrival
-        if arr_t >= T_burst:
-            break
-        proc_t = max(arr_t, server_free)
-        W = proc_t - arr_t
-        C = min(K_STORE * (N - 1) * M * (Tp + W + RTT),
-                K_STORE * (N - 1) * M * T_burst)
-        server_peak = max(server_peak, C)
-        server_free = proc_t + X_sec * opp + 0.001 * C
-
-    # Client peak via recurrence
-    client_free = 0.0
-    client_peak = 0.0
-    t = T_POLL
-    while t <= T_burst + T_POLL + 0.001:
-        if t <= T_burst:
-            incoming = (N - 1) * M * T_POLL
+    inter_arrival = np.where(N > 0, Tp / np.where(N > 0, N, 1.0), Tp)
+    return Tp, opp, X_sec, inter_arrival
+
+
+def _server_peak_grid(N, M, Tp, opp, X_sec, inter_arrival, T_burst, exact_limit,
+                      workers, dispatch, k_store, scan_cost, backlog=None, clamp_bursts=1):
+    """
+    Server recurrence of fast_peak, advanced for every cell at once.
+
+    backlog is the time (from the burst's start) at which the workers
+    become free, for a queue left over from an earlier burst; the conflict
+    clamp covers clamp_bursts (scalar or per cell) bursts' worth of store
+    entries.
+
+    Returns (peak, fluid_error, done) arrays, done being when the last
+    push of the burst finishes; see fast_peak.
+    """
+    num_pushes = np.ceil(N * T_burst / Tp)
+
+    # Number of pushes each cell processes: i < num_pushes and
+    # i * ia < T_burst. Start from the closed form and correct it against
+    # the exact float test.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        first_late = np.nan_to_num(np.ceil(T_burst / inter_arrival))
+    first_late = np.where((first_late - 1) * inter_arrival >= T_burst,
+                          first_late - 1, first_late)
+    first_late = np.where(first_late * inter_arrival < T_burst,
+                          first_late + 1, first_late)
+    n_total = np.minimum(num_pushes, np.maximum(first_late, 0))
+    n_iter = np.minimum(n_total, exact_limit).astype(np.int64)
+    count("server steps", int(n_iter.sum()))
+
+    c_scale = k_store * (N - 1) * M
+    c_max = c_scale * T_burst * clamp_bursts
+    work = X_sec * opp
+
+    # Order cells by iteration count (longest first) so that the working set
+    # at step i is always a prefix: finished cells are masked out by slicing.
+    order = np.argsort(-n_iter, kind='stable')
+    n_sorted = n_iter[order]
+    s_scale, s_max, s_Tp, s_work, s_ia, s_scan = (
+        a[order] for a in (c_scale, c_max, Tp, work, inter_arrival, scan_cost))
+    cell_peak = np.zeros(N.size)
+
+    neg_sorted = -n_sorted
+    steps = int(n_sorted[0]) if N.size else 0
+    start = np.zeros(N.size) if backlog is None else backlog[order]
+    if (workers == 1).all():
+        free = start.copy()
+        for i in range(steps):
+            k = int(np.searchsorted(neg_sorted, -i, side='left'))
+            arr_t = i * s_ia[:k]
+            proc_t = np.maximum(arr_t, free[:k])
+            W = proc_t - arr_t
+            C = np.minimum(s_scale[:k] * (s_Tp[:k] + W + RTT), s_max[:k])
+            np.maximum(cell_peak[:k], C, out=cell_peak[:k])
+            free[:k] = proc_t + s_work[:k] + s_scan[:k] * C
+    else:
+        # One column per worker; columns beyond a cell's worker count are
+        # never free, so argmin only ever picks real workers.
+        s_N, s_workers = N[order], workers[order]
+        worker_free = np.where(np.arange(workers.max()) < s_workers[:, None],
+                               start[:, None], np.inf)
+        rows = np.arange(N.size)
+        for i in range(steps):
+            k = int(np.searchsorted(neg_sorted, -i, side='left'))
+            if dispatch == 'affinity':
+                w = ((i % s_N[:k]) % s_workers[:k]).astype(np.intp)
+            else:
+                w = np.argmin(worker_free[:k], axis=1)
+            arr_t = i * s_ia[:k]
+            proc_t = np.maximum(arr_t, worker_free[rows[:k], w])
+            W = proc_t - arr_t
+            C = np.minimum(s_scale[:k] * (s_Tp[:k] + W + RTT), s_max[:k])
+            np.maximum(cell_peak[:k], C, out=cell_peak[:k])
+            worker_free[rows[:k], w] = proc_t + s_work[:k] + s_scan[:k] * C
+        last_done = np.where(np.isfinite(worker_free), worker_free, -np.inf).max(axis=1)
+        # State handed to the fluid model: the next free worker ('shared'),
+        # or worker 0, which always has the most clients ('affinity')
+        free = worker_free[:, 0] if dispatch == 'affinity' else worker_free.min(axis=1)
+
+    peak = np.empty(N.size)
+    peak[order] = cell_peak
+    server_free = np.empty(N.size)
+    server_free[order] = free
+    done = np.empty(N.size)
+    done[order] = free if (workers == 1).all() else last_done
+
+    # Cells with pushes left over: continue from the exact state at push L
+    fluid_error = np.full(N.size, np.nan)
+    rest = n_total > n_iter
+    if rest.any():
+        count("fluid cells", int(rest.sum()))
+        L = n_iter[rest].astype(float)
+        c_scale_r, c_max_r, Tp_r, work_r, ia_r, scan_r = (
+            a[rest] for a in (c_scale, c_max, Tp, work, inter_arrival, scan_cost))
+        # The fluid model follows the busiest worker: it takes `share` of
+        # the pushes, so its own pushes are ia / share apart.
+        share = worker_load(N[rest], workers[rest], dispatch) / N[rest]
+        ia_w = ia_r / share
+
+        def conflicts(W):
+            with np.errstate(over='ignore'):
+                return np.minimum(c_scale_r * (Tp_r + W + RTT), c_max_r)
+
+        if dispatch == 'affinity':
+            # Next push for worker 0: the first index >= L from one of its clients
+            N_r = N[rest]
+            r = L % N_r
+            c_next = np.ceil(r / workers[rest]) * workers[rest]
+            L_next = L - r + np.where(c_next < N_r, c_next, N_r)
         else:
-            overlap = max(0.0, T_burst - (t - T_POLL))
-            incoming = (N - 1) * M * overlap
-        if incoming <= 0:
+            L_next = L
+        W_switch = np.maximum(0.0, server_free[rest] - L_next * ia_r)
+        W_last = _server_fluid_wait(W_switch, (n_total[rest] - 1 - L) * share,
+                                    c_scale_r, Tp_r, work_r, ia_w, scan_r)
+        peak[rest] = np.maximum(peak[rest],
+                                np.maximum(conflicts(W_switch), conflicts(W_last)))
+        done[rest] = ((n_total[rest] - 1) * ia_r + W_last + work_r
+                      + scan_r * conflicts(W_last))
+
+        # Approximation error: run the fluid model from the empty queue to
+        # push L and compare with the exact recurrence there.
+        C_exact = conflicts(W_switch)
+        C_fluid = conflicts(_server_fluid_wait(np.zeros_like(L), L * share, c_scale_r,
+                                               Tp_r, work_r, ia_w, scan_r))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fluid_error[rest] = np.where(C_exact > 0,
+                                         np.abs(C_fluid - C_exact) / C_exact, 0.0)
+
+    return peak, fluid_error, done
+
+
+def _server_fluid_wait(W0, pushes, c_scale, Tp, work, ia, scan_cost):
+    """
+    Fluid model of the server queue wait, in O(1) for any number of pushes.
+
+    Below the conflict clamp, each push adds (1 + beta) * W + c to the wait
+    of the next one, with beta = scan_cost * c_scale (scan time per second
+    of wait) and c = work + beta * (Tp + RTT) - ia (service time
+    minus the arrival gap at zero wait). Treating the push index as
+    continuous gives the linear ODE
+
+        dW/dn = ln(1 + beta) / beta * (beta * W + c)
+
+    whose rate is chosen so its flow matches the recurrence at every
+    integer n. (The naive rate beta over-predicts growth badly once beta
+    is not small.) Its solution is
+
+        W(n) = (W0 + c/beta) * (1 + beta)^n - c/beta    (beta > 0)
+        W(n) = W0 + c * n                               (beta = 0)
+
+    clamped at zero, where the queue empties and stays empty. W is monotone
+    in n, so its conflict peak over a stretch of pushes is at an endpoint.
+    Once the conflict count reaches its clamp the peak is the clamp value,
+    so the unclamped trajectory is enough to decide the peak.
+    """
+    beta = scan_cost * c_scale
+    c = work + beta * (Tp + RTT) - ia
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        safe_beta = np.where(beta > 0, beta, 1.0)
+        offset = c / safe_beta
+        growth = np.exp(pushes * np.log1p(beta))
+        coef = W0 + offset
+        W = np.where(coef == 0, -offset, coef * growth - offset)
+        W = np.where(beta > 0, W, W0 + c * pushes)
+    return np.maximum(W, 0.0)
+
+
+def _client_peak_grid(N, M, X_sec, T_burst, k_store, scan_cost, backlog=None,
+                      clamp_bursts=1, others=None):
+    """
+    Client recurrence of fast_peak, advanced for every cell at once.
+
+    backlog and clamp_bursts are as in _server_peak_grid; others is the
+    combined rate of the other clients (default (N-1) * M). Returns
+    (peak, free): free is when the client's last load job finishes.
+    """
+    client_free = np.zeros(N.shape) if backlog is None else backlog.copy()
+    client_peak = np.zeros(N.shape)
+    active = np.ones(N.shape, dtype=bool)
+    other_rate = (N - 1) * M if others is None else others
+    full_incoming = other_rate * T_POLL
+    c_max = k_store * M * T_burst * clamp_bursts
+    t_stop = T_burst + T_POLL + 0.001
+    t_last = t_stop.max() if N.size else 0.0
+
+    t = T_POLL
+    while t <= t_last:
+        overlap = np.maximum(0.0, T_burst - (t - T_POLL))
+        incoming = np.where(t <= T_burst, full_incoming, other_rate * overlap)
+        active &= (t <= t_stop) & (incoming > 0)
+        if not active.any():
             break
-        proc_t = max(t, client_free)
+        count("client steps", int(active.sum()))
+        proc_t = np.maximum(t, client_free)
         W = proc_t - t
-        C = min(K_STORE * M * (T_POLL + W), K_STORE * M * T_burst)
-        client_peak = max(client_peak, C)
-        client_free = proc_t + X_sec * incoming + 0.001 * C
+        C = np.minimum(k_store * M * (T_POLL + W), c_max)
+        client_peak = np.where(active, np.maximum(client_peak, C), client_peak)
+        client_free = np.where(active, proc_t + X_sec * incoming + scan_cost * C,
+                               client_free)
         t += T_POLL
 
-    if client_peak >= server_peak:
-        return client_peak, 'client'
-    return server_peak, 'server'
+    return client_peak, client_free
+
+
+def report_fluid_error(fluid_error, prefix=""):
+    """Print how many cells switched to the fluid model, and its worst error."""
+    switched = ~np.isnan(fluid_error)
+    if switched.any():
+        print(f"  {prefix}fluid model used for {switched.sum()} cells above "
+              f"{EXACT_LIMIT:,} pushes (max error at switch point: "
+              f"{np.nanmax(fluid_error):.2e})")
+
+
+# ─── Fast peak for client mixes ──────────────────────────────────────────────
+
+@cached
+def mix_peak(N, total, skew, X_ms, T_burst, dist='zipf', workers=None, dispatch=None,
+             documents=None, access=None):
+    """
+    fast_peak for N clients sharing `total` ops/sec unevenly, as
+    client_rates(N, total, dist, skew) (skew = 0 is the uniform mix).
+
+    Server: every client pushes on its own schedule (see mix_push_times)
+    and a push from client c sees K * (total - rate_c) * (T_push + W + RTT)
+    conflicts. Client: each client's load jobs bring the others' ops, and
+    the worst client counts, not the average one.
+
+    N, total, skew, X_ms and T_burst broadcast together; all cells run in
+    lockstep over their merged push schedules, like fast_peak's exact
+    recurrence (there is no fluid shortcut, so the cost grows with the
+    number of pushes). documents / access scale the conflicts as in
+    fast_peak (the 'partition' shares assume equal rates). Returns
+    (peak, bottleneck, worst_client):
+    worst_client is the client (0 = heaviest) whose push or load job hit
+    the peak.
+    """
+    workers = WORKERS if workers is None else workers
+    dispatch = DISPATCH if dispatch is None else dispatch
+    params = (N, total, skew, X_ms, T_burst)
+    scalar = all(np.ndim(v) == 0 for v in params)
+    N, total, skew, X_ms, T_burst = (a.ravel() for a in np.broadcast_arrays(
+        np.asarray(N, dtype=np.int64), np.asarray(total, dtype=float),
+        np.asarray(skew, dtype=float), np.asarray(X_ms, dtype=float),
+        np.asarray(T_burst, dtype=float)))
+    shape = np.broadcast_shapes(*(np.shape(v) for v in params))
+    rates = rate_matrix(N, total, dist, skew)
+    X_sec = X_ms / 1000.0
+    shards = shard_factors(N, documents, access)
+
+    server_peak, server_client = _mix_server_grid(N, rates, X_sec, T_burst, workers,
+                                                  dispatch, SCAN_COST * shards.scan)
+    server_peak = server_peak * shards.peak
+
+    # Client side: one row per (cell, client), the worst client per cell
+    present = np.arange(rates.shape[1]) < N[:, None]
+    cell, slot = np.nonzero(present)
+    m = rates[cell, slot]
+    local_peak, local_scan, incoming = (np.broadcast_to(a, N.shape)[cell] for a in (
+        shards.local_peak, shards.local_scan, shards.incoming))
+    peak, _ = _client_peak_grid(N[cell].astype(float), m, X_sec[cell], T_burst[cell],
+                                K_STORE, SCAN_COST * local_scan,
+                                others=(total[cell] - m) * incoming)
+    client_peaks = np.zeros(rates.shape)
+    client_peaks[cell, slot] = peak * local_peak
+    client_client = np.argmax(client_peaks, axis=1)
+    client_peak = client_peaks.max(axis=1, initial=0.0)
+
+    client_wins = client_peak >= server_peak
+    peak = np.where(client_wins, client_peak, server_peak)
+    worst = np.where(client_wins, client_client, server_client)
+    if scalar:
+        return (float(peak[0]), 'client' if client_wins[0] else 'server', int(worst[0]))
+    return (peak.reshape(shape), np.where(client_wins, 'client', 'server').reshape(shape),
+            worst.reshape(shape))
+
+
+def _mix_server_grid(N, rates, X_sec, T_burst, workers, dispatch, scan_cost):
+    """
+    Server recurrence of mix_peak for every cell at once (scan_cost is
+    per cell).
+
+    Builds each cell's merged push schedule (time, client), then walks push
+    index i across all cells at once. Returns (peak, peak_client) per cell.
+    """
+    cells, slots = rates.shape
+    present = np.arange(slots) < N[:, None]
+    Tp = np.where(rates > 0, np.minimum(B / np.where(rates > 0, rates, 1.0), T_FLUSH),
+                  T_FLUSH)
+    work = X_sec[:, None] * np.minimum(B, rates * T_FLUSH)
+    others = rates.sum(axis=1, keepdims=True) - rates
+    c_scale = K_STORE * others
+    c_max = c_scale * T_burst[:, None]
+    scan = np.broadcast_to(np.asarray(scan_cost, dtype=float)[..., None], rates.shape)
+    phase = np.arange(slots) / np.maximum(N, 1)[:, None]
+
+    # Pushes per client: (phase + j) * Tp < T_burst
+    n_push = np.where(present & (rates > 0),
+                      np.maximum(np.ceil(T_burst[:, None] / Tp - phase), 0), 0).astype(np.int64)
+    # Lay each cell's pushes out in a row (client by client), then sort
+    # every row by time; the stable sort lets the lower client go first.
+    # Pushes are labelled by their client's flat (cell, client) index.
+    pushes = n_push.sum(axis=1)
+    steps = int(pushes.max()) if cells else 0
+    count("server steps", int(pushes.sum()))
+    flat = n_push.ravel()
+    source = np.repeat(np.arange(cells * slots), flat)
+    j = np.arange(source.size) - np.repeat(np.cumsum(flat) - flat, flat)
+    slot = np.arange(source.size) + np.repeat(np.arange(cells) * steps
+                                              - (np.cumsum(pushes) - pushes), pushes)
+    Tp, c_scale, c_max, work, scan = (a.ravel() for a in (Tp, c_scale, c_max, work, scan))
+    arr = np.full(cells * steps, np.inf)
+    arr[slot] = (phase.ravel()[source] + j) * Tp[source]
+    who = np.zeros(cells * steps, dtype=np.int64)
+    who[slot] = source
+    by_time = np.argsort(arr.reshape(cells, steps), axis=1, kind='stable')
+
+    # Step-major tables, cells ordered by push count (longest first) so the
+    # cells still pushing at step i are a prefix: entry [i, r] is push i of
+    # the cell at rank r
+    cell_order = np.argsort(-pushes, kind='stable')
+    flat_index = (cell_order[:, None] * steps + by_time[cell_order]).T
+    arr, who = arr[flat_index], who[flat_index]
+
+    neg_sorted = -pushes[cell_order]
+    n_workers = np.broadcast_to(np.asarray(workers, dtype=np.int64), (cells,))[cell_order]
+    single = (n_workers == 1).all()
+    if single:
+        free = np.zeros(cells)
+    else:
+        worker_free = np.where(np.arange(n_workers.max()) < n_workers[:, None], 0.0, np.inf)
+    C_all = np.zeros((steps, cells))
+    rows = np.arange(cells)
+    for i in range(steps):
+        k = int(np.searchsorted(neg_sorted, -i, side='left'))
+        arr_t = arr[i, :k]
+        at = who[i, :k]
+        if single:
+            proc_t = np.maximum(arr_t, free[:k])
+        else:
+            if dispatch == 'affinity':
+                w = (at % slots) % n_workers[:k]
+            else:
+                w = np.argmin(worker_free[:k], axis=1)
+            proc_t = np.maximum(arr_t, worker_free[rows[:k], w])
+        W = proc_t - arr_t
+        C = C_all[i, :k]
+        np.minimum(c_scale[at] * (Tp[at] + W + RTT), c_max[at], out=C)
+        done = proc_t + work[at] + scan[at] * C
+        if single:
+            free[:k] = done
+        else:
+            worker_free[rows[:k], w] = done
+
+    # First push at each cell's peak, and the client it came from
+    peak_step = np.argmax(C_all, axis=0)
+    cell_peak = C_all[peak_step, rows] if cells else np.zeros(0)
+    peak_client = (who[peak_step, rows] % slots if cells
+                   else np.zeros(0, dtype=np.int64))
+    peak = np.empty(cells)
+    peak[cell_order] = cell_peak
+    client = np.empty(cells, dtype=np.int64)
+    client[cell_order] = peak_client
+    return peak, client
+
+
+# ─── Burst trains ────────────────────────────────────────────────────────────
+
+TRAIN_BURSTS = 3    # bursts per train for --bursts (default)
+GAP_MAX = 600.0     # longest inter-burst gap searched (seconds)
+
+
+@cached
+def train_peak(N, M, X_ms, T_burst, gap, bursts=TRAIN_BURSTS, workers=None, dispatch=None,
+               documents=None, access=None):
+    """
+    Peak conflicts over a train of `bursts` bursts of T_burst seconds,
+    separated by `gap` seconds without load.
+
+    Each burst runs fast_peak's recurrences, starting from the queue the
+    previous one left behind: the server and the client become free
+    max(0, done - (T_burst + gap)) seconds into the next burst. With
+    several workers all of them start at the last one's finish time, which
+    errs on the safe side. While a backlog carries over, conflict windows
+    reach back into the earlier bursts, so the conflict clamp covers every
+    burst since the queue was last empty.
+
+    Array inputs (documents included) broadcast as in fast_peak, and
+    documents / access scale the conflicts the same way. Returns
+    (peak, bottleneck).
+    """
+    workers = WORKERS if workers is None else workers
+    dispatch = DISPATCH if dispatch is None else dispatch
+    documents = DOCUMENTS if documents is None else documents
+    params = (N, M, X_ms, T_burst, gap, workers, documents)
+    scalar = all(np.ndim(v) == 0 for v in params)
+    N, M, X_ms, T_burst, gap, workers, documents = (a.ravel() for a in np.broadcast_arrays(
+        np.asarray(N, dtype=float), np.asarray(M, dtype=float),
+        np.asarray(X_ms, dtype=float), np.asarray(T_burst, dtype=float),
+        np.asarray(gap, dtype=float), np.asarray(workers, dtype=np.int64),
+        np.asarray(documents, dtype=np.int64)))
+    shape = np.broadcast_shapes(*(np.shape(v) for v in params))
+    Tp, opp, X_sec, inter_arrival = _push_schedule(N, M, X_ms)
+    shards = shard_factors(N, documents, access)
+    k_store = np.full(N.size, K_STORE)
+    server_scan = SCAN_COST * shards.scan
+    client_scan = SCAN_COST * shards.local_scan
+    others = (N - 1) * M * shards.incoming
+
+    period = T_burst + gap
+    server_peak, client_peak = np.zeros(N.size), np.zeros(N.size)
+    server_backlog, client_backlog = np.zeros(N.size), np.zeros(N.size)
+    server_chain, client_chain = np.ones(N.size), np.ones(N.size)
+    for _ in range(bursts):
+        peak, _, done = _server_peak_grid(
+            N, M, Tp, opp, X_sec, inter_arrival, T_burst, EXACT_LIMIT, workers, dispatch,
+            k_store, server_scan, backlog=server_backlog, clamp_bursts=server_chain)
+        server_peak = np.maximum(server_peak, peak * shards.peak)
+        server_backlog = np.maximum(done - period, 0.0)
+        server_chain = np.where(server_backlog > 0, server_chain + 1, 1.0)
+        peak, free = _client_peak_grid(N, M, X_sec, T_burst, k_store, client_scan,
+                                       backlog=client_backlog, clamp_bursts=client_chain,
+                                       others=others)
+        client_peak = np.maximum(client_peak, peak * shards.local_peak)
+        client_backlog = np.maximum(free - period, 0.0)
+        client_chain = np.where(client_backlog > 0, client_chain + 1, 1.0)
+
+    client_wins = client_peak >= server_peak
+    peak = np.where(client_wins, client_peak, server_peak)
+    if scalar:
+        return float(peak[0]), ('client' if client_wins[0] else 'server')
+    return peak.reshape(shape), np.where(client_wins, 'client', 'server').reshape(shape)
+
+
+@cached
+def min_safe_gap(N, M, X_ms, T_burst, S_max, bursts=TRAIN_BURSTS, gap_max=GAP_MAX,
+                 iterations=24):
+    """
+    Shortest gap between bursts that keeps a train's peak below S_max,
+    bisecting all (N, M) cells at once (a longer gap never raises the peak).
+
+    Returns an array of the broadcast shape: 0 where back-to-back bursts
+    are already safe, NaN where a single burst fails (no gap helps), inf
+    where even gap_max is not enough.
+    """
+    N, M = np.broadcast_arrays(np.asarray(N, dtype=float), np.asarray(M, dtype=float))
+
+    def safe(gap):
+        # Probes are cached as a whole through min_safe_gap, not one by one
+        return train_peak.__wrapped__(N, M, X_ms, T_burst, gap, bursts)[0] < S_max
+
+    single_fails = fast_peak.__wrapped__(N, M, X_ms, T_burst)[0] >= S_max
+    count("bisect probes", (iterations + 2) * N.size)
+    lo = np.zeros(N.shape)
+    hi = np.full(N.shape, float(gap_max))
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        ok = safe(mid)
+        lo = np.where(ok, lo, mid)
+        hi = np.where(ok, mid, hi)
+    gap = np.where(safe(0.0), 0.0, hi)
+    gap = np.where(safe(float(gap_max)), gap, np.inf)
+    return np.where(single_fails, np.nan, gap)
 
 
 # ─── Plot 1: Capacity heatmap ────────────────────────────────────────────────
 
 def plot_capacity_heatmap(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
-                          experiments=None, output="burst_capacity_heatmap.png"):
+                          experiments=None, output="burst_capacity_heatmap.png",
+                          jobs=1):
     """Heatmap of peak_conflicts / S_max in (N, M) space with experimental overlay."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LinearSegmentedColormap
+
     N_range = np.arange(1, 51)
     M_range = np.linspace(1, 50, 50)
-    ratio_grid = np.zeros((len(M_range), len(N_range)))
+    Ngrid, Mgrid = np.meshgrid(N_range, M_range)
 
     print(f"  Computing capacity heatmap ({len(N_range)}x{len(M_range)} grid)...")
-    for i, M in enumerate(M_range):
-        for j, N_val in enumerate(N_range):
-            peak, _ = fast_peak(int(N_val), M, X_ms, T_burst)
-            ratio_grid[i, j] = peak / S_max
+    peak, _, fluid_error = map_grid(fast_peak, (Ngrid, Mgrid, X_ms, T_burst),
+                                    jobs, kwargs={'with_error': True}, **_pool_state())
+    report_fluid_error(fluid_error)
+    ratio_grid = peak / S_max
 
     colors = ["#2ecc71", "#f1c40f", "#e74c3c", "#8b0000"]
     cmap = LinearSegmentedColormap.from_list("capacity", colors)
@@ -438,9 +1556,10 @@ def plot_capacity_heatmap(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
                  f"S_max={S_max:,}, X={X_ms:.0f}ms/op)\n"
                  f"White dashed = model boundary | Markers = experimental results")
 
-    plt.tight_layout()
-    plt.savefig(output, dpi=150)
-    plt.close()
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
     print(f"  Saved: {output}")
 
 
@@ -449,6 +1568,8 @@ def plot_capacity_heatmap(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
 def plot_burst_timeseries(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
                           output="burst_timeseries.png"):
     """3-panel time series for representative burst configs."""
+    import matplotlib.pyplot as plt
+
     configs = [
         (4, 20, "N=4, M=20 (validated)"),
         (10, 10, "N=10, M=10"),
@@ -491,35 +1612,65 @@ def plot_burst_timeseries(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
     axes[0].text(T_burst + 0.2, axes[0].get_ylim()[1] * 0.7,
                  "burst ends", fontsize=9, color='gray')
 
-    plt.tight_layout()
-    plt.savefig(output, dpi=150)
-    plt.close()
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
     print(f"  Saved: {output}")
 
 
 # ─── Plot 3: Duration sensitivity ────────────────────────────────────────────
 
+@cached
+def bisect_m_max(N_values, X_ms, T_burst, S_max, lo=0.5, hi=500.0, iterations=30,
+                 documents=None, access=None):
+    """
+    Largest M with peak < S_max for each N, bisecting all N at once.
+    documents (default DOCUMENTS) may be an array broadcasting with N_values.
+
+    Returns (M_max, worst_fluid_error) arrays of the broadcast shape.
+    """
+    N_values = np.asarray(N_values)
+    shape = np.broadcast_shapes(N_values.shape, np.shape(documents))
+    lo = np.full(shape, lo)
+    hi = np.full(shape, hi)
+    worst_error = np.full(shape, np.nan)
+    count("bisect probes", iterations * lo.size)
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        # Probes are cached as a whole through bisect_m_max, not one by one
+        peak, _, fluid_error = fast_peak.__wrapped__(N_values, mid, X_ms, T_burst,
+                                                     with_error=True, documents=documents,
+                                                     access=access)
+        worst_error = np.fmax(worst_error, fluid_error)
+        ok = peak < S_max
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+    return lo, worst_error
+
+
 def plot_duration_sensitivity(X_ms=X_DEFAULT, S_max=S_MAX,
-                              output="burst_duration_sensitivity.png"):
+                              output="burst_duration_sensitivity.png", jobs=1):
     """Boundary curves for various T_burst values. X=N, Y=M_max."""
+    import matplotlib.pyplot as plt
+
     T_bursts = [5, 10, 30, 60]
     N_range = np.arange(2, 51)
 
     fig, ax = plt.subplots(figsize=(12, 7))
 
+    # One bisection task per (T_burst, slice of N), spread over the pool
+    chunks = split_evenly(len(N_range), resolve_jobs(jobs))
+    tasks = [(N_range[idx], X_ms, T_burst, S_max)
+             for T_burst in T_bursts for idx in chunks]
+    results = iter(run_sweep(bisect_m_max, tasks, jobs, **_pool_state()))
+
     for T_burst in T_bursts:
-        M_max = []
-        for N_val in N_range:
-            N_int = int(N_val)
-            lo, hi = 0.5, 500.0
-            for _ in range(30):
-                mid = (lo + hi) / 2
-                peak, _ = fast_peak(N_int, mid, X_ms, T_burst)
-                if peak < S_max:
-                    lo = mid
-                else:
-                    hi = mid
-            M_max.append(lo)
+        M_max = np.empty(N_range.shape)
+        worst_error = np.empty(N_range.shape)
+        for idx in chunks:
+            M_max[idx], worst_error[idx] = next(results)
+        report_fluid_error(worst_error, f"T_burst={T_burst}s: ")
         ax.plot(N_range, M_max, 'o-', label=f"T_burst = {T_burst}s",
                 linewidth=2, markersize=3)
 
@@ -555,9 +1706,10 @@ def plot_duration_sensitivity(X_ms=X_DEFAULT, S_max=S_MAX,
     ax.grid(True, alpha=0.3)
     ax.set_yscale('log')
 
-    plt.tight_layout()
-    plt.savefig(output, dpi=150)
-    plt.close()
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
     print(f"  Saved: {output}")
 
 
@@ -566,6 +1718,8 @@ def plot_duration_sensitivity(X_ms=X_DEFAULT, S_max=S_MAX,
 def plot_queue_dynamics(N=20, M=10, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT,
                         S_max=S_MAX, output="burst_queue_dynamics.png"):
     """4-panel deep-dive for one near-boundary config."""
+    import matplotlib.pyplot as plt
+
     result = simulate_burst(N, M, X_ms, T_burst, S_max)
 
     fig, axes = plt.subplots(4, 1, figsize=(14, 12), sharex=True)
@@ -626,69 +1780,802 @@ def plot_queue_dynamics(N=20, M=10, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT,
         for ax in axes:
             ax.axvline(x=result['fail_time'], color='red', linestyle='--', alpha=0.5)
 
-    plt.tight_layout()
-    plt.savefig(output, dpi=150)
-    plt.close()
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
     print(f"  Saved: {output}")
 
 
-# ─── Summary table ────────────────────────────────────────────────────────────
+# ─── Plot 5: Monte Carlo tail risk ───────────────────────────────────────────
+
+def plot_monte_carlo(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                     replicas=2000, arrivals='poisson', seed=0,
+                     output="burst_monte_carlo.png", jobs=1):
+    """Peak-conflict percentile bands and P(peak > S_max) against M, for a few N."""
+    import matplotlib.pyplot as plt
+
+    N_values = [4, 10, 20]
+    M_range = np.linspace(1, 30, 30)
+    print(f"  Running Monte Carlo sweep ({len(N_values)}x{len(M_range)} configs, "
+          f"{replicas} replicas each)...")
+    tasks = [(N, M, X_ms, T_burst, S_max) for N in N_values for M in M_range]
+    results = iter(run_sweep(monte_carlo_burst, tasks, jobs,
+                             kwargs={'replicas': replicas, 'arrivals': arrivals,
+                                     'seed': seed}, **_pool_state()))
+
+    fig, axes = plt.subplots(2, 1, figsize=(12, 9), sharex=True)
+    for N in N_values:
+        rows = [next(results) for _ in M_range]
+        band = {q: np.array([r['peak'][q] for r in rows]) for q in ('p5', 'p50', 'p95', 'p99')}
+        deterministic, _ = fast_peak(N, M_range, X_ms, T_burst)
+
+        line, = axes[0].plot(M_range, band['p50'], '-', linewidth=2, label=f"N={N} median")
+        color = line.get_color()
+        axes[0].fill_between(M_range, band['p5'], band['p95'], color=color, alpha=0.2,
+                             label=f"N={N} p5-p95")
+        axes[0].plot(M_range, band['p99'], ':', color=color, linewidth=1.5,
+                     label=f"N={N} p99")
+        axes[0].plot(M_range, deterministic, '--', color=color, linewidth=1, alpha=0.7)
+        axes[1].plot(M_range, [r['p_fail'] for r in rows], 'o-', color=color,
+                     linewidth=1.5, markersize=3, label=f"N={N}")
 
-def print_summary(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
-                  experiments=None):
-    """Print results for key configurations and all experimental data."""
-    print("\n" + "=" * 110)
-    print("BURST-LOAD CAPACITY ENVELOPE - SUMMARY")
-    print("=" * 110)
-    print(f"\nParameters: B={B}, T_flush={T_FLUSH*1000:.0f}ms, S_max={S_max:,}, "
-          f"T_poll={T_POLL*1000:.0f}ms, RTT={RTT*1000:.0f}ms, X={X_ms:.0f}ms/op")
-    print(f"Burst duration: {T_burst:.0f}s, K_store={K_STORE}")
+    axes[0].axhline(y=S_max, color='red', linestyle=':', linewidth=1, alpha=0.7,
+                    label=f"S_max = {S_max:,}")
+    axes[0].set_ylabel("Peak Conflicts")
+    axes[0].set_yscale('log')
+    axes[0].set_title(f"Monte Carlo Tail Risk ({arrivals} arrivals, {replicas} replicas, "
+                      f"T_burst={T_burst:.0f}s, X={X_ms:.0f}ms/op)\n"
+                      f"Dashed = deterministic model")
+    axes[0].legend(fontsize=8, ncol=3, loc='lower right')
+
+    axes[1].set_ylabel("P(peak > S_max)")
+    axes[1].set_xlabel("Ops/sec per Client (M)")
+    axes[1].set_ylim(-0.02, 1.02)
+    axes[1].legend(fontsize=9)
 
-    # Validation checks first
+    for ax in axes:
+        ax.grid(True, alpha=0.2)
+
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
+    print(f"  Saved: {output}")
+
+
+# ─── Plot 6: Core scaling ────────────────────────────────────────────────────
+
+CORE_COUNTS = (1, 4, 16, 64)
+SCALING_N = (10, 30)  # clients at which the table reports M_max
+
+
+def compute_core_scaling(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                         worker_counts=CORE_COUNTS, jobs=1):
+    """
+    Capacity envelope on the heatmap grid for each worker count and
+    dispatch policy.
+
+    Returns {"rows": [...], "N": N_range, "M": M_range, "ratio": {...}}.
+    Each row (JSON-serializable) gives the safe cell count, its gain over
+    one worker, M_max at SCALING_N, how many cells are client-bound (client
+    peak >= server peak), and which side the failing cells fail on.
+    ratio[(dispatch, workers)] is the peak / S_max grid for plotting. One
+    worker is always included, as the baseline.
+    """
+    worker_counts = sorted(set(worker_counts) | {1})
+    N_range = np.arange(1, 51)
+    M_range = np.linspace(1, 50, 50)
+    Ngrid, Mgrid = np.meshgrid(N_range, M_range)
+
+    rows, ratios = [], {}
+    for dispatch in ('shared', 'affinity'):
+        baseline = None
+        for workers in worker_counts:
+            peak, bottleneck = map_grid(fast_peak, (Ngrid, Mgrid, X_ms, T_burst), jobs,
+                                        kwargs={'workers': workers, 'dispatch': dispatch},
+                                        **_pool_state())
+            ratios[(dispatch, workers)] = peak / S_max
+            safe = peak < S_max
+            baseline = safe.sum() if baseline is None else baseline
+            m_max = {}
+            for N in SCALING_N:
+                col = safe[:, N - 1]
+                first_fail = np.argmin(col) if not col.all() else len(M_range)
+                m_max[str(N)] = float(M_range[first_fail - 1]) if first_fail > 0 else 0.0
+            rows.append({
+                "workers": workers, "dispatch": dispatch,
+                "safe_cells": int(safe.sum()), "total_cells": int(safe.size),
+                "gain": float(safe.sum() / baseline) if baseline else 0.0,
+                "M_max": m_max,
+                "client_bound": int((bottleneck == 'client').sum()),
+                "fails_server": int((~safe & (bottleneck == 'server')).sum()),
+                "fails_client": int((~safe & (bottleneck == 'client')).sum()),
+            })
+    return {"rows": rows, "N": N_range, "M": M_range, "ratio": ratios}
+
+
+def print_core_scaling(scaling):
+    """Print the compute_core_scaling table."""
+    rows = scaling["rows"]
     print(f"\n{'=' * 110}")
-    print("VALIDATION CHECKS:")
-    v1 = simulate_burst(4, 20, X_ms, 8.0, 10000)
-    v2 = simulate_burst(4, 20, X_ms, 8.0, 1000)
-    v1_ok = "PASS" if v1['survives'] else "FAIL"
-    v2_ok = "PASS" if not v2['survives'] else "FAIL"
-    print(f"  N=4, M=20, T_burst=8s, S_max=10000 -> "
-          f"{'SURVIVES' if v1['survives'] else 'FAILS'} "
-          f"(peak={v1['peak_conflicts']:,.0f}) ... {v1_ok}")
-    print(f"  N=4, M=20, T_burst=8s, S_max=1000  -> "
-          f"{'SURVIVES' if v2['survives'] else 'FAILS'} "
-          f"(peak={v2['peak_conflicts']:,.0f}) ... {v2_ok}")
+    print(f"CORE SCALING (switchboard workers, {rows[0]['total_cells']} cells of the "
+          f"capacity heatmap grid):")
+    header = (f"{'Workers':>7} {'Dispatch':>9} {'Safe':>6} {'Gain':>6} "
+              + " ".join(f"{'M_max@N=' + n:>12}" for n in rows[0]["M_max"])
+              + f" {'ClientBound':>12} {'Fails: server':>14} {'client':>7}")
+    print(f"\n{header}")
+    print("-" * len(header))
+    for r in rows:
+        print(f"{r['workers']:>7} {r['dispatch']:>9} {r['safe_cells']:>6} "
+              f"{r['gain']:>5.2f}x "
+              + " ".join(f"{m:>12.0f}" for m in r["M_max"].values())
+              + f" {r['client_bound']:>12} {r['fails_server']:>14} {r['fails_client']:>7}")
+
+
+def plot_core_scaling(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                      scaling=None, output="burst_core_scaling.png", jobs=1):
+    """Capacity boundary (peak = S_max) per worker count, one panel per dispatch policy."""
+    import matplotlib.pyplot as plt
+    from matplotlib.lines import Line2D
+
+    if scaling is None:
+        scaling = compute_core_scaling(X_ms, T_burst, S_max, jobs=jobs)
+    worker_counts = sorted({r["workers"] for r in scaling["rows"]})
+    colors = plt.cm.viridis(np.linspace(0, 0.85, len(worker_counts)))
+
+    fig, axes = plt.subplots(1, 2, figsize=(16, 7), sharey=True)
+    for ax, dispatch in zip(axes, ('shared', 'affinity')):
+        handles = []
+        for workers, color in zip(worker_counts, colors):
+            ax.contour(scaling["N"], scaling["M"], scaling["ratio"][(dispatch, workers)],
+                       levels=[1.0], colors=[color], linewidths=2)
+            row = next(r for r in scaling["rows"]
+                       if r["workers"] == workers and r["dispatch"] == dispatch)
+            handles.append(Line2D([0], [0], color=color, linewidth=2,
+                                  label=f"{workers} worker{'s' if workers > 1 else ''} "
+                                        f"({row['safe_cells']} safe cells, "
+                                        f"{row['client_bound']} client-bound)"))
+        ax.set_title(f"dispatch = {dispatch}")
+        ax.set_xlabel("Number of Clients (N)")
+        ax.legend(handles=handles, fontsize=8, loc='upper right')
+        ax.grid(True, alpha=0.2)
+    axes[0].set_ylabel("Ops/sec per Client (M)")
+    fig.suptitle(f"Capacity Boundary vs Switchboard Workers (T_burst={T_burst:.0f}s, "
+                 f"S_max={S_max:,}, X={X_ms:.0f}ms/op)\n"
+                 f"Safe region is below each curve")
 
-    if not experiments:
-        return
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
+    print(f"  Saved: {output}")
+
+
+# ─── Plot 7: Trace replay ────────────────────────────────────────────────────
+
+TRACE_CLIENTS = (4, 10, 20, 30)
+
+
+@cached
+def trace_headroom(N, profile, X_ms, S_max, iterations=16):
+    """
+    Largest factor the profile's rates can be scaled by and still keep the
+    peak below S_max (bisection; inf if even 1024x survives).
+    """
+    def survives(factor):
+        # Probes are cached as a whole through trace_headroom, not one by one
+        return simulate_burst.__wrapped__(N, profile.scaled(factor), X_ms,
+                                          profile.duration, S_max)['survives']
+
+    lo, hi = 0.0, 1.0
+    while survives(hi):
+        lo, hi = hi, hi * 2
+        if hi > 1024:
+            return float('inf')
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        lo, hi = (mid, hi) if survives(mid) else (lo, mid)
+    return lo
+
+
+def compute_trace_replay(profile, X_ms=X_DEFAULT, S_max=S_MAX,
+                         clients=TRACE_CLIENTS, jobs=1):
+    """
+    Replay a load profile through simulate_burst for each client count.
+
+    Returns one JSON-serializable row per N: the peak and which side hit
+    it, when (peak_time) and whether capacity ran out (fail_time), the
+    drain time after the profile ends, and the headroom factor.
+    """
+    results = run_sweep(simulate_burst,
+                        [(N, profile, X_ms, profile.duration, S_max) for N in clients], jobs,
+                        **_pool_state())
+    headroom = run_sweep(trace_headroom, [(N, profile, X_ms, S_max) for N in clients], jobs,
+                         **_pool_state())
+    rows = []
+    for N, r, h in zip(clients, results, headroom):
+        rows.append({
+            "N": N,
+            "peak_conflicts": float(r['peak_conflicts']),
+            "bottleneck": r['bottleneck'],
+            "peak_time": float(r['worst']['peak_time']),
+            "fail_time": r['fail_time'],
+            "drain_time": float(r['drain_time']),
+            "survives": bool(r['survives']),
+            "headroom": h,
+        })
+    return rows
+
+
+def print_trace_replay(rows, profile, S_max=S_MAX):
+    """Print the compute_trace_replay table."""
+    print(f"\n{'=' * 100}")
+    print(f"TRACE REPLAY ({profile.duration:.0f}s, peak M={profile.peak_rate:.1f}, "
+          f"mean M={profile.mean_rate:.1f} ops/s per client, S_max={S_max:,}):")
+    header = (f"{'N':>4} {'Peak':>10} {'Side':>7} {'Peak at':>9} {'Fails at':>9} "
+              f"{'Drain':>9} {'Verdict':>9} {'Headroom':>9}")
+    print(f"\n{header}")
+    print("-" * len(header))
+    for r in rows:
+        fail = f"{r['fail_time']:.1f}s" if r['fail_time'] is not None else "-"
+        headroom = "inf" if r['headroom'] == float('inf') else f"{r['headroom']:.2f}x"
+        print(f"{r['N']:>4} {r['peak_conflicts']:>10,.0f} {r['bottleneck']:>7} "
+              f"{r['peak_time']:>8.1f}s {fail:>9} {r['drain_time']:>8.1f}s "
+              f"{'SURVIVES' if r['survives'] else 'FAILS':>9} {headroom:>9}")
+    print("  Headroom: factor the trace's rates can grow by before the peak reaches S_max")
+
+
+def plot_trace_replay(profile, X_ms=X_DEFAULT, S_max=S_MAX, clients=TRACE_CLIENTS,
+                      output="burst_trace.png"):
+    """Load profile (top) and the conflict count it drives for each N (bottom)."""
+    import matplotlib.pyplot as plt
+
+    fig, (ax_load, ax_c) = plt.subplots(2, 1, figsize=(14, 9), sharex=True,
+                                        gridspec_kw={'height_ratios': [1, 2]})
+    ax_load.stairs(profile.rates, profile.edges, fill=True, alpha=0.4, color='#3498db')
+    ax_load.set_ylabel("M(t) (ops/sec per client)")
+    ax_load.set_title(f"Trace Replay (X={X_ms:.0f}ms/op, S_max={S_max:,})")
+    ax_load.grid(True, alpha=0.3)
+
+    colors = plt.cm.viridis(np.linspace(0, 0.9, len(clients)))
+    for N, color in zip(clients, colors):
+        r = simulate_burst(N, profile, X_ms, profile.duration, S_max)
+        for side, style in (('server', '-'), ('client', '--')):
+            series = r[side]
+            ax_c.plot(series['t'], np.maximum(series['conflicts'], 1), style, color=color,
+                      linewidth=1, label=f"N={N} {side}")
+        if r['fail_time'] is not None:
+            ax_c.axvline(r['fail_time'], color=color, linestyle=':', alpha=0.8)
+    ax_c.axhline(S_max, color='red', linestyle='--', linewidth=2, label=f"S_max={S_max:,}")
+    ax_c.set_yscale('log')
+    ax_c.set_xlabel("Time (seconds)")
+    ax_c.set_ylabel("Conflicts (log)")
+    ax_c.legend(fontsize=8, ncol=2)
+    ax_c.grid(True, alpha=0.3)
+
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
+    print(f"  Saved: {output}")
+
+
+# ─── Plot 8: Minimum inter-burst gap ─────────────────────────────────────────
+
+GAP_TABLE_N = (5, 10, 20, 30, 50)
+GAP_TABLE_M = (1, 2, 5, 10, 20, 50)
+
+
+def compute_min_gap(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                    bursts=TRAIN_BURSTS, gap_max=GAP_MAX, jobs=1):
+    """
+    min_safe_gap on the capacity heatmap grid.
+
+    Returns {"N", "M", "gap"} grids plus the train settings, and "rows":
+    JSON-serializable cells at GAP_TABLE_N x GAP_TABLE_M, each with the
+    gap (None unless finite), a status ('safe' / 'never' / 'beyond') and
+    the highest average per-client rate a train of that shape allows.
+    """
+    N_range = np.arange(1, 51)
+    M_range = np.linspace(1, 50, 50)
+    Ngrid, Mgrid = np.meshgrid(N_range, M_range)
+    gap = map_grid(min_safe_gap, (Ngrid, Mgrid, X_ms, T_burst, S_max), jobs,
+                   kwargs={'bursts': bursts, 'gap_max': gap_max}, **_pool_state())
+
+    rows = []
+    for N in GAP_TABLE_N:
+        for M in GAP_TABLE_M:
+            g = float(gap[int(np.argmin(np.abs(M_range - M))), N - 1])
+            status = 'never' if np.isnan(g) else 'beyond' if np.isinf(g) else 'safe'
+            rows.append({
+                "N": N, "M": M, "status": status,
+                "min_gap": g if status == 'safe' else None,
+                "mean_rate": M * T_burst / (T_burst + g) if status == 'safe' else None,
+            })
+    return {"bursts": bursts, "T_burst": T_burst, "gap_max": gap_max, "rows": rows,
+            "N": N_range, "M": M_range, "gap": gap}
+
+
+def print_min_gap(result):
+    """Print the compute_min_gap table (min gap per N and M)."""
+    rows = result["rows"]
+    print(f"\n{'=' * 90}")
+    print(f"MINIMUM SAFE GAP between {result['bursts']} bursts of "
+          f"{result['T_burst']:g}s (searched up to {result['gap_max']:g}s):")
+    header = f"{'N / M':>6} " + " ".join(f"{m:>10}" for m in GAP_TABLE_M)
+    print(f"\n{header}")
+    print("-" * len(header))
+    for N in GAP_TABLE_N:
+        cells = []
+        for r in (r for r in rows if r["N"] == N):
+            if r["status"] == 'never':
+                cells.append("never")
+            elif r["status"] == 'beyond':
+                cells.append(f">{result['gap_max']:g}s")
+            else:
+                cells.append(f"{r['min_gap']:.1f}s")
+        print(f"{N:>6} " + " ".join(f"{c:>10}" for c in cells))
+    print("  never: a single burst already exceeds S_max. A train at rate M with the "
+          "minimum gap\n  averages M * T_burst / (T_burst + gap) ops/sec per client "
+          "(\"mean_rate\" in --json).")
+
+
+def plot_min_gap(result, S_max=S_MAX, output="burst_min_gap.png"):
+    """Heatmap of the minimum safe inter-burst gap over (N, M)."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    N_range, M_range, gap = result["N"], result["M"], result["gap"]
+    finite = np.where(np.isfinite(gap) & (gap > 0), gap, np.nan)
+
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.pcolormesh(N_range, M_range, np.where(np.isnan(gap), 1.0, np.nan),
+                  cmap='Greys', vmin=0, vmax=2, shading='auto')
+    ax.pcolormesh(N_range, M_range, np.where(np.isinf(gap), 1.0, np.nan),
+                  cmap='Reds', vmin=0, vmax=1.2, shading='auto')
+    ax.pcolormesh(N_range, M_range, np.where(gap == 0, 1.0, np.nan),
+                  cmap='Greens', vmin=0, vmax=5, shading='auto')
+    if np.isfinite(finite).any():
+        im = ax.pcolormesh(N_range, M_range, finite, cmap='viridis', shading='auto',
+                           norm=LogNorm(vmin=max(np.nanmin(finite), 0.1),
+                                        vmax=np.nanmax(finite)))
+        fig.colorbar(im, ax=ax, label="Minimum gap between bursts (s)")
+        levels = [lv for lv in (1, 10, 60, 300) if np.nanmin(finite) < lv < np.nanmax(finite)]
+        if levels:
+            cs = ax.contour(N_range, M_range, finite, levels=levels, colors='white',
+                            linewidths=1)
+            ax.clabel(cs, fmt=lambda v: f"{v:g}s", fontsize=8)
+
+    ax.set_xlabel("Number of Clients (N)")
+    ax.set_ylabel("Ops/sec per Client (M)")
+    ax.set_title(f"Minimum Safe Gap for Trains of {result['bursts']} x "
+                 f"{result['T_burst']:g}s Bursts (S_max={S_max:,})\n"
+                 f"Green = back-to-back safe | Grey = one burst fails | "
+                 f"Red = needs > {result['gap_max']:g}s")
+
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
+    print(f"  Saved: {output}")
+
+
+# ─── Plot 9: Client rate skew ────────────────────────────────────────────────
+
+MIX_SKEWS = (0.0, 0.5, 1.0, 1.5)  # --skew default; 0 is the uniform mix
+MIX_TOTALS = np.linspace(5, 250, 50)  # total ops/sec axis of the skew heatmaps
+
+
+@cached
+def bisect_total_max(N, skew, X_ms, T_burst, S_max, dist='zipf', lo=0.5, hi=2000.0,
+                     iterations=30):
+    """
+    Largest total rate with peak < S_max for each (N, skew), bisecting
+    all cells at once. N and skew broadcast together.
+    """
+    N, skew = np.broadcast_arrays(np.asarray(N), np.asarray(skew, dtype=float))
+    lo = np.full(N.shape, lo)
+    hi = np.full(N.shape, hi)
+    count("bisect probes", iterations * N.size)
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        # Probes are cached as a whole through bisect_total_max, not one by one
+        ok = mix_peak.__wrapped__(N, mid, skew, X_ms, T_burst, dist)[0] < S_max
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+    return lo
+
+
+def compute_skew_envelope(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                          dist='zipf', skews=MIX_SKEWS, jobs=1):
+    """
+    Capacity envelope in (N, total rate) space for each skew of a client mix.
+
+    Returns {"dist", "rows", "N", "total", "ratio"}. Each row (JSON-
+    serializable) gives the safe cell count, its ratio to the uniform mix
+    (skew 0), and at SCALING_N the highest safe total rate, the heaviest
+    client's share, and the side and client that fail just above it.
+    ratio[skew] is the peak / S_max grid for plotting (always including
+    skew 0).
+    """
+    N_range = np.arange(1, 51)
+    Ngrid, Tgrid = np.meshgrid(N_range, MIX_TOTALS)
+    N_cols = np.array(SCALING_N)
+    total_max = bisect_total_max(N_cols[None, :], np.array(skews, dtype=float)[:, None],
+                                 X_ms, T_burst, S_max, dist)
+
+    ratios = {}
+    for skew in sorted(set(skews) | {0.0}):
+        peak, _, _ = map_grid(mix_peak, (Ngrid, Tgrid, skew, X_ms, T_burst), jobs,
+                              kwargs={'dist': dist}, **_pool_state())
+        ratios[skew] = peak / S_max
+    uniform = ratios[0.0] < 1.0
+
+    rows = []
+    for skew, t_max in zip(skews, total_max):
+        safe = ratios[skew] < 1.0
+        # What breaks first just above the boundary
+        _, side, client = mix_peak(N_cols, t_max * 1.001, skew, X_ms, T_burst, dist)
+        rows.append({
+            "skew": float(skew),
+            "safe_cells": int(safe.sum()), "total_cells": int(safe.size),
+            "vs_uniform": float(safe.sum() / uniform.sum()) if uniform.any() else 0.0,
+            "total_max": {str(N): float(t) for N, t in zip(SCALING_N, t_max)},
+            "top_share": {str(N): float(client_rates(N, 1.0, dist, skew)[0])
+                          for N in SCALING_N},
+            "fails_on": {str(N): {"side": str(sd), "client": int(c)}
+                         for N, sd, c in zip(SCALING_N, side, client)},
+        })
+    return {"dist": dist, "rows": rows, "N": N_range, "total": MIX_TOTALS,
+            "ratio": ratios}
+
+
+def print_skew_envelope(result):
+    """Print the compute_skew_envelope table."""
+    rows = result["rows"]
+    print(f"\n{'=' * 96}")
+    print(f"CLIENT RATE SKEW ({result['dist']} mix, {rows[0]['total_cells']} cells of "
+          f"N x total ops/sec):")
+    header = (f"{'Skew':>5} {'Safe':>6} {'vs uniform':>11} "
+              + " ".join(f"{'Total_max@N=' + n:>16} {'Top':>5} {'Fails on':>12}"
+                         for n in rows[0]["total_max"]))
+    print(f"\n{header}")
+    print("-" * len(header))
+    for r in rows:
+        cells = []
+        for n, t in r["total_max"].items():
+            fail = r["fails_on"][n]
+            cells.append(f"{t:>16.1f} {r['top_share'][n]:>5.0%} "
+                         f"{fail['side'] + ' #' + str(fail['client']):>12}")
+        print(f"{r['skew']:>5g} {r['safe_cells']:>6} {r['vs_uniform']:>10.2f}x "
+              + " ".join(cells))
+    print("  Top: the heaviest client's share of the total. Fails on: the side and "
+          "client (#0 = heaviest)\n  whose push or load job first exceeds S_max just "
+          "above Total_max.")
+
+
+def plot_skew_envelope(result, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                       output="burst_skew.png"):
+    """Heatmaps of peak / S_max over (N, total rate), one panel per skew."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LinearSegmentedColormap
+
+    colors = ["#2ecc71", "#f1c40f", "#e74c3c", "#8b0000"]
+    cmap = LinearSegmentedColormap.from_list("capacity", colors)
+    skews = [r["skew"] for r in result["rows"]]
+    N_range, totals = result["N"], result["total"]
+
+    fig, axes = plt.subplots(1, len(skews), figsize=(4 * len(skews) + 2, 6),
+                             sharey=True, squeeze=False, layout='constrained')
+    for ax, skew, row in zip(axes[0], skews, result["rows"]):
+        im = ax.pcolormesh(N_range, totals, result["ratio"][skew], cmap=cmap,
+                           vmin=0, vmax=3, shading='auto')
+        ax.contour(N_range, totals, result["ratio"][skew], levels=[1.0],
+                   colors='white', linewidths=2, linestyles='--')
+        if skew != 0:
+            ax.contour(N_range, totals, result["ratio"][0.0], levels=[1.0],
+                       colors='black', linewidths=1, linestyles=':')
+        ax.set_title(f"skew = {skew:g} ({row['safe_cells']} safe cells)")
+        ax.set_xlabel("Number of Clients (N)")
+    axes[0][0].set_ylabel("Total ops/sec (all clients)")
+    fig.colorbar(im, ax=axes[0].tolist(), label="Peak Conflicts / S_max  (>1 = FAILS)")
+    fig.suptitle(f"Capacity vs Client Rate Skew ({result['dist']} mix, "
+                 f"T_burst={T_burst:.0f}s, S_max={S_max:,}, X={X_ms:.0f}ms/op)\n"
+                 f"White dashed = boundary | Black dotted = uniform mix (skew 0) boundary")
+
+    with timed("render"):
+        plt.savefig(output, dpi=150)
+        plt.close()
+    print(f"  Saved: {output}")
+
+
+# ─── Plot 10: Document sharding ──────────────────────────────────────────────
+
+SHARD_COUNTS = (1, 2, 4, 8, 16, 32, 64)  # documents on the --shards axis (default)
+SHARD_M_HI = 2000.0  # highest M searched by the sharding bisection (ops/sec)
+
+
+def compute_sharding(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                     access=None, documents=SHARD_COUNTS):
+    """
+    Capacity M_max over (documents, N): how much spreading the clients'
+    work over more documents buys, with access pattern `access` (default
+    ACCESS).
+
+    Returns {"access", "rows", "N", "documents", "M_max"}, M_max being the
+    (documents, N) grid. Each row (JSON-serializable) gives, for one
+    document count, M_max at SCALING_N, its gain over one document, the
+    side that fails just above it, and the hottest shard's share of the
+    server conflicts; M_max, gain and side are None where no M up to
+    SHARD_M_HI fails. One document is always included, as the baseline.
+    """
+    access = ACCESS if access is None else access
+    N_range = np.arange(1, 51)
+    D = np.array(sorted(set(documents) | {1}), dtype=np.int64)
+    m_max, _ = bisect_m_max(N_range[None, :], X_ms, T_burst, S_max, hi=SHARD_M_HI,
+                            documents=D[:, None], access=access)
+
+    N_cols = np.array(SCALING_N)
+    cols = N_cols - 1
+    _, side = fast_peak(N_cols[None, :], m_max[:, cols] * 1.001, X_ms, T_burst,
+                        documents=D[:, None], access=access)
+    base = m_max[0, cols]
+    bounded = m_max < SHARD_M_HI * 0.999
+    rows = []
+    for i, d in enumerate(D.tolist()):
+        shares = shard_factors(N_cols, d, access)
+        found = bounded[i, cols]
+        rows.append({
+            "documents": d,
+            "M_max": {str(N): float(m_max[i, c]) if ok else None
+                      for N, c, ok in zip(SCALING_N, cols, found)},
+            "gain": {str(N): (float(m_max[i, c] / b) if b > 0 else 0.0) if ok else None
+                     for N, c, b, ok in zip(SCALING_N, cols, base, found)},
+            "fails_on": {str(N): str(sd) if ok else None
+                         for N, sd, ok in zip(SCALING_N, side[i], found)},
+            "peak_share": {str(N): float(p) for N, p in zip(SCALING_N, shares.peak)},
+        })
+    return {"access": access, "rows": rows, "N": N_range, "documents": D,
+            "M_max": m_max}
+
+
+def print_sharding(result):
+    """Print the compute_sharding table."""
+    rows = result["rows"]
+    print(f"\n{'=' * 96}")
+    print(f"DOCUMENT SHARDING ({result['access']} access, M_max bisected up to "
+          f"{SHARD_M_HI:g} ops/sec):")
+    header = (f"{'Docs':>5} "
+              + " ".join(f"{'M_max@N=' + n:>12} {'Gain':>7} {'Share':>6} {'Fails on':>9}"
+                         for n in rows[0]["M_max"]))
+    print(f"\n{header}")
+    print("-" * len(header))
+    for r in rows:
+        cells = []
+        for n, m in r["M_max"].items():
+            if m is None:
+                cells.append(f"{'>' + format(SHARD_M_HI, 'g'):>12} {'-':>7} "
+                             f"{r['peak_share'][n]:>6.0%} {'-':>9}")
+            else:
+                cells.append(f"{m:>12.1f} {r['gain'][n]:>6.2f}x "
+                             f"{r['peak_share'][n]:>6.0%} {r['fails_on'][n]:>9}")
+        print(f"{r['documents']:>5} " + " ".join(cells))
+    print("  Share: the hottest document's share of the other clients' ops (the "
+          "server's conflict peak).")
+
+
+def plot_sharding(result, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                  output="burst_sharding.png"):
+    """Heatmaps of M_max and of its gain over one document, over (N, documents)."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    N_range, D = result["N"], result["documents"]
+    # Cells that never fail up to SHARD_M_HI are left blank (grey)
+    m_max = np.where(result["M_max"] < SHARD_M_HI * 0.999, result["M_max"], np.nan)
+    # One evenly spaced band per document count
+    y = np.arange(len(D))
+
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6), sharey=True, layout='constrained')
+    im = axes[0].pcolormesh(N_range, y, m_max, cmap='viridis', shading='auto',
+                            norm=LogNorm(vmin=max(np.nanmin(m_max), 0.5), vmax=SHARD_M_HI))
+    fig.colorbar(im, ax=axes[0], label="M_max (ops/sec per client)")
+    axes[0].set_title("Highest safe rate M_max")
+
+    gain = m_max / np.where(m_max[0] > 0, m_max[0], np.nan)
+    im = axes[1].pcolormesh(N_range, y, gain, cmap='magma', shading='auto',
+                            norm=LogNorm(vmin=1.0, vmax=max(np.nanmax(gain), 1.01)))
+    fig.colorbar(im, ax=axes[1], label="M_max / M_max at one document")
+    axes[1].set_title("Gain over one document")
+    for ax in axes:
+        ax.set_facecolor('lightgrey')
+        ax.set_xlabel("Number of Clients (N)")
+        ax.set_yticks(y, [str(d) for d in D])
+    axes[0].set_ylabel("Documents (D)")
+    fig.suptitle(f"Capacity vs Document Sharding ({result['access']} access, "
+                 f"T_burst={T_burst:.0f}s, S_max={S_max:,}, X={X_ms:.0f}ms/op)\n"
+                 f"Grey = no failure up to M={SHARD_M_HI:g} ops/sec")
+
+    with timed("render"):
+        plt.savefig(output, dpi=150)
+        plt.close()
+    print(f"  Saved: {output}")
+
+
+# ─── Plot 11: Retry feedback ─────────────────────────────────────────────────
+
+RETRY_CONFIGS = ((4, 20), (10, 10), (10, 20), (20, 10))  # representative (N, M)
+RETRY_COUNTS = (0, 1, 2, 3)  # retry limits drawn by plot_retry_feedback
+
+
+def compute_retry_feedback(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                           experiments=None, retries=3, jobs=1):
+    """
+    What retrying oversized jobs costs, for the representative configs and
+    every distinct experimental (N, M): predicted dead letters and retries
+    with `retries` retries per job, and the wasted processing time and
+    drain time with them and with rejected jobs dead-lettered at once (0
+    retries). The first rejected attempt is wasted either way, so
+    'wasted_by_retries', the difference, is what the retries cost.
+    JSON-serializable.
+
+    The logged dead letters are left out on purpose: the experiments ran
+    with a job-result handler that does not retry ExcessiveReshuffleError,
+    so they do not measure this policy.
+    """
+    configs = sorted(set(RETRY_CONFIGS)
+                     | {(e["clients"], e["M_approx"]) for e in experiments or []})
+
+    tasks = [(N, M, X_ms, T_burst, S_max) for N, M in configs]
+    plain = run_sweep(simulate_burst, tasks, jobs, kwargs={'retries': 0}, **_pool_state())
+    retried = run_sweep(simulate_burst, tasks, jobs, kwargs={'retries': retries},
+                        **_pool_state())
+    rows = []
+    for (N, M), base, result in zip(configs, plain, retried):
+        rows.append({
+            "N": N, "M": M,
+            "dead_letters": int(result['dead_letters']),
+            "retries": int(result['server']['retries']
+                           + N * result['client']['retries']),
+            "wasted_time": float(result['wasted_time']),
+            "wasted_time_no_retries": float(base['wasted_time']),
+            "wasted_by_retries": float(result['wasted_time'] - base['wasted_time']),
+            "drain_time": float(base['drain_time']),
+            "drain_time_retries": float(result['drain_time']),
+        })
+    return {"retries": retries, "retry_base": RETRY_BASE, "retry_max": RETRY_MAX,
+            "rows": rows}
+
+
+def print_retry_feedback(result):
+    """Print the compute_retry_feedback table."""
+    print(f"\n{'=' * 110}")
+    print(f"RETRY FEEDBACK ({result['retries']} retries per job, backoff "
+          f"{result['retry_base'] * 1000:.0f}ms doubling to "
+          f"{result['retry_max'] * 1000:.0f}ms):")
+    header = (f"{'N':>3} {'M':>6} {'DeadLetters':>11} {'Retries':>8} {'Wasted':>9} "
+              f"{'+ retries':>10} {'Drain':>9} {'w/ retries':>10}")
+    print(f"\n{header}")
+    print("-" * len(header))
+    for r in result["rows"]:
+        print(f"{r['N']:>3} {r['M']:>6.1f} {r['dead_letters']:>11,} {r['retries']:>8,} "
+              f"{r['wasted_time_no_retries']:>8.1f}s {r['wasted_by_retries']:>9.1f}s "
+              f"{r['drain_time']:>8.1f}s "
+              f"{r['drain_time_retries']:>9.1f}s")
+    print("  Wasted, Drain: with jobs over S_max dead-lettered at once (no retries).")
+    print("  + retries: the extra processing the retries waste on rejected attempts.")
+    print("  Predictions only: the logged experiments did not retry reshuffle failures, "
+          "so their dead-letter counts are not comparable.")
+
+
+def plot_retry_feedback(N=10, M=20, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT,
+                        S_max=S_MAX, output="burst_retry_feedback.png"):
+    """Server queue and wasted work of one failing config, per retry limit."""
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6), layout='constrained')
+    colors = plt.cm.plasma(np.linspace(0.0, 0.8, len(RETRY_COUNTS)))
+    dead, wasted = [], []
+    for k, color in zip(RETRY_COUNTS, colors):
+        result = simulate_burst(N, M, X_ms, T_burst, S_max, retries=k)
+        server = result['server']
+        axes[0].plot(server['t'], server['queue'], color=color, linewidth=1.2,
+                     label=f"retries={k}")
+        dead.append(result['dead_letters'])
+        wasted.append(result['wasted_time'])
+    axes[0].axvline(T_burst, color='gray', linestyle=':', label="burst ends")
+    axes[0].set_xlabel("Time (s)")
+    axes[0].set_ylabel("Server queue depth (pushes)")
+    axes[0].set_title("Queue depth: retries re-enter the queue")
+    axes[0].legend(fontsize=9)
+    axes[0].grid(True, alpha=0.3)
+
+    axes[1].bar([str(k) for k in RETRY_COUNTS], wasted, color=colors)
+    for k, (w, d) in enumerate(zip(wasted, dead)):
+        axes[1].annotate(f"{w:,.0f}s\n{d} dead", (k, w), ha='center', va='bottom',
+                         fontsize=9)
+    axes[1].margins(y=0.12)
+    axes[1].set_xlabel("Retries per job")
+    axes[1].set_ylabel("Processing time on rejected attempts (s)")
+    axes[1].set_title("Wasted work")
+    axes[1].grid(True, alpha=0.3, axis='y')
+    fig.suptitle(f"Retry Feedback (N={N}, M={M}, T_burst={T_burst:.0f}s, "
+                 f"S_max={S_max:,}, X={X_ms:.0f}ms/op, backoff "
+                 f"{RETRY_BASE * 1000:.0f}-{RETRY_MAX * 1000:.0f}ms)")
+
+    with timed("render"):
+        plt.savefig(output, dpi=150)
+        plt.close()
+    print(f"  Saved: {output}")
+
+
+# ─── Summary table ────────────────────────────────────────────────────────────
 
-    # Deduplicate experiments: keep most recent per (N, M) combo
+def classify_failure(e):
+    """
+    Failure mode of one experiment:
+    "reshuffle" = failed with reshuffle_count > 0 (conflict-based)
+    "infra" = failed with reshuffle_count == 0, real_dead_letters > 0 (connection/network)
+    "mixed" = failed with both reshuffles and dead letters
+    """
+    if e["stable"]:
+        return "stable"
+    has_reshuf = e["reshuffle_count"] > 0
+    has_dl = e["real_dead_letters"] > 0
+    if has_reshuf and has_dl:
+        return "mixed"
+    if has_reshuf:
+        return "reshuffle"
+    return "infra"
+
+
+def unique_experiments(experiments):
+    """Most recent experiment per (N, M) combo, sorted by (N, M)."""
     exp_lookup = {}
     for e in experiments:
         key = (e["clients"], e["M_approx"])
         exp_lookup[key] = e  # later entry overwrites earlier
-    unique_exps = sorted(exp_lookup.values(),
-                         key=lambda e: (e["clients"], e["M_approx"]))
-
-    # Classify failure modes
-    # "reshuffle" = failed with reshuffle_count > 0 (conflict-based)
-    # "infra" = failed with reshuffle_count == 0, real_dead_letters > 0 (connection/network)
-    # "mixed" = failed with both reshuffles and dead letters
-    def classify_failure(e):
-        if e["stable"]:
-            return "stable"
-        has_reshuf = e["reshuffle_count"] > 0
-        has_dl = e["real_dead_letters"] > 0
-        if has_reshuf and has_dl:
-            return "mixed"
-        if has_reshuf:
-            return "reshuffle"
-        return "infra"
+    return sorted(exp_lookup.values(), key=lambda e: (e["clients"], e["M_approx"]))
 
-    header = (f"{'N':>3} {'M':>6} {'(N-1)*M':>8} {'Peak':>8} {'Ratio':>6} "
-              f"{'Model':>10}  {'Reshuf':>6} {'RealDL':>6} {'Exp':>10} "
-              f"{'FailMode':>8} {'Match':>5}")
-    print(f"\n{header}")
-    print("-" * len(header))
+
+def compute_summary(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                    experiments=None, jobs=1):
+    """
+    Validation checks and model-vs-experiment verdicts as plain data
+    (JSON-serializable). print_summary renders the same dict as text.
+    """
+    summary = {
+        "parameters": {"B": B, "T_flush": T_FLUSH, "S_max": S_max, "T_poll": T_POLL,
+                       "RTT": RTT, "X_ms": X_ms, "T_burst": T_burst, "K_store": K_STORE,
+                       "scan_cost": SCAN_COST,
+                       "workers": WORKERS, "dispatch": DISPATCH,
+                       "documents": DOCUMENTS, "access": ACCESS, "retries": RETRIES},
+        "validation": [],
+        "experiments": [],
+    }
+
+    # Validation checks first
+    checks = [(4, 20, X_ms, 8.0, 10000, True),
+              (4, 20, X_ms, 8.0, 1000, False)]
+    results = run_sweep(simulate_burst, [c[:5] for c in checks], jobs, **_pool_state())
+    for (N, M, _, T, S, expect), result in zip(checks, results):
+        summary["validation"].append({
+            "N": N, "M": M, "T_burst": T, "S_max": S,
+            "survives": bool(result['survives']),
+            "peak_conflicts": float(result['peak_conflicts']),
+            "expected_survives": expect,
+            "passed": bool(result['survives']) == expect,
+        })
+
+    if not experiments:
+        return summary
+
+    unique_exps = unique_experiments(experiments)
+
+    results = run_sweep(simulate_burst,
+                        [(e["clients"], e["M_approx"], X_ms, T_burst, S_max)
+                         for e in unique_exps], jobs, **_pool_state())
 
     correct = 0
     correct_reshuf = 0
@@ -697,24 +2584,10 @@ def print_summary(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
     total_infra = 0
     correct_infra = 0
 
-    for e in unique_exps:
-        N = e["clients"]
-        M = e["M_approx"]
-        nm1_m = (N - 1) * M
-
-        result = simulate_burst(N, M, X_ms, T_burst, S_max)
-        peak = result['peak_conflicts']
-        ratio = peak / S_max
-        model_verdict = "SURVIVES" if result['survives'] else "FAILS"
-
-        reshuf = e["reshuffle_count"]
-        real_dl = e["real_dead_letters"]
-        exp_verdict = "STABLE" if e["stable"] else "FAILED"
+    for e, result in zip(unique_exps, results):
+        survives = bool(result['survives'])
         fail_mode = classify_failure(e)
-
-        model_ok = (result['survives'] == e["stable"])
-        match_str = "ok" if model_ok else "MISS"
-
+        model_ok = (survives == e["stable"])
         if model_ok:
             correct += 1
         total_compared += 1
@@ -722,59 +2595,327 @@ def print_summary(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
         # Track accuracy by failure mode
         if fail_mode in ("reshuffle", "mixed"):
             total_reshuf += 1
-            if not result['survives']:
+            if not survives:
                 correct_reshuf += 1
         elif fail_mode == "infra":
             total_infra += 1
-            if not result['survives']:
+            if not survives:
                 correct_infra += 1
         else:  # stable
-            if result['survives']:
+            if survives:
                 correct_reshuf += 1
                 correct_infra += 1
             total_reshuf += 1
             total_infra += 1
 
-        print(f"{N:>3} {M:>6.1f} {nm1_m:>8.0f} {peak:>8,.0f} {ratio:>6.2f} "
-              f"{model_verdict:>10}  {reshuf:>6} {real_dl:>6} {exp_verdict:>10} "
-              f"{fail_mode:>8} {match_str:>5}")
+        peak = float(result['peak_conflicts'])
+        summary["experiments"].append({
+            "N": e["clients"], "M": e["M_approx"],
+            "peak_conflicts": peak, "ratio": peak / S_max,
+            "model": "SURVIVES" if survives else "FAILS",
+            "experiment": "STABLE" if e["stable"] else "FAILED",
+            "reshuffle_count": e["reshuffle_count"],
+            "real_dead_letters": e["real_dead_letters"],
+            "failure_mode": fail_mode,
+            "match": model_ok,
+        })
+
+    summary["accuracy"] = {
+        "correct": correct, "total": total_compared,
+        "reshuffle": {"correct": correct_reshuf, "total": total_reshuf},
+        "infra": {"correct": correct_infra, "total": total_infra},
+    }
+    return summary
+
+
+def print_summary(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                  experiments=None, jobs=1):
+    """Print results for key configurations and all experimental data."""
+    print("\n" + "=" * 110)
+    print("BURST-LOAD CAPACITY ENVELOPE - SUMMARY")
+    print("=" * 110)
+    print(f"\nParameters: B={B}, T_flush={T_FLUSH*1000:.0f}ms, S_max={S_max:,}, "
+          f"T_poll={T_POLL*1000:.0f}ms, RTT={RTT*1000:.0f}ms, X={X_ms:.0f}ms/op")
+    print(f"Burst duration: {T_burst:.0f}s, K_store={K_STORE}")
+    if WORKERS > 1:
+        print(f"Switchboard workers: {WORKERS} ({DISPATCH} dispatch)")
+    if DOCUMENTS > 1:
+        print(f"Documents: {DOCUMENTS} ({ACCESS} access)")
+    if RETRIES is not None:
+        print(f"Retries: {RETRIES} per job, backoff {RETRY_BASE * 1000:.0f}ms "
+              f"doubling to {RETRY_MAX * 1000:.0f}ms")
+
+    summary = compute_summary(X_ms, T_burst, S_max, experiments, jobs)
 
     print(f"\n{'=' * 110}")
-    print(f"OVERALL ACCURACY: {correct}/{total_compared} "
-          f"({100*correct/total_compared:.0f}%)")
-    if total_reshuf > 0:
-        print(f"  vs reshuffle failures: {correct_reshuf}/{total_reshuf} "
-              f"({100*correct_reshuf/total_reshuf:.0f}%)")
-    if total_infra > 0:
-        print(f"  vs infra failures:     {correct_infra}/{total_infra} "
-              f"({100*correct_infra/total_infra:.0f}%)")
+    print("VALIDATION CHECKS:")
+    for v in summary["validation"]:
+        label = f"N={v['N']}, M={v['M']}, T_burst={v['T_burst']:.0f}s, S_max={v['S_max']}"
+        print(f"  {label:<35}-> "
+              f"{'SURVIVES' if v['survives'] else 'FAILS'} "
+              f"(peak={v['peak_conflicts']:,.0f}) ... {'PASS' if v['passed'] else 'FAIL'}")
 
-    # Identify misses and patterns
-    misses = []
-    for e in unique_exps:
-        N = e["clients"]
-        M = e["M_approx"]
-        result = simulate_burst(N, M, X_ms, T_burst, S_max)
-        if result['survives'] != e["stable"]:
-            misses.append((N, M, classify_failure(e),
-                           "model=SURVIVES" if result['survives'] else "model=FAILS",
-                           e))
+    if not experiments:
+        return
+
+    header = (f"{'N':>3} {'M':>6} {'(N-1)*M':>8} {'Peak':>8} {'Ratio':>6} "
+              f"{'Model':>10}  {'Reshuf':>6} {'RealDL':>6} {'Exp':>10} "
+              f"{'FailMode':>8} {'Match':>5}")
+    print(f"\n{header}")
+    print("-" * len(header))
 
+    rows = summary["experiments"]
+    for r in rows:
+        N, M = r["N"], r["M"]
+        print(f"{N:>3} {M:>6.1f} {(N - 1) * M:>8.0f} {r['peak_conflicts']:>8,.0f} "
+              f"{r['ratio']:>6.2f} {r['model']:>10}  {r['reshuffle_count']:>6} "
+              f"{r['real_dead_letters']:>6} {r['experiment']:>10} "
+              f"{r['failure_mode']:>8} {'ok' if r['match'] else 'MISS':>5}")
+
+    acc = summary["accuracy"]
+    print(f"\n{'=' * 110}")
+    print(f"OVERALL ACCURACY: {acc['correct']}/{acc['total']} "
+          f"({100*acc['correct']/acc['total']:.0f}%)")
+    for kind, label in (("reshuffle", "vs reshuffle failures:"),
+                        ("infra", "vs infra failures:    ")):
+        if acc[kind]["total"] > 0:
+            print(f"  {label} {acc[kind]['correct']}/{acc[kind]['total']} "
+                  f"({100*acc[kind]['correct']/acc[kind]['total']:.0f}%)")
+
+    # Identify misses and patterns
+    misses = [r for r in rows if not r["match"]]
     if misses:
         print(f"\nMISSES ({len(misses)}):")
-        for N, M, fmode, model_dir, e in misses:
-            print(f"  N={N}, M={M:.1f}: {model_dir}, exp={'STABLE' if e['stable'] else 'FAILED'} "
-                  f"[{fmode}] reshuf={e['reshuffle_count']} dl={e['real_dead_letters']}")
+        for r in misses:
+            print(f"  N={r['N']}, M={r['M']:.1f}: model={r['model']}, exp={r['experiment']} "
+                  f"[{r['failure_mode']}] reshuf={r['reshuffle_count']} "
+                  f"dl={r['real_dead_letters']}")
+
+
+def compute_monte_carlo(X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+                        experiments=None, replicas=2000, arrivals='poisson',
+                        seed=0, jobs=1):
+    """
+    Monte Carlo results for the representative configs and every distinct
+    experimental (N, M), next to the deterministic peak. JSON-serializable.
+    """
+    configs = {(4, 20), (10, 10), (20, 10), (10, 30)}
+    configs.update((e["clients"], e["M_approx"]) for e in experiments or [])
+    configs = sorted(configs)
+
+    tasks = [(N, M, X_ms, T_burst, S_max) for N, M in configs]
+    deterministic = run_sweep(simulate_burst, tasks, jobs, **_pool_state())
+    stochastic = run_sweep(monte_carlo_burst, tasks, jobs,
+                           kwargs={'replicas': replicas, 'arrivals': arrivals,
+                                   'seed': seed}, **_pool_state())
+    return [{"N": N, "M": M,
+             "peak_conflicts": float(det['peak_conflicts']),
+             "survives": bool(det['survives']), **mc}
+            for (N, M), det, mc in zip(configs, deterministic, stochastic)]
+
+
+def print_monte_carlo(rows, S_max=S_MAX):
+    """Print compute_monte_carlo rows as a table."""
+    first = rows[0]
+    print(f"\n{'=' * 110}")
+    print(f"MONTE CARLO TAIL RISK ({first['arrivals']} arrivals, "
+          f"{first['replicas']:,} replicas, S_max={S_max:,}):")
+    header = (f"{'N':>3} {'M':>6} {'DetPeak':>8} {'Model':>10} {'P(fail)':>8} "
+              f"{'srv':>6} {'cli':>6} {'Peak p5':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+              f"{'Drain p50':>10} {'p95':>8}")
+    print(f"\n{header}")
+    print("-" * len(header))
+    for r in rows:
+        peak, drain = r['peak'], r['drain_time']
+        print(f"{r['N']:>3} {r['M']:>6.1f} {r['peak_conflicts']:>8,.0f} "
+              f"{'SURVIVES' if r['survives'] else 'FAILS':>10} {r['p_fail']:>8.3f} "
+              f"{r['p_fail_server']:>6.3f} {r['p_fail_client']:>6.3f} "
+              f"{peak['p5']:>8,.0f} {peak['p50']:>8,.0f} {peak['p95']:>8,.0f} "
+              f"{peak['p99']:>8,.0f} {drain['p50']:>9.1f}s {drain['p95']:>7.1f}s")
+
+
+# ─── Calibration ─────────────────────────────────────────────────────────────
+
+# Grid searched before refinement: K_STORE, X_ms and SCAN_COST, in that order
+CALIBRATION_GRID = (np.geomspace(1.0, 64.0, 25),
+                    np.geomspace(1.0, 100.0, 25),
+                    np.geomspace(1e-4, 1e-2, 9))
+CALIBRATION_TEMPERATURE = 0.25  # width (in log peak/S_max) of the smooth loss
+
+
+def _calibration_peaks(N, M, T_burst, k_store, X_ms, scan_cost):
+    """fast_peak for broadcast parameter arrays (map_grid-friendly)."""
+    return fast_peak.__wrapped__(N, M, X_ms, T_burst, k_store=k_store,
+                                 scan_cost=scan_cost)[0]
+
+
+def _fit_scores(peak, S_max, stable):
+    """
+    (errors, loss) of each parameter set; peak is (sets, experiments).
+
+    errors counts wrong verdicts. loss is a logistic loss on the margin
+    log(S_max / peak), which breaks ties between sets with equal error
+    counts and gives the refinement a slope to follow.
+    """
+    with np.errstate(divide='ignore'):
+        margin = np.log(S_max / np.maximum(peak, 1e-12))
+    y = np.where(stable, 1.0, -1.0)
+    errors = ((peak < S_max) != stable).sum(axis=-1)
+    loss = np.logaddexp(0.0, -y * margin / CALIBRATION_TEMPERATURE).mean(axis=-1)
+    return errors, loss
+
+
+def _refine(theta, N, M, stable, T_burst, S_max, step=0.5, tol=1e-3):
+    """
+    Compass search in log-parameter space from theta = (K, X_ms, scan).
+
+    Each iteration scores all 6 axis moves in one vectorized fast_peak
+    call and takes the best one that improves (errors, loss), halving the
+    step when none does. Moves are kept within 4x of the search grid.
+    """
+    lo = np.log([g[0] / 4 for g in CALIBRATION_GRID])
+    hi = np.log([g[-1] * 4 for g in CALIBRATION_GRID])
+    x = np.log(theta)
+    moves = np.concatenate([np.eye(3), -np.eye(3)])
+
+    def score(points):
+        p = np.exp(points)[:, :, None]
+        peak = _calibration_peaks(N, M, T_burst, p[:, 0], p[:, 1], p[:, 2])
+        return _fit_scores(peak, S_max, stable)
+
+    best = tuple(v[0] for v in score(x[None]))
+    while step > tol:
+        candidates = np.clip(x + step * moves, lo, hi)
+        errors, loss = score(candidates)
+        i = np.lexsort((loss, errors))[0]
+        if (errors[i], loss[i]) < best:
+            x, best = candidates[i], (errors[i], loss[i])
+        else:
+            step /= 2
+    return np.exp(x)
+
+
+def _fit(N, M, stable, grid_peak, grid_params, T_burst, S_max):
+    """Best grid point on these experiments, then refined. Returns (K, X_ms, scan)."""
+    errors, loss = _fit_scores(grid_peak, S_max, stable)
+    start = grid_params[np.lexsort((loss, errors))[0]]
+    return _refine(start, N, M, stable, T_burst, S_max)
 
 
-# ─── Experimental data ────────────────────────────────────────────────────────
+def calibrate(experiments, X_ms=X_DEFAULT, T_burst=T_BURST_DEFAULT, S_max=S_MAX,
+              folds=5, seed=0, jobs=1):
+    """
+    Fit K_STORE, X_ms and SCAN_COST to the experimental verdicts.
+
+    Every distinct (N, M) run is a labelled point: the model should say
+    SURVIVES exactly for the runs that stayed stable. A vectorized grid
+    search over CALIBRATION_GRID picks the start, and a compass search
+    refines it. k-fold cross-validation repeats the fit on each training
+    split and scores the held-out runs.
+
+    Returns a JSON-serializable report; "params" holds the fitted values
+    and "current" the constants in effect (K_STORE, X_ms, SCAN_COST).
+    """
+    exps = unique_experiments(experiments)
+    N = np.array([e["clients"] for e in exps], dtype=float)
+    M = np.array([e["M_approx"] for e in exps], dtype=float)
+    stable = np.array([bool(e["stable"]) for e in exps])
+
+    # Peaks for every grid point and experiment, computed once and reused
+    # by the full fit and every fold
+    K_grid, X_grid, scan_grid = np.meshgrid(*CALIBRATION_GRID, indexing='ij')
+    grid_params = np.stack([K_grid.ravel(), X_grid.ravel(), scan_grid.ravel()], axis=1)
+    grid_peak = map_grid(_calibration_peaks,
+                         (N, M, T_burst, grid_params[:, :1], grid_params[:, 1:2],
+                          grid_params[:, 2:]), jobs, **_pool_state())
+
+    def verdicts(params, idx=slice(None)):
+        return fast_peak.__wrapped__(N[idx], M[idx], params[1], T_burst,
+                                     k_store=params[0], scan_cost=params[2])[0] < S_max
+
+    fitted = _fit(N, M, stable, grid_peak, grid_params, T_burst, S_max)
+    survives = verdicts(fitted)
+    current = verdicts((K_STORE, X_ms, SCAN_COST))
+
+    # k-fold cross-validation on a fixed shuffle
+    folds = min(folds, len(exps))
+    fold_errors = []
+    if folds >= 2:
+        order = np.random.default_rng(seed).permutation(len(exps))
+        for test in np.array_split(order, folds):
+            train = np.setdiff1d(order, test)
+            params = _fit(N[train], M[train], stable[train], grid_peak[:, train],
+                          grid_params, T_burst, S_max)
+            fold_errors.append(float(np.mean(verdicts(params, test) != stable[test])))
 
-def load_experimental(path):
-    """Load parsed experiment results from JSON."""
-    if path and os.path.exists(path):
-        with open(path) as f:
-            return json.load(f)
-    return []
+    return {
+        "experiments": len(exps), "T_burst": T_burst, "S_max": S_max,
+        "grid_size": len(grid_params),
+        "params": {"K_STORE": float(fitted[0]), "X_ms": float(fitted[1]),
+                   "SCAN_COST": float(fitted[2])},
+        "correct": int((survives == stable).sum()),
+        "current": {"K_STORE": K_STORE, "X_ms": X_ms, "SCAN_COST": SCAN_COST},
+        "current_correct": int((current == stable).sum()),
+        "confusion": {
+            "stable_survives": int((stable & survives).sum()),
+            "stable_fails": int((stable & ~survives).sum()),
+            "failed_survives": int((~stable & survives).sum()),
+            "failed_fails": int((~stable & ~survives).sum()),
+        },
+        "cv": {"folds": folds, "fold_errors": fold_errors,
+               "mean_error": float(np.mean(fold_errors)) if fold_errors else None,
+               "std_error": float(np.std(fold_errors)) if fold_errors else None},
+    }
+
+
+def print_calibration(report):
+    """Print a calibrate() report."""
+    n = report["experiments"]
+    p, cur = report["params"], report["current"]
+    print(f"\n{'=' * 110}")
+    print(f"CALIBRATION ({n} distinct (N, M) runs, T_burst={report['T_burst']:.0f}s, "
+          f"S_max={report['S_max']:,})")
+    print(f"  Current:  K_store={cur['K_STORE']:.2f}, X={cur['X_ms']:.2f}ms/op, "
+          f"scan={cur['SCAN_COST'] * 1000:.4f}ms/conflict -> "
+          f"{report['current_correct']}/{n} correct")
+    print(f"  Fitted:   K_store={p['K_STORE']:.2f}, X={p['X_ms']:.2f}ms/op, "
+          f"scan={p['SCAN_COST'] * 1000:.4f}ms/conflict -> "
+          f"{report['correct']}/{n} correct ({100 * report['correct'] / n:.0f}%)")
+    print(f"  (grid search over {report['grid_size']:,} parameter sets, "
+          f"then compass-search refinement)")
+
+    c = report["confusion"]
+    print(f"\n  {'':<16}{'model SURVIVES':>16}{'model FAILS':>14}")
+    print(f"  {'exp STABLE':<16}{c['stable_survives']:>16}{c['stable_fails']:>14}")
+    print(f"  {'exp FAILED':<16}{c['failed_survives']:>16}{c['failed_fails']:>14}")
+
+    cv = report["cv"]
+    if cv["fold_errors"]:
+        per_fold = ", ".join(f"{e:.2f}" for e in cv["fold_errors"])
+        print(f"\n  {cv['folds']}-fold cross-validated error: {cv['mean_error']:.3f} "
+              f"+/- {cv['std_error']:.3f}  (per fold: {per_fold})")
+
+
+def save_params(path, report):
+    """Write fitted constants (and how they were fitted) to a parameters file."""
+    n = report["experiments"]
+    params = dict(report["params"])
+    params["calibration"] = {
+        "experiments": n, "T_burst": report["T_burst"], "S_max": report["S_max"],
+        "accuracy": report["correct"] / n,
+        "cv_error": report["cv"]["mean_error"],
+    }
+    with open(path, "w") as f:
+        json.dump(params, f, indent=2)
+        f.write("\n")
+
+
+def load_params(path):
+    """Fitted constants from a parameters file, or None if there is none."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
 
 
 # ─── Main ────────────────────────────────────────────────────────────────────
@@ -783,35 +2924,301 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Burst-Load Capacity Envelope Model")
     parser.add_argument("--experimental", "-e", type=str, default=None,
-                        help="Path to experiments.json from parse-experiments.py")
+                        help="Path to experiments.npz (or .json) from parse-experiments.py")
     parser.add_argument("--burst", "-b", type=float, default=T_BURST_DEFAULT,
                         help=f"Burst duration in seconds (default: {T_BURST_DEFAULT})")
-    parser.add_argument("--x-ms", type=float, default=X_DEFAULT,
-                        help=f"Processing time per op in ms (default: {X_DEFAULT})")
+    parser.add_argument("--x-ms", type=float, default=None,
+                        help=f"Processing time per op in ms (default: fitted value "
+                             f"from the parameters file, else {X_DEFAULT})")
     parser.add_argument("--s-max", type=int, default=S_MAX,
                         help=f"Max conflict threshold (default: {S_MAX})")
+    parser.add_argument("--exact-limit", type=int, default=EXACT_LIMIT,
+                        help="Pushes iterated exactly by fast_peak before "
+                             f"switching to the fluid model (default: {EXACT_LIMIT})")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="Switchboard job-executor workers (default: 1)")
+    parser.add_argument("--dispatch", choices=["shared", "affinity"], default=DISPATCH,
+                        help="How pushes are assigned to workers: one shared queue, "
+                             "or per-client document affinity (default: shared)")
+    parser.add_argument("--core-scaling", type=int, nargs="*", default=None, metavar="W",
+                        help="Tabulate capacity per switchboard worker count and plot "
+                             "burst_core_scaling.png (default: off; no values = "
+                             + " ".join(map(str, CORE_COUNTS)) + ")")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Worker processes for parameter sweeps "
+                             "(default: 1 = serial, 0 = all cores)")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="Print the summary only (matplotlib is never imported)")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the summary, validation checks and per-experiment "
+                             "verdicts as JSON, and nothing else (implies --no-plots)")
+    parser.add_argument("--monte-carlo", type=int, default=0, metavar="REPLICAS",
+                        help="Also run the Monte Carlo model with this many replicas "
+                             "per config (default: 0 = off)")
+    parser.add_argument("--arrivals", choices=["poisson", "jitter"], default="poisson",
+                        help="Monte Carlo arrival streams (default: poisson)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Monte Carlo random seed (default: 0)")
+    parser.add_argument("--trace", type=str, default=None, metavar="PATH",
+                        help="Replay a load trace M(t) (CSV t_s,M or .npy, see "
+                             "parse-experiments.py --trace) and plot burst_trace.png")
+    parser.add_argument("--trace-clients", type=int, nargs="+", default=list(TRACE_CLIENTS),
+                        metavar="N", help="Client counts to replay the trace with "
+                                          "(default: 4 10 20 30)")
+    parser.add_argument("--trace-scale", type=float, default=1.0,
+                        help="Multiply the trace's rates by this factor (default: 1)")
+    parser.add_argument("--bursts", type=int, default=0, metavar="K",
+                        help="Solve for the minimum safe gap between K bursts on the "
+                             "heatmap grid and plot burst_min_gap.png (default: 0 = off)")
+    parser.add_argument("--gap-max", type=float, default=GAP_MAX,
+                        help=f"Longest gap searched by --bursts, seconds (default: {GAP_MAX:g})")
+    parser.add_argument("--mix", choices=[d for d in DISTRIBUTIONS if d != "uniform"],
+                        default=None, help="Split each total rate over the clients by this "
+                                           "distribution, tabulate capacity per --skew and "
+                                           "plot burst_skew.png (default: off)")
+    parser.add_argument("--skew", type=float, nargs="+", default=list(MIX_SKEWS),
+                        metavar="S", help="Skews for --mix: zipf exponent or lognormal "
+                                          "sigma, 0 = uniform (default: 0 0.5 1 1.5)")
+    parser.add_argument("--documents", type=int, default=DOCUMENTS,
+                        help="Documents the clients' ops are spread over; conflicts "
+                             "only arise within a document (default: 1)")
+    parser.add_argument("--access", choices=list(ACCESS_PATTERNS), default=ACCESS,
+                        help="How clients' ops are spread over the documents "
+                             "(default: uniform)")
+    parser.add_argument("--doc-skew", type=float, default=DOC_SKEW,
+                        help=f"Zipf exponent of document popularity for --access zipf "
+                             f"(default: {DOC_SKEW:g})")
+    parser.add_argument("--shards", type=int, nargs="*", default=None, metavar="D",
+                        help="Tabulate M_max per document count and plot "
+                             "burst_sharding.png (default: off; no values = "
+                             + " ".join(map(str, SHARD_COUNTS)) + ")")
+    parser.add_argument("--retries", type=int, default=RETRIES, metavar="K",
+                        help="Retry jobs over S_max up to K times before dead-lettering "
+                             "them (the executor default is 3), and print the retry "
+                             "feedback table")
+    parser.add_argument("--retry-base-ms", type=float, default=RETRY_BASE * 1000,
+                        help="Executor retry backoff base (default: 100)")
+    parser.add_argument("--retry-max-ms", type=float, default=RETRY_MAX * 1000,
+                        help="Executor retry backoff cap (default: 5000)")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="Fit K_STORE, X_ms and SCAN_COST to the experiments, "
+                             "print the fit report and write the parameters file")
+    parser.add_argument("--folds", type=int, default=5,
+                        help="Cross-validation folds for --calibrate (default: 5)")
+    parser.add_argument("--params", type=str, default=PARAMS_FILE,
+                        help="Fitted-parameters file, relative to test-connect "
+                             f"(default: {PARAMS_FILE})")
+    parser.add_argument("--no-params", action="store_true",
+                        help="Ignore the parameters file and use the built-in constants")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Recompute everything instead of using the result cache")
+    parser.add_argument("--cache-dir", type=str,
+                        default=os.path.join(".cache", "burst-model"),
+                        help="Result cache directory, relative to test-connect "
+                             "(default: .cache/burst-model)")
+    parser.add_argument("--cache-size-mb", type=float, default=512,
+                        help="Result cache size bound in MB (default: 512)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print wall time, recurrence steps, cache hit rate and "
+                             "peak RSS per stage")
+    parser.add_argument("--profile-dump", type=str, default=None, metavar="DIR",
+                        help="With --profile, also write cProfile stats per stage to DIR")
     args = parser.parse_args()
 
-    out_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script_path = os.path.abspath(__file__)
+    out_dir = os.path.dirname(os.path.dirname(script_path))
     os.chdir(out_dir)
 
+    if not args.no_cache:
+        src_dir = os.path.dirname(script_path)
+        _cache = ResultCache(args.cache_dir,
+                             version=source_version(*(os.path.join(src_dir, name)
+                                                      for name in MODEL_SOURCES)),
+                             max_bytes=int(args.cache_size_mb * 1024 * 1024))
+
+    # Fitted constants from the last --calibrate run, if any
+    params = None if args.no_params else load_params(args.params)
+    if params:
+        K_STORE = params["K_STORE"]
+        SCAN_COST = params["SCAN_COST"]
+
     T_burst = args.burst
     X_ms = args.x_ms
+    if X_ms is None:
+        X_ms = params["X_ms"] if params else X_DEFAULT
     S_max_arg = args.s_max
+    EXACT_LIMIT = args.exact_limit
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    WORKERS = args.workers
+    DISPATCH = args.dispatch
+    if args.documents < 1 or (args.shards and min(args.shards) < 1):
+        parser.error("document counts must be at least 1")
+    DOCUMENTS = args.documents
+    ACCESS = args.access
+    DOC_SKEW = args.doc_skew
+    if args.retries is not None and args.retries < 0:
+        parser.error("--retries must be at least 0")
+    RETRIES = args.retries
+    RETRY_BASE = args.retry_base_ms / 1000
+    RETRY_MAX = args.retry_max_ms / 1000
+    worker_counts = None
+    if args.core_scaling is not None:
+        worker_counts = args.core_scaling or list(CORE_COUNTS)
+        if min(worker_counts) < 1:
+            parser.error("--core-scaling worker counts must be at least 1")
+    shard_counts = None
+    if args.shards is not None:
+        shard_counts = args.shards or list(SHARD_COUNTS)
+
+    profiler = StageProfiler(args.profile, _cache, args.profile_dump)
+    stage = profiler.stage
+
+    profile = None
+    if args.trace:
+        profile = LoadProfile.from_file(args.trace).scaled(args.trace_scale)
+
+    with stage("load experiments"):
+        experiments = load_experimental(args.experimental)
+        if not experiments:
+            experiments = load_experimental(find_store())
+
+    if args.calibrate:
+        if not experiments:
+            sys.exit("--calibrate needs experiments: run parse-experiments.py first")
+        with stage("calibrate"):
+            report = calibrate(experiments, X_ms, T_burst, S_max_arg, args.folds,
+                               jobs=args.jobs)
+        print_calibration(report)
+        save_params(args.params, report)
+        print(f"\nWrote {args.params} (used by the next run; --no-params to ignore it)")
+        profiler.report()
+        sys.exit(0)
+
+    if args.json:
+        # Machine-readable summary only: nothing else on stdout, no matplotlib
+        with stage("summary"):
+            summary = compute_summary(X_ms, T_burst, S_max_arg, experiments,
+                                      jobs=args.jobs)
+        if worker_counts:
+            with stage("core scaling"):
+                summary["core_scaling"] = compute_core_scaling(
+                    X_ms, T_burst, S_max_arg, worker_counts, jobs=args.jobs)["rows"]
+        if args.monte_carlo > 0:
+            with stage("monte carlo"):
+                summary["monte_carlo"] = compute_monte_carlo(
+                    X_ms, T_burst, S_max_arg, experiments, args.monte_carlo,
+                    args.arrivals, args.seed, jobs=args.jobs)
+        if args.bursts > 0:
+            with stage("min gap"):
+                gaps = compute_min_gap(X_ms, T_burst, S_max_arg, args.bursts,
+                                       args.gap_max, jobs=args.jobs)
+            summary["min_gap"] = {k: gaps[k] for k in ("bursts", "T_burst", "gap_max", "rows")}
+        if profile is not None:
+            with stage("trace replay"):
+                summary["trace"] = compute_trace_replay(profile, X_ms, S_max_arg,
+                                                        args.trace_clients, jobs=args.jobs)
+        if args.mix:
+            with stage("skew envelope"):
+                envelope = compute_skew_envelope(X_ms, T_burst, S_max_arg, args.mix,
+                                                 args.skew, jobs=args.jobs)
+            summary["mix"] = {"dist": envelope["dist"], "rows": envelope["rows"]}
+        if shard_counts:
+            with stage("sharding"):
+                sharding = compute_sharding(X_ms, T_burst, S_max_arg, documents=shard_counts)
+            summary["sharding"] = {"access": sharding["access"], "rows": sharding["rows"]}
+        if RETRIES is not None:
+            with stage("retry feedback"):
+                summary["retries"] = compute_retry_feedback(X_ms, T_burst, S_max_arg,
+                                                            experiments, RETRIES,
+                                                            jobs=args.jobs)
+        print(json.dumps(summary, indent=2))
+        profiler.report(file=sys.stderr)
+        sys.exit(0)
 
-    experiments = load_experimental(args.experimental)
-    if not experiments:
-        experiments = load_experimental("experiments.json")
     if experiments:
         print(f"Loaded {len(experiments)} experimental data points")
+    if params:
+        print(f"Using fitted parameters from {args.params}: K_store={K_STORE:.2f}, "
+              f"X={X_ms:.2f}ms/op, scan={SCAN_COST * 1000:.4f}ms/conflict")
 
     print("Generating burst-load capacity envelope model...")
-    print_summary(X_ms, T_burst, S_max_arg, experiments)
-
-    print("\nGenerating plots...")
-    plot_capacity_heatmap(X_ms, T_burst, S_max_arg, experiments)
-    plot_burst_timeseries(X_ms, T_burst, S_max_arg)
-    plot_duration_sensitivity(X_ms, S_max_arg)
-    plot_queue_dynamics(X_ms=X_ms, T_burst=T_burst, S_max=S_max_arg)
-
-    print("\nDone! Check the PNG files in:", out_dir)
+    with stage("summary"):
+        print_summary(X_ms, T_burst, S_max_arg, experiments, jobs=args.jobs)
+    scaling = None
+    if worker_counts:
+        with stage("core scaling"):
+            scaling = compute_core_scaling(X_ms, T_burst, S_max_arg, worker_counts,
+                                           jobs=args.jobs)
+            print_core_scaling(scaling)
+    if args.monte_carlo > 0:
+        with stage("monte carlo"):
+            print_monte_carlo(compute_monte_carlo(X_ms, T_burst, S_max_arg, experiments,
+                                                  args.monte_carlo, args.arrivals,
+                                                  args.seed, jobs=args.jobs), S_max_arg)
+    gaps = None
+    if args.bursts > 0:
+        with stage("min gap"):
+            gaps = compute_min_gap(X_ms, T_burst, S_max_arg, args.bursts, args.gap_max,
+                                   jobs=args.jobs)
+            print_min_gap(gaps)
+    envelope = None
+    if args.mix:
+        with stage("skew envelope"):
+            envelope = compute_skew_envelope(X_ms, T_burst, S_max_arg, args.mix, args.skew,
+                                             jobs=args.jobs)
+            print_skew_envelope(envelope)
+    sharding = None
+    if shard_counts:
+        with stage("sharding"):
+            sharding = compute_sharding(X_ms, T_burst, S_max_arg, documents=shard_counts)
+            print_sharding(sharding)
+    if RETRIES is not None:
+        with stage("retry feedback"):
+            print_retry_feedback(compute_retry_feedback(X_ms, T_burst, S_max_arg,
+                                                        experiments, RETRIES, jobs=args.jobs))
+    if profile is not None:
+        with stage("trace replay"):
+            print_trace_replay(compute_trace_replay(profile, X_ms, S_max_arg,
+                                                    args.trace_clients, jobs=args.jobs),
+                               profile, S_max_arg)
+
+    if not args.no_plots:
+        print("\nGenerating plots...")
+        with stage("capacity heatmap"):
+            plot_capacity_heatmap(X_ms, T_burst, S_max_arg, experiments, jobs=args.jobs)
+        with stage("burst timeseries"):
+            plot_burst_timeseries(X_ms, T_burst, S_max_arg)
+        with stage("duration sweep"):
+            plot_duration_sensitivity(X_ms, S_max_arg, jobs=args.jobs)
+        with stage("queue dynamics"):
+            plot_queue_dynamics(X_ms=X_ms, T_burst=T_burst, S_max=S_max_arg)
+        if scaling is not None:
+            with stage("core scaling plot"):
+                plot_core_scaling(X_ms, T_burst, S_max_arg, scaling, jobs=args.jobs)
+        if args.monte_carlo > 0:
+            with stage("monte carlo plot"):
+                plot_monte_carlo(X_ms, T_burst, S_max_arg, args.monte_carlo,
+                                 args.arrivals, args.seed, jobs=args.jobs)
+        if gaps is not None:
+            with stage("min gap plot"):
+                plot_min_gap(gaps, S_max_arg)
+        if envelope is not None:
+            with stage("skew plot"):
+                plot_skew_envelope(envelope, X_ms, T_burst, S_max_arg)
+        if sharding is not None:
+            with stage("sharding plot"):
+                plot_sharding(sharding, X_ms, T_burst, S_max_arg)
+        if RETRIES is not None:
+            with stage("retry plot"):
+                plot_retry_feedback(X_ms=X_ms, T_burst=T_burst, S_max=S_max_arg)
+        if profile is not None:
+            with stage("trace plot"):
+                plot_trace_replay(profile, X_ms, S_max_arg, args.trace_clients)
+
+    if _cache is not None:
+        print(f"\nResult cache: {_cache.hits} hits, {_cache.misses} misses "
+              f"({args.cache_dir})")
+    profiler.report()
+    if not args.no_plots:
+        print("\nDone! Check the PNG files in:", out_dir)
@@ -0,0 +1,47 @@
+"""
+Importable capacity-evaluation API for the model scripts.
+
+The models live in hyphenated scripts (reshuffle-model.py, burst-model.py)
+that cannot be imported with a plain `import` statement. This module loads
+them by path and re-exports the vectorized evaluation functions.
+
+Usage (from test/test-connect/src, or with it on sys.path):
+
+    import numpy as np
+    from capacity import evaluate_stability
+
+    N = np.arange(1, 1001)[:, None, None]
+    M = np.linspace(0.1, 200, 2000)[None, :, None]
+    X = np.array([10.0, 25.0])[None, None, :]
+    cube = evaluate_stability(N, M, X)
+    cube['fails']      # (1000, 2000, 2) bool array
+"""
+
+import importlib.util
+import os
+import sys
+
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_model(filename):
+    """Load one of the hyphenated model scripts as a module (cached)."""
+    name = filename.replace("-", "_").removesuffix(".py")
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(_SRC_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+reshuffle_model = load_model("reshuffle-model.py")
+
+t_batch = reshuffle_model.t_batch
+b_eff = reshuffle_model.b_eff
+x_crit = reshuffle_model.x_crit
+x_crit_mix = reshuffle_model.x_crit_mix
+clients_per_worker = reshuffle_model.clients_per_worker
+evaluate_stability = reshuffle_model.evaluate_stability
@@ -0,0 +1,75 @@
+"""
+Per-client rate mixes for the model scripts.
+
+Both models default to N identical clients at M ops/sec each. In practice
+a few heavy editors produce most operations and many clients are nearly
+idle. client_rates() splits a total rate over N clients by a distribution:
+
+    uniform     total / N each
+    zipf        client i (1-based) gets a share proportional to i^-skew
+    lognormal   shares proportional to exp(skew * z_i), where z_i are the
+                (i + 0.5) / N quantiles of a standard normal (a
+                deterministic sample, so results are reproducible)
+
+skew = 0 gives the uniform mix for every distribution. Rates are sorted
+heaviest first, so client 0 is the heaviest editor.
+
+rate_matrix() does the same for broadcast arrays of (N, total, skew), for
+envelopes over a whole parameter grid: it returns one row of rates per
+cell, padded with zeros beyond the cell's N.
+"""
+
+import functools
+from statistics import NormalDist
+
+import numpy as np
+
+DISTRIBUTIONS = ("uniform", "zipf", "lognormal")
+
+
+@functools.lru_cache(maxsize=None)
+def _normal_quantiles(n):
+    """Standard normal quantiles at (i + 0.5) / n, largest first."""
+    dist = NormalDist()
+    return np.array([dist.inv_cdf((i + 0.5) / n) for i in range(n)])[::-1]
+
+
+def rate_matrix(N, total, dist="zipf", skew=1.0):
+    """
+    Per-client rates for broadcast arrays of N, total and skew.
+
+    Returns an array of shape broadcast_shape + (max N,): row [..., :N]
+    holds the cell's rates (heaviest first, summing to total), the rest
+    is zero.
+    """
+    if dist not in DISTRIBUTIONS:
+        raise ValueError(f"unknown distribution {dist!r} (expected one of "
+                         f"{', '.join(DISTRIBUTIONS)})")
+    N, total, skew = np.broadcast_arrays(np.asarray(N, dtype=np.int64),
+                                         np.asarray(total, dtype=float),
+                                         np.asarray(skew, dtype=float))
+    if N.size and N.min() < 0:
+        raise ValueError("N must be non-negative")
+    n_max = int(N.max()) if N.size else 0
+    slots = np.arange(n_max)
+    present = slots < N[..., None]
+    if dist == "zipf":
+        weights = (slots + 1.0) ** -skew[..., None]
+    elif dist == "lognormal":
+        z = np.zeros(N.shape + (n_max,))
+        for n in np.unique(N):
+            if n > 0:
+                z[N == n, :n] = _normal_quantiles(int(n))
+        weights = np.exp(skew[..., None] * z)
+    else:
+        weights = np.ones(N.shape + (n_max,))
+    weights = np.where(present, weights, 0.0)
+    norm = weights.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        shares = np.where(norm > 0, weights / norm, 0.0)
+    return total[..., None] * shares
+
+
+def client_rates(N, total, dist="zipf", skew=1.0):
+    """Rates of N clients sharing `total` ops/sec, heaviest first (see module doc)."""
+    return rate_matrix(int(N), float(total), dist, skew)
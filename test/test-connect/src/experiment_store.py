@@ -0,0 +1,180 @@
+"""
+Columnar store for parsed experiment results.
+
+parse-experiments.py writes experiments.npz, an uncompressed NumPy archive
+with three arrays:
+
+    runs           structured array, one row per run (the scalar fields)
+    events         structured array, one row per reshuffle event:
+                   run (row in runs), attempt, elapsed_ms (NaN if unknown)
+    event_offsets  events of run i are events[event_offsets[i]:event_offsets[i+1]]
+
+Arrays are read from the archive only when first accessed, so loading the
+per-run table never touches the (much larger) event table.
+
+load_experimental() is the API the model scripts use. It also accepts the
+older experiments.json format.
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+DEFAULT_PATHS = ("experiments.npz", "experiments.json")
+
+# Per-run fields in record order. Kinds: "str", "int", "int?" (int or None,
+# stored as float64 with NaN for None), "float", "bool".
+RUN_FIELDS = [
+    ("dir", "str"),
+    ("timestamp", "str"),
+    ("clients", "int?"),
+    ("mutationInterval", "int?"),
+    ("duration", "int?"),
+    ("M_approx", "float"),
+    ("dead_letter_count", "int"),
+    ("shutdown_dead_letters", "int"),
+    ("real_dead_letters", "int"),
+    ("first_reshuffle_ms", "int?"),
+    ("first_dead_letter_ms", "int?"),
+    ("max_reshuffle_attempt", "int"),
+    ("stable", "bool"),
+    ("reshuffle_count", "int"),
+]
+EVENTS_AFTER = "M_approx"  # where "reshuffle_events" sits in a record
+
+EVENT_DTYPE = np.dtype([("run", np.int32), ("attempt", np.int32),
+                        ("elapsed_ms", np.float64)])
+
+_STORAGE = {"int": np.int64, "int?": np.float64, "float": np.float64, "bool": np.bool_}
+
+
+def _run_dtype(experiments):
+    fields = []
+    for name, kind in RUN_FIELDS:
+        if kind == "str":
+            width = max((len(e[name]) for e in experiments), default=1)
+            fields.append((name, f"U{max(width, 1)}"))
+        else:
+            fields.append((name, _STORAGE[kind]))
+    return np.dtype(fields)
+
+
+def _nullable(value):
+    return np.nan if value is None else value
+
+
+def save_store(path, experiments):
+    """Write per-run result dicts (as made by parse_log_dir) to an .npz store."""
+    runs = np.zeros(len(experiments), dtype=_run_dtype(experiments))
+    for name, kind in RUN_FIELDS:
+        values = [e[name] for e in experiments]
+        runs[name] = [_nullable(v) for v in values] if kind == "int?" else values
+
+    counts = [len(e["reshuffle_events"]) for e in experiments]
+    offsets = np.zeros(len(experiments) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    events = np.zeros(offsets[-1], dtype=EVENT_DTYPE)
+    events["run"] = np.repeat(np.arange(len(experiments)), counts)
+    events["attempt"] = [ev["attempt"] for e in experiments for ev in e["reshuffle_events"]]
+    events["elapsed_ms"] = [_nullable(ev["elapsed_ms"])
+                            for e in experiments for ev in e["reshuffle_events"]]
+
+    # Write next to the target and rename, so readers never see a partial file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, runs=runs, events=events, event_offsets=offsets)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _column(kind, values):
+    """Python values of one stored column."""
+    values = values.tolist()  # str, int, float and bool come back as Python types
+    if kind == "int?":
+        return [None if v != v else int(v) for v in values]  # v != v: NaN
+    return values
+
+
+class ExperimentStore:
+    """Lazily loaded view of an experiments.npz file."""
+
+    def __init__(self, path):
+        self._npz = np.load(path, allow_pickle=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._npz.close()
+
+    @property
+    def runs(self):
+        return self._npz["runs"]
+
+    @property
+    def events(self):
+        return self._npz["events"]
+
+    @property
+    def event_offsets(self):
+        return self._npz["event_offsets"]
+
+    def __len__(self):
+        return len(self.runs)
+
+    def run_events(self, i):
+        """Event rows of run i."""
+        offsets = self.event_offsets
+        return self.events[offsets[i]:offsets[i + 1]]
+
+    def records(self, events=False):
+        """Per-run dicts in the parse_log_dir layout (events only if asked)."""
+        runs = self.runs
+        names = [name for name, _ in RUN_FIELDS]
+        columns = [_column(kind, runs[name]) for name, kind in RUN_FIELDS]
+
+        if events:
+            offsets = self.event_offsets.tolist()
+            rows = list(zip(self.events["attempt"].tolist(),
+                            _column("int?", self.events["elapsed_ms"])))
+            per_run = [[{"attempt": a, "elapsed_ms": t} for a, t in rows[lo:hi]]
+                       for lo, hi in zip(offsets[:-1], offsets[1:])]
+            at = names.index(EVENTS_AFTER) + 1
+            names.insert(at, "reshuffle_events")
+            columns.insert(at, per_run)
+
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def find_store():
+    """The first of DEFAULT_PATHS that exists, or None."""
+    for path in DEFAULT_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_experimental(path, events=False):
+    """
+    Load parsed experiment results as a list of per-run dicts.
+
+    Reads the columnar .npz store or a legacy experiments.json. From a
+    store only the run table is read, unless events=True, which also fills
+    in each run's "reshuffle_events". A missing path gives [].
+    """
+    if not path or not os.path.exists(path):
+        return []
+    if str(path).endswith(".json"):
+        with open(path) as f:
+            return json.load(f)
+    with ExperimentStore(path) as store:
+        return store.records(events)
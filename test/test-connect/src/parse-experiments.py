@@ -4,42 +4,421 @@ Parse experiment log directories and extract stability metrics.
 
 Scans all timestamped log directories under logs/, reads run-info.json
 and parses switchboard.log + combined.log for reshuffle errors and dead letters.
+Compressed logs (.gz, .bz2, .xz, .zst) are read as streams. Events from
+all logs are merged by timestamp, so every elapsed_ms is measured from the
+run's earliest log line.
 
-Outputs: experiments.json with per-run metrics for overlay on the model plots.
+Outputs: experiments.npz with per-run metrics for overlay on the model plots
+(a columnar store, see experiment_store.py; --json also writes experiments.json).
 
-Usage: cd test/test-connect && .venv/bin/python3 src/parse-experiments.py
+Runs are indexed incrementally: experiments.manifest.json records the size,
+mtime and SHA-256 of each directory's files, and only new or changed
+directories are parsed again. Use --rebuild to force a full pass.
+
+Usage: cd test/test-connect && .venv/bin/python3 src/parse-experiments.py [--rebuild]
 """
 
+import argparse
+import bz2
+import gzip
+import hashlib
+import heapq
 import json
+import lzma
+import mmap
 import os
+import random
 import re
+import shutil
 import sys
+import tempfile
+import time
+from collections import deque
 from pathlib import Path
 
+from experiment_store import load_experimental, save_store
+from sweep import iter_sweep
+
 LOG_DIR = Path("logs")
-OUTPUT = Path("experiments.json")
+OUTPUT = Path("experiments.npz")  # columnar store, see experiment_store.py
+JSON_OUTPUT = Path("experiments.json")
+MANIFEST = Path("experiments.manifest.json")
+TRACE_OUTPUT = Path("load-trace.csv")  # per-client M(t), read by burst-model.py --trace
+TRACE_BIN_S = 1.0
+LOG_FILES = ["switchboard.log", "combined.log"]
+TRACKED_FILES = ["run-info.json"] + LOG_FILES  # files that determine a run's result
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".zst")  # archived logs, read as streams
 
 # Patterns from analyze-logs.ts
-TIMESTAMP_RE = re.compile(r"\[(\d{2}):(\d{2}):(\d{2})\.(\d{2,3})\]")
-RESHUFFLE_RE = re.compile(r"\[Attempt (\d+)\] Excessive reshuffle")
+# ASCII digits only, so the str patterns match exactly what their bytes
+# counterparts below do
+TIMESTAMP_RE = re.compile(r"\[(\d{2}):(\d{2}):(\d{2})\.(\d{2,3})\]", re.ASCII)
+RESHUFFLE_RE = re.compile(r"\[Attempt (\d+)\] Excessive reshuffle", re.ASCII)
 DEAD_LETTER_RE = re.compile(r"\[SYNC\] DEAD LETTER:")
-EXCESSIVE_RESHUFFLE_RE = re.compile(r"Excessive reshuffle detected")
 PUSH_SUCCESS_RE = re.compile(r"PushSyncEnvelopes.*response.*200|push.*success", re.IGNORECASE)
 PUSH_FAIL_RE = re.compile(r"PushSyncEnvelopes.*response.*(4\d{2}|5\d{2})|push.*fail", re.IGNORECASE)
 SHUTDOWN_ERROR_RE = re.compile(r"socket hang up|ECONNRESET|ECONNREFUSED")
+LOCAL_OPS_RE = re.compile(r"Executed (\d+) ops locally", re.ASCII)
 
+# Single pass: one alternation for both event kinds (RESHUFFLE_RE and
+# DEAD_LETTER_RE with the common "[" factored out, which lets the regex
+# engine skip ahead quickly), behind a substring check
+EVENT_RE = re.compile(
+    r"\[(?:Attempt (\d+)\] Excessive reshuffle|(?P<dead>SYNC\] DEAD LETTER:))", re.ASCII)
+EVENT_MARKERS = ("Excessive reshuffle", "DEAD LETTER")
+SHUTDOWN_CONTEXT = 4  # dead-letter line + next 3 lines checked for shutdown errors
 
-def parse_timestamp_ms(line):
-    """Extract timestamp as ms from start of day."""
-    m = TIMESTAMP_RE.search(line)
-    if not m:
-        return None
+DAY_MS = 24 * 3600 * 1000
+CARRY_LINES = 200          # lines a continuation line looks back for a timestamp
+EARLY_EVENTS_MAX = 10000   # events held back until a file's first timestamp
+_EARLY = object()          # placeholder time for events before a file's first timestamp
+
+# Bytes versions for scanning memory-mapped logs without decoding them
+TIMESTAMP_RE_B = re.compile(TIMESTAMP_RE.pattern.encode())
+EVENT_RE_B = re.compile(EVENT_RE.pattern.encode())
+SHUTDOWN_ERROR_RE_B = re.compile(SHUTDOWN_ERROR_RE.pattern.encode())
+
+
+def _timestamp_ms(m):
     h, mi, s = int(m.group(1)), int(m.group(2)), int(m.group(3))
     ms_str = m.group(4)
     ms = int(ms_str) * (10 if len(ms_str) == 2 else 1)  # "14" → 140ms, "140" → 140ms
     return ((h * 3600) + (mi * 60) + s) * 1000 + ms
 
 
+def parse_timestamp_ms(line, pattern=TIMESTAMP_RE):
+    """Extract timestamp as ms from start of day (line is str, or bytes with TIMESTAMP_RE_B)."""
+    m = pattern.search(line)
+    return _timestamp_ms(m) if m else None
+
+
+def _carried(lines_back, pattern=TIMESTAMP_RE):
+    """First timestamp found in lines_back (nearest line first), or None."""
+    for line in lines_back:
+        ts = parse_timestamp_ms(line, pattern)
+        if ts is not None:
+            return ts
+    return None
+
+
+def line_events(line, event_re=EVENT_RE):
+    """
+    Events on one line (str, or bytes with EVENT_RE_B): the first reshuffle
+    attempt number (or None) and whether the line holds a dead letter.
+    """
+    reshuffle, dead_letter = None, False
+    for m in event_re.finditer(line):
+        if m.group("dead"):
+            dead_letter = True
+        elif reshuffle is None:
+            reshuffle = int(m.group(1))
+    return reshuffle, dead_letter
+
+
+def iter_log_events(lines):
+    """
+    Stream one log file's events as (kind, time_of_day_ms, value), in line order.
+
+    If the file has a timestamp, the first record is ("start", first, None).
+    After it come ("reshuffle", t, attempt) and ("dead", t, shutdown)
+    records, where t is taken from the event's own line. A continuation line
+    carries the nearest timestamp in the previous CARRY_LINES lines forward,
+    or failing that the last one used. Events before the file's first
+    timestamp get that timestamp, unless there are more than
+    EARLY_EVENTS_MAX of them: then they all have t None and are released as
+    they resolve, possibly ahead of "start". t is None when no time can be
+    given.
+
+    Memory stays flat: each line is looked at once, and dead letters wait in
+    a lookahead window of SHUTDOWN_CONTEXT lines for a shutdown error.
+    """
+    recent = deque(maxlen=CARRY_LINES)  # previous lines, for carried timestamps
+    out = deque()      # [kind, t, value] in line order, released once resolved
+    pending = deque()  # (line number, record) of dead letters not yet classified
+    first = last = None
+    early = 0
+
+    for i, line in enumerate(lines):
+        ts = None
+        if first is None:
+            ts = parse_timestamp_ms(line)
+            if ts is not None:
+                first = last = ts
+                yield "start", ts, None
+                for record in out:
+                    if record[1] is _EARLY:
+                        record[1] = ts
+
+        if any(marker in line for marker in EVENT_MARKERS):
+            reshuffle, dead_letter = line_events(line)
+            if reshuffle is not None or dead_letter:
+                if first is None:
+                    early += 1
+                    if early <= EARLY_EVENTS_MAX:
+                        t = _EARLY
+                    else:
+                        # Too many to hold: none of them get a time
+                        t = None
+                        if early == EARLY_EVENTS_MAX + 1:
+                            for record in out:
+                                record[1] = None
+                else:
+                    t = ts if ts is not None else parse_timestamp_ms(line)
+                    if t is None:
+                        t = _carried(reversed(recent))
+                        if t is None:
+                            t = last
+                    last = t
+                if reshuffle is not None:
+                    out.append(["reshuffle", t, reshuffle])
+                if dead_letter:
+                    record = ["dead", t, None]
+                    out.append(record)
+                    pending.append((i, record))
+
+        # Dead letters — classify as shutdown vs real
+        if pending:
+            if SHUTDOWN_ERROR_RE.search(line):
+                for _, record in pending:
+                    record[2] = True
+                pending.clear()
+            while pending and i - pending[0][0] >= SHUTDOWN_CONTEXT - 1:
+                pending.popleft()[1][2] = False
+
+        while out and out[0][1] is not _EARLY and out[0][2] is not None:
+            yield tuple(out.popleft())
+        recent.append(line)
+
+    for _, record in pending:
+        record[2] = False
+    for kind, t, value in out:
+        yield kind, (None if t is _EARLY else t), value
+
+
+def _lines_before(buf, start, count):
+    """Up to count lines preceding offset start (a line start), nearest first."""
+    end = start
+    for _ in range(count):
+        if end == 0:
+            return
+        begin = buf.rfind(b"\n", 0, end - 1) + 1
+        yield buf[begin:end]
+        end = begin
+
+
+def iter_buffer_events(buf):
+    """
+    Bytes-level equivalent of iter_log_events over a whole log held in buf
+    (normally an mmap), for logs with plain "\n" line endings.
+
+    EVENT_RE_B runs over the entire buffer, so only lines holding an event
+    (and for continuation lines, the lines just before) are sliced out, and
+    nothing is decoded. A dead letter's context is searched in place.
+    """
+    first = last = first_line = None
+    m = TIMESTAMP_RE_B.search(buf)
+    if m is not None:
+        first = last = _timestamp_ms(m)
+        first_line = buf.rfind(b"\n", 0, m.start()) + 1
+        yield "start", first, None
+
+    # Events before the first timestamp get it, unless the text scanner
+    # would give up holding them (more than EARLY_EVENTS_MAX)
+    early_t = first
+    if first is not None:
+        early = pos = 0
+        while early <= EARLY_EVENTS_MAX:
+            m = EVENT_RE_B.search(buf, pos, first_line)
+            if m is None:
+                break
+            early += 1
+            pos = buf.find(b"\n", m.end()) + 1
+        if early > EARLY_EVENTS_MAX:
+            early_t = None
+
+    size = len(buf)
+    pos = 0
+    while True:
+        m = EVENT_RE_B.search(buf, pos)
+        if m is None:
+            break
+        start = buf.rfind(b"\n", 0, m.start()) + 1
+        pos = buf.find(b"\n", m.end()) + 1 or size
+        line = buf[start:pos]
+        reshuffle, dead_letter = line_events(line, EVENT_RE_B)
+
+        if first is None or start < first_line:
+            t = early_t
+        else:
+            t = parse_timestamp_ms(line, TIMESTAMP_RE_B)
+            if t is None:
+                t = _carried(_lines_before(buf, start, CARRY_LINES), TIMESTAMP_RE_B)
+                if t is None:
+                    t = last
+            last = t
+
+        if reshuffle is not None:
+            yield "reshuffle", t, reshuffle
+        if dead_letter:
+            # Dead letters — classify as shutdown vs real
+            end = pos
+            for _ in range(SHUTDOWN_CONTEXT - 1):
+                if end >= size:
+                    break
+                end = buf.find(b"\n", end) + 1 or size
+            yield "dead", t, SHUTDOWN_ERROR_RE_B.search(buf, start, end) is not None
+
+
+def find_log(log_path, name):
+    """Path of a log file, or of its compressed variant if only that exists."""
+    for suffix in ("",) + COMPRESSED_SUFFIXES:
+        path = log_path / (name + suffix)
+        if path.exists():
+            return path
+    return None
+
+
+def zstd_module():
+    """compression.zstd (Python 3.14+) or the zstandard package, else None."""
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            return None
+    return zstd
+
+
+def open_log_text(path):
+    """Open a plain or compressed log as a decompressing text stream."""
+    kwargs = {"encoding": "utf-8", "errors": "replace"}
+    suffix = path.suffix
+    if suffix == ".gz":
+        return gzip.open(path, "rt", **kwargs)
+    if suffix == ".bz2":
+        return bz2.open(path, "rt", **kwargs)
+    if suffix == ".xz":
+        return lzma.open(path, "rt", **kwargs)
+    if suffix == ".zst":
+        zstd = zstd_module()
+        if zstd is None:
+            raise RuntimeError(f"cannot read {path}: .zst logs need Python 3.14+ "
+                               "or the zstandard package")
+        return zstd.open(path, "rt", **kwargs)
+    return open(path, **kwargs)
+
+
+def iter_log_file_events(path, use_mmap=True):
+    """
+    Stream one log file's events (see iter_log_events).
+
+    Plain files are memory-mapped and scanned as bytes. Compressed files,
+    files with "\r" line endings (which text mode would split differently)
+    and files that cannot be mapped go through the text scanner.
+    """
+    if path.suffix in COMPRESSED_SUFFIXES:
+        use_mmap = False
+    if use_mmap:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            try:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                buf = None
+        if buf is not None:
+            with buf:
+                if buf.find(b"\r") < 0:
+                    yield from iter_buffer_events(buf)
+                    return
+
+    with open_log_text(path) as f:
+        yield from iter_log_events(f)
+
+
+class Timeline:
+    """
+    Maps one file's times of day to run-absolute milliseconds.
+
+    The first file of a run to report a timestamp fixes the reference day.
+    Every file's first timestamp is placed within 12 hours of that
+    reference, so logs that start on either side of midnight line up. After
+    that, a jump of more than 12 hours between consecutive times is taken to
+    be a midnight rollover.
+    """
+
+    def __init__(self, anchor):
+        self.anchor = anchor  # dict shared by the files of one run
+        self.offset = None
+        self.last = None
+
+    def __call__(self, tod):
+        if self.offset is None:
+            ref = self.anchor.setdefault("ref", tod)
+            self.offset = round((ref - tod) / DAY_MS) * DAY_MS
+        elif tod < self.last - DAY_MS // 2:
+            self.offset += DAY_MS
+        elif tod > self.last + DAY_MS // 2:
+            self.offset -= DAY_MS
+        self.last = tod
+        return tod + self.offset
+
+
+def _timed_events(events, timeline, file_index, untimed):
+    """Merge keys for one file's events; events without a time go to untimed."""
+    for seq, (kind, tod, value) in enumerate(events):
+        if tod is None:
+            untimed.append((kind, value))
+        else:
+            yield timeline(tod), file_index, seq, kind, value
+
+
+def merge_log_events(paths, use_mmap=True):
+    """
+    k-way merge of several logs' events by absolute time.
+
+    Yields (elapsed_ms, kind, value), with elapsed_ms measured from the
+    earliest timestamp in any of the files. Events that have no time come
+    last, with elapsed_ms None.
+    """
+    anchor, untimed = {}, []
+    streams = [_timed_events(iter_log_file_events(path, use_mmap), Timeline(anchor),
+                             file_index, untimed)
+               for file_index, path in enumerate(paths)]
+
+    # Each stream opens with its "start" record, so the first item is the run start
+    run_start = None
+    for t, _, _, kind, value in heapq.merge(*streams):
+        if kind == "start":
+            if run_start is None:
+                run_start = t
+        else:
+            yield t - run_start, kind, value
+    for kind, value in untimed:
+        yield None, kind, value
+
+
+def record_event(result, elapsed, kind, value):
+    """Add one event to a run's result (elapsed may be None)."""
+    if kind == "reshuffle":
+        result["reshuffle_events"].append({
+            "attempt": value,
+            "elapsed_ms": elapsed,
+        })
+        result["max_reshuffle_attempt"] = max(result["max_reshuffle_attempt"], value)
+        if result["first_reshuffle_ms"] is None and elapsed is not None:
+            result["first_reshuffle_ms"] = elapsed
+    else:  # "dead"; value tells whether it came with a shutdown error
+        result["dead_letter_count"] += 1
+        if result["first_dead_letter_ms"] is None and elapsed is not None:
+            result["first_dead_letter_ms"] = elapsed
+        if value:
+            result["shutdown_dead_letters"] += 1
+        else:
+            result["real_dead_letters"] += 1
+
+
 def parse_log_dir(log_path):
     """Parse a single experiment log directory."""
     run_info_path = log_path / "run-info.json"
@@ -74,64 +453,290 @@ def parse_log_dir(log_path):
         "stable": True,
     }
 
-    # Parse all log files
-    first_timestamp = None
+    # Parse all log files, merged into one timeline
+    paths = [p for p in (find_log(log_path, name) for name in LOG_FILES) if p]
+    for elapsed, kind, value in merge_log_events(paths):
+        record_event(result, elapsed, kind, value)
 
-    for log_file in ["switchboard.log", "combined.log"]:
-        log_path_file = log_path / log_file
-        if not log_path_file.exists():
-            continue
+    result["reshuffle_count"] = len(result["reshuffle_events"])
+    # Stable = no reshuffles AND no real (non-shutdown) dead letters
+    result["stable"] = (result["reshuffle_count"] == 0 and result["real_dead_letters"] == 0)
+    return result
 
-        with open(log_path_file, errors="replace") as f:
-            lines = f.readlines()
 
-        for i, line in enumerate(lines):
-            ts = parse_timestamp_ms(line)
-
-            # Track first timestamp as reference
-            if ts is not None and first_timestamp is None:
-                first_timestamp = ts
-
-            # Reshuffle events
-            rm = RESHUFFLE_RE.search(line)
-            if rm:
-                attempt = int(rm.group(1))
-                elapsed = (ts - first_timestamp) if ts and first_timestamp else None
-                result["reshuffle_events"].append({
-                    "attempt": attempt,
-                    "elapsed_ms": elapsed,
-                })
-                result["max_reshuffle_attempt"] = max(
-                    result["max_reshuffle_attempt"], attempt
-                )
-                if result["first_reshuffle_ms"] is None and elapsed is not None:
-                    result["first_reshuffle_ms"] = elapsed
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint(log_path, previous=None):
+    """
+    Size, mtime and SHA-256 of each tracked file in a log directory.
+
+    Files whose size and mtime match the previous fingerprint keep their
+    recorded hash instead of being read again.
+    """
+    previous = previous or {}
+    files = {}
+    for name in TRACKED_FILES:
+        path = find_log(log_path, name) if name in LOG_FILES else log_path / name
+        try:
+            st = path.stat()
+        except (AttributeError, FileNotFoundError):
+            continue
+        entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        old = previous.get(path.name)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            entry["sha256"] = old["sha256"]
+        else:
+            entry["sha256"] = file_sha256(path)
+        files[path.name] = entry
+    return files
+
+
+def same_content(a, b):
+    return {n: e["sha256"] for n, e in a.items()} == {n: e["sha256"] for n, e in b.items()}
+
+
+def index_dir(log_path, previous=None, have_result=False):
+    """
+    Fingerprint one log directory and parse it unless its content is unchanged.
+
+    Returns (files, result, status) where status is "parsed", "reused" (the
+    caller keeps its previous result) or an error message. Errors are caught
+    here so one bad directory does not stop a parallel batch.
+    """
+    try:
+        files = fingerprint(log_path, previous)
+        # A directory without run-info.json has no result to reuse
+        if (previous is not None and same_content(files, previous)
+                and (have_result or "run-info.json" not in files)):
+            return files, None, "reused"
+        return files, parse_log_dir(log_path), "parsed"
+    except Exception as exc:
+        return None, None, f"{type(exc).__name__}: {exc}"
+
+
+def iter_local_ops(lines):
+    """
+    Stream (time_of_day_ms, ops) for each "Executed N ops locally" line.
+
+    These verbose lines carry no timestamp of their own, so each takes the
+    last one seen; mutations before the file's first timestamp get that
+    first timestamp. A file without any timestamp yields nothing.
+    """
+    last = None
+    early = 0
+    for line in lines:
+        ts = parse_timestamp_ms(line)
+        if ts is not None:
+            if last is None and early:
+                yield ts, early
+            last = ts
+        if "ops locally" not in line:
+            continue
+        m = LOCAL_OPS_RE.search(line)
+        if m is None:
+            continue
+        if last is None:
+            early += int(m.group(1))
+        else:
+            yield last, int(m.group(1))
+
+
+def client_logs(log_path):
+    """The run's client-<i>.log files (plain or compressed), else combined.log."""
+    names = sorted({p.name.split(".log")[0] for p in log_path.glob("client-*.log*")})
+    paths = [find_log(log_path, name + ".log") for name in names]
+    if paths:
+        return [p for p in paths if p]
+    combined = find_log(log_path, "combined.log")
+    return [combined] if combined else []
+
+
+def extract_load_trace(log_path, bin_s=TRACE_BIN_S):
+    """
+    Per-client mutation rate M(t) of one run, from its local-execution lines.
+
+    Ops are binned by bin_s seconds from the first mutation and divided by
+    the client count (run-info.json, else the number of client logs).
+    Returns (bin_starts_s, rates), or None if the logs have no timed
+    "Executed N ops locally" lines (clients run without --verbose).
+    """
+    paths = client_logs(log_path)
+    anchor, events = {}, []
+    for path in paths:
+        timeline = Timeline(anchor)
+        with open_log_text(path) as f:
+            events += [(timeline(tod), ops) for tod, ops in iter_local_ops(f)]
+    if not events:
+        return None
 
-            # Dead letters — classify as shutdown vs real
-            if DEAD_LETTER_RE.search(line):
-                result["dead_letter_count"] += 1
-                elapsed = (ts - first_timestamp) if ts and first_timestamp else None
-                if result["first_dead_letter_ms"] is None and elapsed is not None:
-                    result["first_dead_letter_ms"] = elapsed
-
-                # Check next 3 lines for shutdown error indicators
-                context = "\n".join(lines[i:i + 4])
-                if SHUTDOWN_ERROR_RE.search(context):
-                    result["shutdown_dead_letters"] += 1
+    clients = None
+    run_info_path = log_path / "run-info.json"
+    if run_info_path.exists():
+        with open(run_info_path) as f:
+            run_info = json.load(f)
+        clients = run_info.get("clients", run_info.get("numClients"))
+    clients = clients or max(1, len(paths))
+
+    start = min(t for t, _ in events)
+    bin_ms = bin_s * 1000.0
+    totals = [0] * (int((max(t for t, _ in events) - start) // bin_ms) + 1)
+    for t, ops in events:
+        totals[int((t - start) // bin_ms)] += ops
+    return ([k * bin_s for k in range(len(totals))],
+            [ops / clients / bin_s for ops in totals])
+
+
+def write_trace(path, starts, rates):
+    """Write a load trace as CSV: one row per bin, (t_s, M)."""
+    with open(path, "w") as f:
+        f.write("t_s,M\n")
+        for t, M in zip(starts, rates):
+            f.write(f"{t:g},{M:.6g}\n")
+
+
+def load_index():
+    """Previous manifest and results keyed by directory ({} if missing)."""
+    manifest, results = {}, {}
+    if MANIFEST.exists() and OUTPUT.exists():
+        with open(MANIFEST) as f:
+            manifest = json.load(f).get("runs", {})
+        results = {e["dir"]: e for e in load_experimental(OUTPUT, events=True)}
+    return manifest, results
+
+
+def write_synthetic_log(path, size_mb, seed=0):
+    """Write a switchboard-style log of about size_mb MB with sparse events."""
+    rng = random.Random(seed)
+    fillers = [f"[switchboard] applied job {i} to document doc-{i % 97} in {i % 13}ms"
+               for i in range(256)]
+    target = size_mb * 1024 * 1024
+    t = 8 * 3600 * 1000
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        while written < target:
+            lines = []
+            for _ in range(10000):
+                t += rng.randrange(3)
+                stamp = (f"[{t // 3600000 % 24:02d}:{t // 60000 % 60:02d}:"
+                         f"{t // 1000 % 60:02d}.{t % 1000:03d}]")
+                r = rng.random()
+                if r < 0.0005:
+                    msg = (f"[Attempt {rng.randint(1, 5)}] Excessive reshuffle detected: "
+                           f"{rng.randint(1001, 5000)} operations")
+                elif r < 0.0008:
+                    msg = "[SYNC] DEAD LETTER: documentId=doc-1 jobId=j branch=main operations=3"
+                elif r < 0.0010:
+                    msg = "Error: socket hang up"
                 else:
-                    result["real_dead_letters"] += 1
-
-            # Excessive reshuffle in error messages
-            if EXCESSIVE_RESHUFFLE_RE.search(line) and not rm:
-                pass  # counted via switchboard.log reshuffles
+                    msg = rng.choice(fillers)
+                lines.append(f"{stamp} {msg}\n")
+            chunk = "".join(lines)
+            f.write(chunk)
+            written += len(chunk)
+
+
+def run_benchmark(size_mb):
+    """
+    Time the scanners on a synthetic log and check they all agree: text and
+    mmap on the plain file, then streaming reads of compressed copies.
+    """
+    def scan(path, use_mmap=False):
+        result = {"reshuffle_events": [], "dead_letter_count": 0,
+                  "shutdown_dead_letters": 0, "real_dead_letters": 0,
+                  "first_reshuffle_ms": None, "first_dead_letter_ms": None,
+                  "max_reshuffle_attempt": 0}
+        start = time.perf_counter()
+        for elapsed, kind, value in merge_log_events([path], use_mmap):
+            record_event(result, elapsed, kind, value)
+        return result, time.perf_counter() - start
+
+    zstd = zstd_module()
+    writers = {
+        ".gz": lambda p: gzip.open(p, "wb", compresslevel=1),
+        ".bz2": lambda p: bz2.open(p, "wb", compresslevel=1),
+        ".xz": lambda p: lzma.open(p, "wb", preset=0),
+        ".zst": zstd and (lambda p: zstd.open(p, "wb")),
+    }
 
-    result["reshuffle_count"] = len(result["reshuffle_events"])
-    # Stable = no reshuffles AND no real (non-shutdown) dead letters
-    result["stable"] = (result["reshuffle_count"] == 0 and result["real_dead_letters"] == 0)
-    return result
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "switchboard.log"
+        print(f"Writing {size_mb:g} MB synthetic log...")
+        write_synthetic_log(path, size_mb)
+        mb = path.stat().st_size / 1e6
+
+        text_result, text_sec = scan(path)
+        print(f"  text: {text_sec:7.2f}s  {mb / text_sec:8.1f} MB/s")
+        runs = [("mmap", scan(path, use_mmap=True))]
+        mmap_sec = runs[0][1][1]
+        print(f"  mmap: {mmap_sec:7.2f}s  {mb / mmap_sec:8.1f} MB/s  "
+              f"({text_sec / mmap_sec:.1f}x)")
+
+        for suffix in COMPRESSED_SUFFIXES:
+            if writers[suffix] is None:
+                print(f"  {suffix[1:]:>4}: skipped (no zstd module)")
+                continue
+            packed = path.with_name(path.name + suffix)
+            with open(path, "rb") as src, writers[suffix](packed) as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            result, sec = scan(packed)
+            runs.append((suffix[1:], (result, sec)))
+            print(f"  {suffix[1:]:>4}: {sec:7.2f}s  {mb / sec:8.1f} MB/s  "
+                  f"({text_sec / sec:.1f}x, file {packed.stat().st_size / 1e6:.0f} MB)")
+            packed.unlink()
+
+    print(f"  {len(text_result['reshuffle_events'])} reshuffles, "
+          f"{text_result['dead_letter_count']} dead letters")
+    mismatched = [name for name, (result, _) in runs if result != text_result]
+    if mismatched:
+        print(f"MISMATCH: {', '.join(mismatched)} disagree with the text scanner")
+        sys.exit(1)
+    print("  results identical")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Parse experiment logs")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Ignore the manifest and re-parse every log directory")
+    parser.add_argument("--json", action="store_true",
+                        help=f"Also export the results as {JSON_OUTPUT}")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Directories parsed in parallel "
+                             "(default: 1 = serial, 0 = all cores)")
+    parser.add_argument("--trace", type=Path, metavar="RUN_DIR",
+                        help="Extract the per-client load trace M(t) of one run "
+                             f"to --trace-out (default: {TRACE_OUTPUT}) and exit")
+    parser.add_argument("--trace-out", type=Path, default=TRACE_OUTPUT,
+                        help="Output CSV for --trace")
+    parser.add_argument("--trace-bin", type=float, default=TRACE_BIN_S,
+                        help=f"Trace bin width in seconds (default: {TRACE_BIN_S:g})")
+    parser.add_argument("--benchmark", type=float, metavar="SIZE_MB",
+                        help="Benchmark the text, mmap and compressed-input scanners "
+                             "on a synthetic log of SIZE_MB and exit")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.benchmark)
+        return
+
+    if args.trace:
+        trace = extract_load_trace(args.trace, args.trace_bin)
+        if trace is None:
+            print(f"No timed 'Executed N ops locally' lines in {args.trace} "
+                  "(clients must run with --verbose)")
+            sys.exit(1)
+        starts, rates = trace
+        write_trace(args.trace_out, starts, rates)
+        print(f"Wrote {args.trace_out}: {len(rates)} bins of {args.trace_bin:g}s, "
+              f"peak M={max(rates):.1f} ops/s per client")
+        print(f"Next: .venv/bin/python3 src/burst-model.py --trace {args.trace_out}")
+        return
+
     if not LOG_DIR.exists():
         print(f"No logs directory found at {LOG_DIR}")
         sys.exit(1)
@@ -146,18 +751,41 @@ def main():
         print("No experiment log directories found.")
         sys.exit(1)
 
+    old_manifest, old_results = ({}, {}) if args.rebuild else load_index()
+
     experiments = []
-    for d in log_dirs:
-        result = parse_log_dir(d)
+    manifest = {}
+    parsed = failed = 0
+    tasks = [(d, old_manifest.get(str(d)), str(d) in old_results) for d in log_dirs]
+    for d, (files, result, status) in zip(
+            log_dirs, iter_sweep(index_dir, tasks, args.jobs)):
+        key = str(d)
+        if status == "parsed":
+            parsed += 1
+        elif status == "reused":
+            result = old_results.get(key)
+        else:
+            # Keep what we had, so the directory is retried on the next run
+            print(f"  {d}: {status}", file=sys.stderr)
+            failed += 1
+            files, result = old_manifest.get(key), old_results.get(key)
+
+        if files is not None:
+            manifest[key] = files
         if result:
             experiments.append(result)
 
-    # Write JSON
-    with open(OUTPUT, "w") as f:
-        json.dump(experiments, f, indent=2)
+    save_store(OUTPUT, experiments)
+    if args.json:
+        with open(JSON_OUTPUT, "w") as f:
+            json.dump(experiments, f, indent=2)
+    with open(MANIFEST, "w") as f:
+        json.dump({"version": 1, "runs": manifest}, f, indent=2)
 
     # Print summary
-    print(f"Parsed {len(experiments)} experiments → {OUTPUT}")
+    print(f"Parsed {len(experiments)} experiments → {OUTPUT} "
+          f"({parsed} new or changed, {len(log_dirs) - parsed - failed} unchanged"
+          + (f", {failed} failed" if failed else "") + ")")
     print()
     print(f"{'Dir':>24s}  {'N':>2}  {'M':>5}  {'Int':>5}  {'Stable':>7}  "
           f"{'Reshuf':>6}  {'RealDL':>6}  {'ShutDL':>6}  {'1st Fail (s)':>12}")
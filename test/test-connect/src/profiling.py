@@ -0,0 +1,145 @@
+"""
+Per-stage profiling for the model CLIs (--profile).
+
+A run is split into named stages (summary, heatmap, duration sweep, ...).
+For each stage StageProfiler records:
+
+    wall time     time.perf_counter() around the stage
+    render time   time spent writing PNGs, from timed("render") blocks
+    counters      recurrence steps, simulated events etc., from count()
+    cache         hits and misses of the result cache, if one is in use
+    peak RSS      the process high-water mark when the stage ends (and
+                  that of finished worker processes)
+
+With dump_dir set, each stage also runs under cProfile and its stats are
+written to <dump_dir>/<stage>.prof (inspect with `python -m pstats`).
+
+count() and timed() are cheap enough to leave in the model code: they
+add to module-level Counters whether or not a profiler is running.
+Sweeps run with --jobs > 1 count in their worker processes, so their
+counters and cache hits are lost; profile with -j 1 for full numbers.
+"""
+
+import cProfile
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+counters = Counter()  # name -> events (recurrence steps, pushes, ...)
+timers = Counter()    # name -> seconds spent in timed(name) blocks
+
+
+def count(name, n=1):
+    """Add n to the named counter."""
+    counters[name] += n
+
+
+@contextmanager
+def timed(name):
+    """Add the wall time of the with-block to the named timer."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timers[name] += time.perf_counter() - start
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its reaped children, in MB."""
+    if resource is None:
+        return float("nan")
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak * scale / 1e6
+
+
+class StageProfiler:
+    """Collects per-stage measurements; a no-op unless enabled."""
+
+    def __init__(self, enabled=False, cache=None, dump_dir=None):
+        self.enabled = enabled
+        self.cache = cache
+        self.dump_dir = dump_dir
+        self.stages = []
+        if enabled and dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+
+    def _cache_counts(self):
+        if self.cache is None:
+            return 0, 0
+        return self.cache.hits, self.cache.misses
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        counters_before = counters.copy()
+        render_before = timers["render"]
+        hits_before, misses_before = self._cache_counts()
+        profile = cProfile.Profile() if self.dump_dir else None
+        start = time.perf_counter()
+        if profile:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile:
+                profile.disable()
+            wall = time.perf_counter() - start
+            hits, misses = self._cache_counts()
+            self.stages.append({
+                "stage": name,
+                "wall_s": wall,
+                "render_s": timers["render"] - render_before,
+                "counters": dict(counters - counters_before),
+                "cache_hits": hits - hits_before,
+                "cache_misses": misses - misses_before,
+                "peak_rss_mb": peak_rss_mb(),
+            })
+            if profile:
+                slug = re.sub(r"[^A-Za-z0-9]+", "-", name).strip("-")
+                profile.dump_stats(os.path.join(self.dump_dir, f"{slug}.prof"))
+
+    def report(self, file=None):
+        """Print the per-stage breakdown table (nothing if disabled)."""
+        if not self.enabled or not self.stages:
+            return
+        file = file or sys.stdout
+        total = sum(s["wall_s"] for s in self.stages)
+        print(f"\n{'=' * 96}", file=file)
+        print("PROFILE (per stage)", file=file)
+        print(f"{'Stage':<24} {'Wall s':>8} {'%':>5} {'Render s':>9} {'Steps':>12} "
+              f"{'Cache hit':>13} {'Peak RSS MB':>12}", file=file)
+        print("-" * 96, file=file)
+        for s in self.stages:
+            lookups = s["cache_hits"] + s["cache_misses"]
+            cache = (f"{s['cache_hits']}/{lookups} ({s['cache_hits'] / lookups:.0%})"
+                     if lookups else "-")
+            steps = sum(s["counters"].values())
+            print(f"{s['stage']:<24} {s['wall_s']:>8.3f} "
+                  f"{100 * s['wall_s'] / total if total else 0:>5.1f} "
+                  f"{s['render_s']:>9.3f} {steps if steps else '-':>12} "
+                  f"{cache:>13} {s['peak_rss_mb']:>12.1f}", file=file)
+        print("-" * 96, file=file)
+        print(f"{'total':<24} {total:>8.3f}", file=file)
+
+        detailed = [s for s in self.stages if s["counters"]]
+        if detailed:
+            print("\nSteps by counter:", file=file)
+            for s in detailed:
+                parts = ", ".join(f"{k} {v:,}" for k, v in sorted(s["counters"].items()))
+                print(f"  {s['stage']:<22} {parts}", file=file)
+        if self.dump_dir:
+            print(f"\ncProfile stats per stage in {self.dump_dir}/ "
+                  f"(python -m pstats <file>)", file=file)
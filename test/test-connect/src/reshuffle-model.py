@@ -15,10 +15,18 @@ Parameters derived from codebase:
 """
 
 import argparse
+import heapq
+import itertools
 import json
+import os
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.colors import LinearSegmentedColormap
+
+from client_mix import DISTRIBUTIONS, rate_matrix
+from experiment_store import find_store, load_experimental
+from profiling import StageProfiler, count, timed
+from sharding import ACCESS_PATTERNS, shard_shares
+from sweep import map_grid, run_sweep
 
 # ─── Parameters ───────────────────────────────────────────────────────────────
 
@@ -27,20 +35,72 @@ T_FLUSH = 0.5       # flush timer (seconds)
 S_MAX = 1000        # max reshuffle threshold
 T_POLL = 2.0        # poll interval (seconds)
 RTT = 0.05          # network round-trip time (seconds)
+WORKERS = 1         # switchboard job-executor workers
+DISPATCH = "shared" # "shared" queue, or per-client document "affinity"
+DOCUMENTS = 1       # documents the clients' ops are spread over (see sharding.py)
+ACCESS = "uniform"  # client-to-document access: "uniform", "zipf" or "partition"
+DOC_SKEW = 1.0      # zipf exponent of document popularity for ACCESS = "zipf"
+
+
+def model_constants():
+    """Constants the CLI can change, as sent to sweep workers (see sweep.py)."""
+    return {'B': B, 'T_FLUSH': T_FLUSH, 'S_MAX': S_MAX, 'T_POLL': T_POLL, 'RTT': RTT,
+            'WORKERS': WORKERS, 'DISPATCH': DISPATCH, 'DOCUMENTS': DOCUMENTS,
+            'ACCESS': ACCESS, 'DOC_SKEW': DOC_SKEW}
+
+
+def _restore_constants(constants):
+    """Sweep worker initializer: apply the parent's model_constants()."""
+    globals().update(constants)
+
+
+def _pool_state():
+    """initializer / initargs that give sweep workers the CLI's constants."""
+    return {'initializer': _restore_constants, 'initargs': (model_constants(),)}
 
 # ─── Derived helpers ──────────────────────────────────────────────────────────
 
 def t_batch(M):
     """Time between batch flushes for a single client at M ops/sec."""
-    return min(B / M, T_FLUSH) if M > 0 else T_FLUSH
+    M = np.asarray(M, dtype=float)
+    with np.errstate(divide='ignore'):
+        Tb = np.where(M > 0, np.minimum(B / M, T_FLUSH), T_FLUSH)
+    return Tb[()]
 
 
 def b_eff(M):
     """Actual number of ops in a batch."""
-    return min(B, M * T_FLUSH)
+    return np.minimum(B, np.asarray(M, dtype=float) * T_FLUSH)[()]
 
 
-def x_crit(N, M):
+def clients_per_worker(N, workers=None, dispatch=None):
+    """
+    Clients whose batches the busiest worker handles.
+
+    "shared": all workers take from one FCFS queue, N / workers each.
+    "affinity": client c's documents are pinned to worker c % workers,
+    so the busiest worker serves ceil(N / workers) clients.
+    """
+    workers = WORKERS if workers is None else workers
+    dispatch = DISPATCH if dispatch is None else dispatch
+    N = np.asarray(N, dtype=float)
+    if dispatch == "affinity":
+        return np.ceil(N / workers)[()]
+    return (N / workers)[()]
+
+
+def shard_factors(N, documents=None, access=None):
+    """
+    Conflict multipliers (a sharding.ShardShares) for N clients working on
+    `documents` documents (default DOCUMENTS) with access pattern `access`
+    (default ACCESS, zipf exponent DOC_SKEW). All 1.0 for one document.
+    """
+    documents = DOCUMENTS if documents is None else documents
+    access = ACCESS if access is None else access
+    return shard_shares(N, documents, access, DOC_SKEW)
+
+
+def x_crit(N, M, workers=None, dispatch=None, documents=None, access=None):
     """
     Critical processing time per operation (ms).
 
@@ -49,86 +109,262 @@ def x_crit(N, M):
     one T_batch window. Each batch contains B_eff ops plus C(age) conflicts.
 
     Stable when: X * (B_eff + N * M * age) < T_batch * 1000 / N
+
+    With several workers the busiest one must keep up with the batches of
+    clients_per_worker(N) clients instead of N. Conflicts still come from
+    all N clients, since they share the store.
+
+    With the ops spread over several documents (documents / access, see
+    shard_factors) a batch only reprocesses the conflicts on its own
+    document: on average a fraction shard_factors(N).scan of them.
+
+    N, M and documents may be scalars or broadcastable arrays.
     """
+    N = np.asarray(N, dtype=float)
     Tb = t_batch(M)
     Be = b_eff(M)
     age = Tb + RTT
-    conflict_ops = N * M * age
+    conflict_ops = N * M * age * shard_factors(N, documents, access).scan
     total_ops_per_batch = Be + conflict_ops
-    if total_ops_per_batch <= 0:
-        return float('inf')
-    available_ms = Tb * 1000.0 / N
-    return available_ms / total_ops_per_batch
+    with np.errstate(divide='ignore', invalid='ignore'):
+        available_ms = Tb * 1000.0 / clients_per_worker(N, workers, dispatch)
+        xc = np.where(total_ops_per_batch <= 0, np.inf,
+                      available_ms / total_ops_per_batch)
+    return xc[()]
 
 
-# ─── Discrete-time simulation ────────────────────────────────────────────────
+def x_crit_mix(rates, workers=None, dispatch=None, documents=None, access=None):
+    """
+    Critical processing time per operation (ms) for clients with their own
+    rates.
+
+    rates holds per-client rates along its last axis (see client_mix;
+    zero entries are absent clients). Client c sends a batch of
+    B_eff(M_c) ops every T_batch(M_c) seconds, and each batch carries the
+    conflicts of every client's ops during its age, total * age_c, where
+    total is the sum of the rates. The busiest worker must process its
+    clients' ops within a second:
+
+        X * sum_c (B_eff(M_c) + total * age_c) / T_batch(M_c) < 1000
+
+    With "shared" dispatch the load is split evenly over the workers;
+    with "affinity" worker w serves clients c % workers == w. For equal
+    rates this is x_crit. documents / access scale the conflicts as in
+    x_crit (the "partition" shares assume equal rates). Returns an array
+    of the leading shape.
+    """
+    workers = WORKERS if workers is None else workers
+    dispatch = DISPATCH if dispatch is None else dispatch
+    rates = np.asarray(rates, dtype=float)
+    present = rates > 0
+    scan = shard_factors(present.sum(axis=-1), documents, access).scan
+    total = rates.sum(axis=-1, keepdims=True) * np.asarray(scan)[..., None]
+    Tb = t_batch(rates)
+    ops_per_sec = np.where(present, (b_eff(rates) + total * (Tb + RTT)) / Tb, 0.0)
+    if dispatch == "affinity" and workers > 1:
+        lane = np.arange(rates.shape[-1]) % workers
+        busiest = np.max([ops_per_sec[..., lane == w].sum(axis=-1)
+                          for w in range(min(workers, rates.shape[-1]))], axis=0)
+    else:
+        busiest = ops_per_sec.sum(axis=-1) / workers
+    with np.errstate(divide='ignore'):
+        xc = np.where(busiest > 0, 1000.0 / np.where(busiest > 0, busiest, 1.0), np.inf)
+    return xc[()]
 
-def simulate(N, M, X_ms, duration_sec=30.0, dt=0.01):
+
+def evaluate_stability(N, M, X_ms, S_max=S_MAX, workers=None, dispatch=None,
+                       documents=None, access=None):
+    """
+    Steady-state verdicts for a whole (N, M, X) parameter space at once.
+
+    N, M and X_ms broadcast against each other, so passing them as
+    orthogonal axes (e.g. N[:, None, None], M[None, :, None],
+    X[None, None, :]) yields a full cube from one call. workers,
+    dispatch, documents and access are passed to x_crit.
+
+    Returns dict of arrays with the broadcast shape:
+      x_crit     - critical processing time per op (ms)
+      ratio      - X / X_crit  (>= 1 means the queue grows without bound)
+      conflicts  - conflict count per batch at zero queue (N * M * age, on
+                   the hottest document)
+      unstable   - X >= X_crit
+      exceeds    - zero-queue conflicts already above S_max
+      fails      - unstable or exceeds
+    """
+    N = np.asarray(N, dtype=float)
+    M = np.asarray(M, dtype=float)
+    X_ms = np.asarray(X_ms, dtype=float)
+    xc = np.asarray(x_crit(N, M, workers, dispatch, documents, access))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(xc > 0, X_ms / xc, np.inf)
+    conflicts = N * M * (t_batch(M) + RTT) * shard_factors(N, documents, access).peak
+    ratio, xc, conflicts = np.broadcast_arrays(ratio, xc, conflicts)
+    count("grid cells", ratio.size)
+    unstable = ratio >= 1.0
+    exceeds = conflicts > S_max
+    return {
+        'x_crit': xc,
+        'ratio': ratio,
+        'conflicts': conflicts,
+        'unstable': unstable,
+        'exceeds': exceeds,
+        'fails': unstable | exceeds,
+    }
+
+
+def stability_ratio(N, M, X_ms):
+    """X / X_crit for broadcast (N, M, X) arrays (map_grid-friendly)."""
+    return evaluate_stability(N, M, X_ms)['ratio']
+
+
+def mix_stability_ratio(N, total, skew, X_ms, dist="zipf"):
+    """X / X_crit for broadcast (N, total, skew, X) arrays (map_grid-friendly)."""
+    xc = x_crit_mix(rate_matrix(N, total, dist, skew))
+    count("grid cells", np.size(xc))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(xc > 0, np.asarray(X_ms, dtype=float) / xc, np.inf)
+
+
+# ─── Discrete-event simulation ───────────────────────────────────────────────
+
+_ARRIVAL = 0
+_COMPLETION = 1
+
+
+def simulate(N, M, X_ms, duration_sec=30.0, workers=None, dispatch=None,
+             documents=None, access=None):
     """
     Simulate the queue/conflict dynamics over time.
 
+    Discrete-event engine: a priority queue holds batch arrivals (every
+    T_batch/N seconds across all clients) and batch completions. State only
+    changes when a batch starts processing, so the series are recorded at
+    those instants (once just before and once just after each start) plus
+    the endpoints. Cost scales with the number of batches, not with the
+    time resolution, and the result is the dt -> 0 limit of a fixed-step
+    simulation.
+
+    The server runs `workers` workers (default WORKERS). With "shared"
+    dispatch they serve one FCFS queue; with "affinity" batch k comes from
+    client k % N and always goes to worker client % workers, which has its
+    own queue (a lane). Conflicts count all N clients either way.
+
+    With several documents (documents / access, see shard_factors) the
+    conflicts series and the S_MAX check follow the hottest document,
+    while processing time uses the average conflicts per batch.
+
     Returns dict with time series:
-      t          - time points (seconds)
-      queue      - server queue depth (batches waiting)
+      t          - event times (seconds)
+      queue      - server queue depth (batches waiting, fluid count)
       conflicts  - conflict count for the batch being processed
       age        - effective age of the batch being processed
       failed     - whether S_MAX was exceeded
     """
+    workers = WORKERS if workers is None else workers
+    dispatch = DISPATCH if dispatch is None else dispatch
+    shards = shard_factors(N, documents, access)
     Tb = t_batch(M)
     Be = b_eff(M)
 
-    steps = int(duration_sec / dt)
-    t = np.zeros(steps)
-    queue_depth = np.zeros(steps)
-    conflict_count = np.zeros(steps)
-    age_series = np.zeros(steps)
+    # Each client sends a batch every Tb seconds → N/Tb batches/sec total
+    batch_arrival_rate = N / Tb  # batches per second
+
+    # Lanes: one shared queue with `workers` servers, or one single-server
+    # queue per worker fed by its clients. Empty lanes (workers > N) stay idle.
+    if dispatch == "affinity" and workers > 1:
+        lane_of = [c % workers for c in range(int(N))]
+        servers = 1
+        lanes = workers
+    else:
+        lane_of = [0] * int(N)
+        servers = workers
+        lanes = 1
+    lane_rate = [lane_of.count(lane) / Tb for lane in range(lanes)]
+    lane_arrived = [0] * lanes
+    lane_started = [0] * lanes
+    lane_busy = [0] * lanes
+
+    t = [0.0]
+    queue_depth = [0.0]
+    conflict_count = [0.0]
+    age_series = [0.0]
 
     # State
-    queue = 0.0           # fractional batch queue (batches waiting)
-    processing_remaining = 0.0  # ms remaining on current batch
+    arrived = 0           # batches that have reached the server
     current_conflicts = 0
     current_age = 0.0
     failed = False
     fail_time = None
 
-    # Each client sends a batch every Tb seconds → N/Tb batches/sec total
-    batch_arrival_rate = N / Tb  # batches per second
-
-    for i in range(steps):
-        t[i] = i * dt
-
-        # Arrivals this timestep
-        arrivals = batch_arrival_rate * dt
-        queue += arrivals
-
-        # If server is idle and queue > 0, start processing next batch
-        if processing_remaining <= 0 and queue >= 1.0:
-            queue -= 1.0
-            # Age = time in buffer + time in queue + RTT
-            queue_wait = (queue / batch_arrival_rate) if batch_arrival_rate > 0 else 0
-            current_age = Tb + queue_wait + RTT
-            # Conflicts = all ops that arrived at server during this batch's age
-            current_conflicts = N * M * current_age
-            if current_conflicts > S_MAX:
-                failed = True
-                if fail_time is None:
-                    fail_time = t[i]
-            # Processing time for this batch
-            processing_remaining = X_ms * (Be + current_conflicts)
-
-        # Consume processing time
-        if processing_remaining > 0:
-            processing_remaining -= dt * 1000  # dt in seconds, processing in ms
-
-        queue_depth[i] = queue
-        conflict_count[i] = current_conflicts
-        age_series[i] = current_age
+    events = []
+    seq = itertools.count()  # tie-breaker keeps heap ordering deterministic
+    if batch_arrival_rate > 0:
+        heapq.heappush(events, (1.0 / batch_arrival_rate, next(seq), _ARRIVAL, 0))
+
+    while events:
+        now, _, kind, lane = heapq.heappop(events)
+        if now > duration_sec:
+            break
+
+        if kind == _ARRIVAL:
+            lane = lane_of[arrived % len(lane_of)]
+            arrived += 1
+            lane_arrived[lane] += 1
+            heapq.heappush(events, ((arrived + 1) / batch_arrival_rate,
+                                    next(seq), _ARRIVAL, 0))
+        else:
+            lane_busy[lane] -= 1
+
+        # If a worker of this lane is idle and a batch is waiting, start it
+        if lane_busy[lane] >= servers or lane_arrived[lane] <= lane_started[lane]:
+            continue
+
+        rate = lane_rate[lane]
+        queue = rate * now - lane_started[lane]
+        # Queue depth is reported over all lanes
+        others = sum(max(0.0, lane_rate[j] * now - lane_started[j])
+                     for j in range(lanes) if j != lane)
+        t.append(now)
+        queue_depth.append(queue + others)
+        conflict_count.append(current_conflicts)
+        age_series.append(current_age)
+
+        lane_started[lane] += 1
+        queue = max(0.0, queue - 1.0)
+        # Age = time in buffer + time in queue + RTT
+        queue_wait = queue / rate
+        current_age = Tb + queue_wait + RTT
+        # Conflicts = all ops that arrived at server during this batch's age,
+        # on the batch's own document
+        all_conflicts = N * M * current_age
+        current_conflicts = all_conflicts * shards.peak
+        if current_conflicts > S_MAX:
+            failed = True
+            if fail_time is None:
+                fail_time = now
+        # Processing time for this batch
+        processing_ms = X_ms * (Be + all_conflicts * shards.scan)
+        lane_busy[lane] += 1
+        heapq.heappush(events, (now + processing_ms / 1000.0,
+                                next(seq), _COMPLETION, lane))
+
+        t.append(now)
+        queue_depth.append(queue + others)
+        conflict_count.append(current_conflicts)
+        age_series.append(current_age)
+
+    count("sim batches", sum(lane_started))
+    t.append(duration_sec)
+    queue_depth.append(sum(max(0.0, lane_rate[j] * duration_sec - lane_started[j])
+                           for j in range(lanes)))
+    conflict_count.append(current_conflicts)
+    age_series.append(current_age)
 
     return {
-        't': t,
-        'queue': queue_depth,
-        'conflicts': conflict_count,
-        'age': age_series,
+        't': np.array(t),
+        'queue': np.array(queue_depth),
+        'conflicts': np.array(conflict_count),
+        'age': np.array(age_series),
         'failed': failed,
         'fail_time': fail_time,
     }
@@ -136,14 +372,6 @@ def simulate(N, M, X_ms, duration_sec=30.0, dt=0.01):
 
 # ─── Experimental data ────────────────────────────────────────────────────────
 
-def load_experimental(path):
-    """Load parsed experiment results from JSON."""
-    if path and os.path.exists(path):
-        with open(path) as f:
-            return json.load(f)
-    return []
-
-
 def overlay_experimental(ax, experiments, annotate=True):
     """Overlay experimental data points on an (N, M) axis."""
     for e in experiments:
@@ -168,18 +396,18 @@ def overlay_experimental(ax, experiments, annotate=True):
 
 # ─── Plot 1: Stability heatmap in (N, M) space ──────────────────────────────
 
-def plot_stability_heatmap(X_fixed=25.0, output="reshuffle_heatmap.png", experiments=None):
+def plot_stability_heatmap(X_fixed=25.0, output="reshuffle_heatmap.png", experiments=None,
+                           jobs=1):
     """Heatmap: stable vs unstable regions for fixed X (ms/op)."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LinearSegmentedColormap
+
     N_range = np.arange(1, 21)
     M_range = np.linspace(0.1, 20, 100)
     Ngrid, Mgrid = np.meshgrid(N_range, M_range)
 
     # Compute ratio: X_fixed / X_crit. > 1 means unstable
-    ratio = np.zeros_like(Ngrid, dtype=float)
-    for i in range(Ngrid.shape[0]):
-        for j in range(Ngrid.shape[1]):
-            xc = x_crit(Ngrid[i, j], Mgrid[i, j])
-            ratio[i, j] = X_fixed / xc if xc > 0 else float('inf')
+    ratio = map_grid(stability_ratio, (Ngrid, Mgrid, X_fixed), jobs, **_pool_state())
 
     # Custom colormap: green (stable) → yellow (boundary) → red (unstable)
     colors = ["#2ecc71", "#f1c40f", "#e74c3c", "#8b0000"]
@@ -200,16 +428,19 @@ def plot_stability_heatmap(X_fixed=25.0, output="reshuffle_heatmap.png", experim
         ax.set_title(f"Reshuffle Stability Map (X = {X_fixed} ms/op)\n"
                      f"White dashed = analytical boundary | Circles/Xs = experimental")
 
-    plt.tight_layout()
-    plt.savefig(output, dpi=150)
-    plt.close()
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
     print(f"  Saved: {output}")
 
 
 # ─── Plot 2: Time series near the boundary ──────────────────────────────────
 
-def plot_time_series(output="reshuffle_timeseries.png"):
+def plot_time_series(output="reshuffle_timeseries.png", jobs=1):
     """Conflict count over time for several (N, M) configs."""
+    import matplotlib.pyplot as plt
+
     # X=10ms/op: each op involves DB reads, document model processing,
     # conflict detection, and index updates.
     configs = [
@@ -221,8 +452,10 @@ def plot_time_series(output="reshuffle_timeseries.png"):
 
     fig, axes = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
 
-    for N, M, X, label in configs:
-        result = simulate(N, M, X, duration_sec=30.0)
+    results = run_sweep(simulate, [(N, M, X, 30.0) for N, M, X, _ in configs], jobs,
+                        **_pool_state())
+
+    for (N, M, X, label), result in zip(configs, results):
         xc = x_crit(N, M)
         ratio = X / xc if xc > 0 else float('inf')
         tag = f"{label}  [X/Xc={ratio:.2f}]"
@@ -242,9 +475,10 @@ def plot_time_series(output="reshuffle_timeseries.png"):
     axes[1].legend(fontsize=8, loc='upper left')
     axes[1].set_yscale('symlog', linthresh=1)
 
-    plt.tight_layout()
-    plt.savefig(output, dpi=150)
-    plt.close()
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
     print(f"  Saved: {output}")
 
 
@@ -252,13 +486,15 @@ def plot_time_series(output="reshuffle_timeseries.png"):
 
 def plot_critical_x(output="reshuffle_critical_x.png"):
     """X_crit vs N for several values of M."""
+    import matplotlib.pyplot as plt
+
     N_range = np.arange(1, 21)
     M_values = [2, 5, 10, 20, 50]
 
     fig, ax = plt.subplots(figsize=(10, 6))
 
     for M in M_values:
-        xc = [x_crit(N, M) for N in N_range]
+        xc = x_crit(N_range, M)
         ax.plot(N_range, xc, 'o-', label=f"M = {M} ops/sec", linewidth=2, markersize=4)
 
     ax.set_xlabel("Number of Clients (N)")
@@ -273,9 +509,10 @@ def plot_critical_x(output="reshuffle_critical_x.png"):
     ax.axhspan(0.1, 2.0, alpha=0.1, color='blue', label='Typical server range')
     ax.text(15, 0.3, "Typical server\nprocessing range", fontsize=9, color='blue', alpha=0.7)
 
-    plt.tight_layout()
-    plt.savefig(output, dpi=150)
-    plt.close()
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
     print(f"  Saved: {output}")
 
 
@@ -283,8 +520,10 @@ def plot_critical_x(output="reshuffle_critical_x.png"):
 
 def plot_queue_explosion(output="reshuffle_queue_explosion.png"):
     """Detailed view of queue/conflict/age feedback loop for one config."""
+    import matplotlib.pyplot as plt
+
     N, M, X = 5, 10, 25.0
-    result = simulate(N, M, X, duration_sec=20.0, dt=0.005)
+    result = simulate(N, M, X, duration_sec=20.0)
 
     fig, axes = plt.subplots(3, 1, figsize=(12, 9), sharex=True)
 
@@ -314,9 +553,10 @@ def plot_queue_explosion(output="reshuffle_queue_explosion.png"):
     for ax in axes:
         ax.grid(True, alpha=0.2)
 
-    plt.tight_layout()
-    plt.savefig(output, dpi=150)
-    plt.close()
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
     print(f"  Saved: {output}")
 
 
@@ -324,6 +564,8 @@ def plot_queue_explosion(output="reshuffle_queue_explosion.png"):
 
 def plot_experimental_summary(experiments, output="reshuffle_experimental.png"):
     """Bar chart: time-to-failure for each experiment config."""
+    import matplotlib.pyplot as plt
+
     if not experiments:
         return
 
@@ -383,14 +625,197 @@ def plot_experimental_summary(experiments, output="reshuffle_experimental.png"):
                  "Green = survived full test | Red = reshuffle explosion")
     ax.set_ylim(0, max_dur * 1.3)
 
-    plt.tight_layout()
-    plt.savefig(output, dpi=150)
-    plt.close()
+    with timed("render"):
+        plt.tight_layout()
+        plt.savefig(output, dpi=150)
+        plt.close()
     print(f"  Saved: {output}")
 
 
+# ─── Plot 6: Client rate skew ───────────────────────────────────────────────
+
+MIX_SKEWS = (0.0, 0.5, 1.0, 1.5)  # --skew default; 0 is the uniform mix
+MIX_TABLE_N = (2, 5, 10, 20)
+MIX_TABLE_TOTAL = (20, 50, 100, 200, 400)
+
+
+def compute_mix_table(dist="zipf", skews=MIX_SKEWS, X_ref=25.0):
+    """
+    X_crit for N clients sharing a total rate by `dist`, per skew
+    (JSON-serializable rows), with the heaviest client's rate.
+    """
+    N = np.array(MIX_TABLE_N)[:, None, None]
+    total = np.array(MIX_TABLE_TOTAL, dtype=float)[None, :, None]
+    skew = np.array(skews, dtype=float)[None, None, :]
+    rates = rate_matrix(N, total, dist, skew)
+    xc = x_crit_mix(rates)
+    rows = []
+    for i, n in enumerate(MIX_TABLE_N):
+        for j, t in enumerate(MIX_TABLE_TOTAL):
+            for k, sk in enumerate(skews):
+                rows.append({
+                    "N": n, "total": t, "skew": float(sk),
+                    "top_rate": float(rates[i, j, k, 0]), "x_crit": float(xc[i, j, k]),
+                    "stable": bool(X_ref < xc[i, j, k]),
+                })
+    return {"dist": dist, "skews": [float(sk) for sk in skews], "X_ref": X_ref,
+            "rows": rows}
+
+
+def print_mix_table(table):
+    """Print compute_mix_table: X_crit per (N, total) and skew."""
+    skews = table["skews"]
+    print(f"\n{'─' * 70}")
+    print(f"CLIENT RATE SKEW ({table['dist']} mix): X_crit (ms/op) per skew, "
+          f"* = unstable at X={table['X_ref']:.0f}ms")
+    header = f"{'N':>3} {'total':>6} " + " ".join(f"{'skew ' + format(sk, 'g'):>12}"
+                                                   for sk in skews)
+    print(header)
+    print("-" * len(header))
+    by_cell = {}
+    for r in table["rows"]:
+        by_cell.setdefault((r["N"], r["total"]), []).append(r)
+    for (n, t), cells in by_cell.items():
+        print(f"{n:>3} {t:>6} " + " ".join(
+            f"{r['x_crit']:>11.3f}{' ' if r['stable'] else '*'}" for r in cells))
+    print("  Below B / T_flush ops/sec per client the load is set by the total rate "
+          "alone;\n  skew matters once the heaviest clients fill their batches.")
+
+
+def plot_skew_heatmap(dist="zipf", skews=MIX_SKEWS, X_fixed=25.0,
+                      output="reshuffle_skew.png", jobs=1):
+    """X_crit relative to the uniform mix over (N, total rate), one panel per skew."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import TwoSlopeNorm
+
+    N_range = np.arange(1, 21)
+    totals = np.geomspace(2, 2000, 100)
+    Ngrid, Tgrid = np.meshgrid(N_range, totals)
+    uniform = map_grid(mix_stability_ratio, (Ngrid, Tgrid, 0.0, X_fixed), jobs,
+                       kwargs={"dist": dist}, **_pool_state())
+
+    fig, axes = plt.subplots(1, len(skews), figsize=(4 * len(skews) + 2, 6),
+                             sharey=True, squeeze=False, layout='constrained')
+    for ax, skew in zip(axes[0], skews):
+        ratio = map_grid(mix_stability_ratio, (Ngrid, Tgrid, skew, X_fixed), jobs,
+                         kwargs={"dist": dist}, **_pool_state())
+        # X / X_crit is inversely proportional to X_crit
+        relative = uniform / ratio
+        im = ax.pcolormesh(Ngrid, Tgrid, relative, cmap='RdBu',
+                           norm=TwoSlopeNorm(vcenter=1.0, vmin=0.9, vmax=1.1),
+                           shading='auto')
+        ax.contour(Ngrid, Tgrid, ratio, levels=[1.0], colors='black', linewidths=2,
+                   linestyles='--')
+        ax.set_yscale('log')
+        ax.set_title(f"skew = {skew:g}")
+        ax.set_xlabel("Number of Clients (N)")
+        ax.set_xticks(N_range[::2] + 1)
+    axes[0][0].set_ylabel("Total ops/sec (all clients)")
+    fig.colorbar(im, ax=axes[0].tolist(), label="X_crit / X_crit of the uniform mix")
+    fig.suptitle(f"Reshuffle Critical X vs Client Rate Skew ({dist} mix)\n"
+                 f"Red = skew lowers X_crit | Black dashed = boundary at X = {X_fixed} ms/op")
+
+    with timed("render"):
+        plt.savefig(output, dpi=150)
+        plt.close()
+    print(f"  Saved: {output}")
+
+
+# ─── Document sharding ──────────────────────────────────────────────────────
+
+SHARD_COUNTS = (1, 2, 4, 8, 16, 32, 64)  # --shards default
+SHARD_TABLE_N = (2, 5, 10, 20)
+SHARD_TABLE_M = 10.0
+
+
+def compute_shard_table(access=None, documents=SHARD_COUNTS, X_ref=25.0):
+    """
+    X_crit at M = SHARD_TABLE_M per client count and number of documents
+    (JSON-serializable rows), with the gain over one document.
+    """
+    access = ACCESS if access is None else access
+    documents = sorted(set(documents) | {1})
+    N = np.array(SHARD_TABLE_N)[:, None]
+    D = np.array(documents)[None, :]
+    xc = x_crit(N, SHARD_TABLE_M, documents=D, access=access)
+    rows = []
+    for i, n in enumerate(SHARD_TABLE_N):
+        for j, d in enumerate(documents):
+            rows.append({
+                "N": n, "documents": d, "x_crit": float(xc[i, j]),
+                "gain": float(xc[i, j] / xc[i, 0]),
+                "stable": bool(X_ref < xc[i, j]),
+            })
+    return {"access": access, "M": SHARD_TABLE_M, "documents": documents,
+            "X_ref": X_ref, "rows": rows}
+
+
+def print_shard_table(table):
+    """Print compute_shard_table: X_crit per N and number of documents."""
+    documents = table["documents"]
+    print(f"\n{'─' * 70}")
+    print(f"DOCUMENT SHARDING ({table['access']} access, M={table['M']:g} ops/sec): "
+          f"X_crit (ms/op) per document count,\n* = unstable at X={table['X_ref']:.0f}ms")
+    header = f"{'N':>3} " + " ".join(f"{'D=' + str(d):>9}" for d in documents)
+    print(header)
+    print("-" * len(header))
+    by_n = {}
+    for r in table["rows"]:
+        by_n.setdefault(r["N"], []).append(r)
+    for n, cells in by_n.items():
+        print(f"{n:>3} " + " ".join(
+            f"{r['x_crit']:>8.2f}{' ' if r['stable'] else '*'}" for r in cells))
+
+
 # ─── Summary table ───────────────────────────────────────────────────────────
 
+def compute_summary(experiments=None, X_ref=25.0):
+    """
+    Analytical table, stress-test numbers and per-experiment verdicts as plain
+    data (JSON-serializable). print_summary renders the analytical part.
+    """
+    table = []
+    for N in [1, 2, 3, 5, 8, 10, 15, 20]:
+        for M in [2, 5, 10, 20]:
+            Tb = float(t_batch(M))
+            xc = float(x_crit(N, M))
+            table.append({
+                "N": N, "M": M, "T_batch": Tb, "B_eff": float(b_eff(M)),
+                "age": Tb + RTT, "conflicts": N * M * (Tb + RTT) * shard_factors(N).peak,
+                "x_crit": xc,
+                "stable": X_ref < xc,
+            })
+
+    # Stress test analysis
+    N, M = 5, 10
+    Tb = float(t_batch(M))
+    xc = float(x_crit(N, M))
+    stress = {
+        "N": N, "M": M, "T_batch": Tb, "B_eff": float(b_eff(M)), "age_min": Tb + RTT,
+        "conflicts": N * M * (Tb + RTT) * shard_factors(N).peak, "x_crit": xc,
+        "ratios": {X_est: X_est / xc for X_est in [1.0, 10.0, 25.0]},
+    }
+
+    verdicts = []
+    for e in experiments or []:
+        xc = float(x_crit(e["clients"], e["M_approx"]))
+        verdicts.append({
+            "N": e["clients"], "M": e["M_approx"], "x_crit": xc,
+            "model": "STABLE" if X_ref < xc else "UNSTABLE",
+            "experiment": "STABLE" if e["stable"] else "FAILED",
+            "match": (X_ref < xc) == e["stable"],
+        })
+
+    return {
+        "parameters": {"B": B, "T_flush": T_FLUSH, "S_max": S_MAX, "RTT": RTT,
+                       "X_ref": X_ref, "workers": WORKERS, "dispatch": DISPATCH,
+                       "documents": DOCUMENTS, "access": ACCESS},
+        "table": table,
+        "stress_test": stress,
+        "experiments": verdicts,
+    }
+
+
 def print_summary():
     """Print analytical results for key configurations."""
     print("\n" + "=" * 70)
@@ -398,40 +823,39 @@ def print_summary():
     print("=" * 70)
     print(f"\nParameters: B={B}, T_flush={T_FLUSH*1000:.0f}ms, "
           f"S_max={S_MAX}, RTT={RTT*1000:.0f}ms")
+    if WORKERS > 1:
+        print(f"Switchboard workers: {WORKERS} ({DISPATCH} dispatch); X_crit uses the "
+              f"busiest worker's share of the N clients")
+    if DOCUMENTS > 1:
+        print(f"Documents: {DOCUMENTS} ({ACCESS} access); conflicts are those on the "
+              f"batch's own document")
     print(f"\nStability condition: X < X_crit = (T_batch*1000/N) / (B_eff + N*M*age)")
     print(f"  where age = T_batch + RTT, T_batch = min(B/M, {T_FLUSH})")
 
     X_ref = 25.0  # experimentally derived: N=2,M=10 fails → X > 22ms/op
+    summary = compute_summary(X_ref=X_ref)
     print(f"\n{'N':>3} {'M':>6} {'T_batch':>8} {'B_eff':>6} {'age':>6} "
           f"{'conflicts':>10} {'X_crit':>8} {f'X={X_ref:.0f}ms?':>10}")
     print("-" * 70)
 
-    for N in [1, 2, 3, 5, 8, 10, 15, 20]:
-        for M in [2, 5, 10, 20]:
-            Tb = t_batch(M)
-            Be = b_eff(M)
-            age = Tb + RTT
-            conflicts = N * M * age
-            xc = x_crit(N, M)
-            stable = "STABLE" if X_ref < xc else "UNSTABLE"
-            print(f"{N:>3} {M:>6} {Tb:>7.2f}s {Be:>6.1f} {age:>5.2f}s "
-                  f"{conflicts:>10.1f} {xc:>7.3f}ms {stable:>10}")
+    for r in summary["table"]:
+        stable = "STABLE" if r["stable"] else "UNSTABLE"
+        print(f"{r['N']:>3} {r['M']:>6} {r['T_batch']:>7.2f}s {r['B_eff']:>6.1f} "
+              f"{r['age']:>5.2f}s {r['conflicts']:>10.1f} {r['x_crit']:>7.3f}ms {stable:>10}")
 
     # Stress test analysis
+    st = summary["stress_test"]
+    xc = st["x_crit"]
     print(f"\n{'─' * 70}")
-    print("STRESS TEST ANALYSIS (N=5, M=10 ops/sec)")
-    N, M = 5, 10
-    Tb = t_batch(M)
-    xc = x_crit(N, M)
-    print(f"  T_batch     = {Tb:.2f}s (batch interval per client)")
-    print(f"  B_eff       = {b_eff(M):.0f} ops/batch")
-    print(f"  age_min     = {Tb + RTT:.3f}s")
-    print(f"  conflicts   = {N * M * (Tb + RTT):.0f} ops (at zero queue)")
+    print(f"STRESS TEST ANALYSIS (N={st['N']}, M={st['M']} ops/sec)")
+    print(f"  T_batch     = {st['T_batch']:.2f}s (batch interval per client)")
+    print(f"  B_eff       = {st['B_eff']:.0f} ops/batch")
+    print(f"  age_min     = {st['age_min']:.3f}s")
+    print(f"  conflicts   = {st['conflicts']:.0f} ops (at zero queue)")
     print(f"  X_crit      = {xc:.4f} ms/op")
     print(f"  → Server must process each op in < {xc:.2f}ms to stay stable")
     print(f"  → Stress test was failing, so actual X > {xc:.2f}ms/op")
-    for X_est in [1.0, 10.0, 25.0]:
-        ratio = X_est / xc
+    for X_est, ratio in st["ratios"].items():
         status = "STABLE" if ratio < 1.0 else f"UNSTABLE ({ratio:.1f}x over)"
         print(f"  → At X={X_est:.0f}ms/op: {status}")
 
@@ -439,36 +863,121 @@ def print_summary():
 # ─── Main ────────────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
-    import os
-
     parser = argparse.ArgumentParser(description="Reshuffle Growth Dynamics Model")
     parser.add_argument("--experimental", "-e", type=str, default=None,
-                        help="Path to experiments.json from parse-experiments.py")
+                        help="Path to experiments.npz (or .json) from parse-experiments.py")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="Switchboard job-executor workers (default: 1)")
+    parser.add_argument("--dispatch", choices=["shared", "affinity"], default=DISPATCH,
+                        help="How batches are assigned to workers: one shared queue, "
+                             "or per-client document affinity (default: shared)")
+    parser.add_argument("--mix", choices=[d for d in DISTRIBUTIONS if d != "uniform"],
+                        default=None, help="Split each total rate over the clients by this "
+                                           "distribution, tabulate X_crit per --skew and "
+                                           "plot reshuffle_skew.png (default: off)")
+    parser.add_argument("--skew", type=float, nargs="+", default=list(MIX_SKEWS),
+                        metavar="S", help="Skews for --mix: zipf exponent or lognormal "
+                                          "sigma, 0 = uniform (default: 0 0.5 1 1.5)")
+    parser.add_argument("--documents", type=int, default=DOCUMENTS,
+                        help="Documents the clients' ops are spread over; conflicts "
+                             "only arise within a document (default: 1)")
+    parser.add_argument("--access", choices=list(ACCESS_PATTERNS), default=ACCESS,
+                        help="How clients' ops are spread over the documents "
+                             "(default: uniform)")
+    parser.add_argument("--doc-skew", type=float, default=DOC_SKEW,
+                        help=f"Zipf exponent of document popularity for --access zipf "
+                             f"(default: {DOC_SKEW:g})")
+    parser.add_argument("--shards", type=int, nargs="*", default=None, metavar="D",
+                        help="Tabulate X_crit per document count (default: off; no "
+                             "values = " + " ".join(map(str, SHARD_COUNTS)) + ")")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Worker processes for parameter sweeps "
+                             "(default: 1 = serial, 0 = all cores)")
+    parser.add_argument("--no-plots", action="store_true",
+                        help="Print the summary only (matplotlib is never imported)")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the summary and per-experiment verdicts as JSON, "
+                             "and nothing else (implies --no-plots)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print wall time, simulation steps and peak RSS per stage")
+    parser.add_argument("--profile-dump", type=str, default=None, metavar="DIR",
+                        help="With --profile, also write cProfile stats per stage to DIR")
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    WORKERS = args.workers
+    DISPATCH = args.dispatch
+    if args.documents < 1 or (args.shards and min(args.shards) < 1):
+        parser.error("document counts must be at least 1")
+    DOCUMENTS = args.documents
+    ACCESS = args.access
+    DOC_SKEW = args.doc_skew
+    shard_counts = None
+    if args.shards is not None:
+        shard_counts = args.shards or list(SHARD_COUNTS)
 
     # Output plots to the test-connect directory
     out_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     os.chdir(out_dir)
 
-    experiments = load_experimental(args.experimental)
+    profiler = StageProfiler(args.profile, dump_dir=args.profile_dump)
+    stage = profiler.stage
+
+    if args.json:
+        # Machine-readable summary only: nothing else on stdout, no matplotlib
+        with stage("load experiments"):
+            experiments = (load_experimental(args.experimental)
+                           or load_experimental(find_store()))
+        with stage("summary"):
+            summary = compute_summary(experiments)
+        if args.mix:
+            with stage("skew table"):
+                summary["mix"] = compute_mix_table(args.mix, args.skew)
+        if shard_counts:
+            with stage("shard table"):
+                summary["sharding"] = compute_shard_table(documents=shard_counts)
+        print(json.dumps(summary, indent=2))
+        profiler.report(file=sys.stderr)
+        sys.exit(0)
+
+    with stage("load experiments"):
+        experiments = load_experimental(args.experimental)
+        source = args.experimental
+        if not experiments:
+            # Check default location
+            source = find_store()
+            experiments = load_experimental(source)
     if experiments:
-        print(f"Loaded {len(experiments)} experimental data points from {args.experimental}")
-    else:
-        # Check default location
-        experiments = load_experimental("experiments.json")
-        if experiments:
-            print(f"Loaded {len(experiments)} experimental data points from experiments.json")
+        print(f"Loaded {len(experiments)} experimental data points from {source}")
 
     print("Generating reshuffle dynamics model...")
-    print_summary()
+    with stage("summary"):
+        print_summary()
+    if args.mix:
+        with stage("skew table"):
+            print_mix_table(compute_mix_table(args.mix, args.skew))
+    if shard_counts:
+        with stage("shard table"):
+            print_shard_table(compute_shard_table(documents=shard_counts))
+
+    if not args.no_plots:
+        print("\nGenerating plots...")
+        with stage("stability heatmap"):
+            plot_stability_heatmap(experiments=experiments, jobs=args.jobs)
+        with stage("time series"):
+            plot_time_series(jobs=args.jobs)
+        with stage("critical x"):
+            plot_critical_x()
+        with stage("queue explosion"):
+            plot_queue_explosion()
+        if args.mix:
+            with stage("skew heatmap"):
+                plot_skew_heatmap(args.mix, args.skew, jobs=args.jobs)
 
-    print("\nGenerating plots...")
-    plot_stability_heatmap(experiments=experiments)
-    plot_time_series()
-    plot_critical_x()
-    plot_queue_explosion()
-
-    if experiments:
-        plot_experimental_summary(experiments)
+        if experiments:
+            with stage("experimental summary"):
+                plot_experimental_summary(experiments)
 
-    print("\nDone! Check the PNG files in:", out_dir)
+    profiler.report()
+    if not args.no_plots:
+        print("\nDone! Check the PNG files in:", out_dir)
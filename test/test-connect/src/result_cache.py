@@ -0,0 +1,166 @@
+"""
+Persistent, content-addressed result cache for the model scripts.
+
+Entries are keyed by a SHA-256 over the function name, its arguments,
+the model constants in effect, and a version string (normally a hash of
+the sources of the model script and the modules it uses). Changing an input, a constant such as K_STORE,
+or the model code therefore gives a new key, and stale entries are never
+returned. They simply stop being read and age out.
+
+Each entry is one pickle file in the cache directory. Reads refresh the
+file's mtime and writes are atomic (write to a temp file, then rename),
+so several worker processes can share one directory. Once the directory
+grows past max_bytes, the least recently used entries are deleted.
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def source_version(*paths):
+    """Hash of source files, used to invalidate entries when code changes."""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            source = f.read()
+        h.update(os.path.basename(path).encode() + b"\0")
+        h.update(len(source).to_bytes(8, "little") + source)
+    return h.hexdigest()[:16]
+
+
+def _feed(h, obj):
+    """Feed a canonical encoding of obj into hash h."""
+    if isinstance(obj, np.ndarray):
+        h.update(b"nd" + obj.dtype.str.encode() + repr(obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, np.generic):
+        _feed(h, obj.item())
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"(" if isinstance(obj, tuple) else b"[")
+        for item in obj:
+            _feed(h, item)
+        h.update(b")")
+    elif isinstance(obj, dict):
+        h.update(b"{")
+        for key in sorted(obj):
+            _feed(h, key)
+            _feed(h, obj[key])
+        h.update(b"}")
+    elif obj is None or isinstance(obj, (bool, int, float, str)):
+        h.update(type(obj).__name__.encode() + b":" + repr(obj).encode() + b";")
+    elif hasattr(obj, "cache_key"):
+        # Value objects (e.g. burst-model's LoadProfile) describe themselves
+        h.update(b"<" + type(obj).__name__.encode() + b">")
+        _feed(h, obj.cache_key())
+    else:
+        raise TypeError(f"cannot fingerprint {type(obj).__name__}")
+
+
+class ResultCache:
+    """Size-bounded LRU cache of pickled results on disk."""
+
+    def __init__(self, directory, version="", max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.version = version
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size = None  # bytes on disk, measured lazily
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, name, args, kwargs, constants):
+        h = hashlib.sha256()
+        _feed(h, (self.version, name, tuple(args), dict(kwargs), dict(constants)))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pkl")
+
+    def get(self, key):
+        """Return (found, value)."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, value
+
+    def put(self, key, value):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+        if self._size is None:
+            self._size = sum(e.stat().st_size for e in self._entries())
+        else:
+            self._size += os.path.getsize(self._path(key))
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        try:
+            return [e for e in os.scandir(self.directory)
+                    if e.name.endswith(".pkl")]
+        except FileNotFoundError:
+            return []
+
+    def evict(self, target=None):
+        """Delete least recently used entries until the cache fits `target`."""
+        target = self.max_bytes * 0.9 if target is None else target
+        entries = []
+        for e in self._entries():
+            try:
+                st = e.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, e.path))
+        entries.sort()
+        size = sum(s for _, s, _ in entries)
+        for _, s, path in entries:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= s
+        self._size = size
+
+    def call(self, fn, args, kwargs, constants):
+        """Return fn(*args, **kwargs), from the cache when possible."""
+        key = self.key(fn.__qualname__, args, kwargs, constants)
+        found, value = self.get(key)
+        if found:
+            return value
+        value = fn(*args, **kwargs)
+        self.put(key, value)
+        return value
+
+
+def memoize(get_cache, get_constants):
+    """
+    Decorator factory: cache a function through whatever ResultCache
+    get_cache() returns at call time (None disables caching), keyed on
+    the arguments plus get_constants().
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return fn(*args, **kwargs)
+            return cache.call(fn, args, kwargs, get_constants())
+        return wrapper
+    return decorator
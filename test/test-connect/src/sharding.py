@@ -0,0 +1,93 @@
+"""
+Multi-document sharding for the model scripts.
+
+Reshuffles only involve operations on the same document, so with the
+clients' work spread over D documents only part of the other clients'
+ops fall into a job's conflict window. shard_shares() turns D and a
+client-to-document access pattern into multipliers on the single-document
+conflict counts:
+
+    uniform     every op goes to a document picked uniformly at random
+    zipf        document d (1-based) gets a share proportional to d^-skew
+    partition   client c edits only document c % D, and only receives the
+                ops of the clients on that document
+
+For "uniform" and "zipf" an op on document d conflicts with the other
+clients' ops on d, a fraction p_d of them. The worst job (the conflict
+peak) is on the hottest document, p_max. Averaged over jobs, the conflicts
+scanned are a fraction sum(p_d^2) of the total, since a job lands on
+document d with probability p_d. For "partition" the fractions follow
+from the number of clients sharing the busiest document, ceil(N / D).
+
+D = 1 gives 1.0 for every factor, whatever the access pattern.
+"""
+
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+ACCESS_PATTERNS = ("uniform", "zipf", "partition")
+
+ShardShares = namedtuple("ShardShares", [
+    "peak",        # server: conflicts of the worst push, as a fraction of all
+    "scan",        # server: average conflicts scanned per push, as a fraction
+    "incoming",    # client: fraction of the other clients' ops it receives
+    "local_peak",  # client: fraction of its local ops the worst load job conflicts with
+    "local_scan",  # client: average fraction per load job
+])
+
+
+@functools.lru_cache(maxsize=None)
+def _zipf_moments(D, skew):
+    """Largest share and sum of squared shares of a zipf popularity over D documents."""
+    p = np.arange(1, D + 1, dtype=float) ** -skew
+    p /= p.sum()
+    return float(p[0]), float(np.sum(p * p))
+
+
+def document_shares(D, access="uniform", skew=1.0):
+    """Popularity of each of D documents (sums to 1) for 'uniform' or 'zipf' access."""
+    if access == "zipf":
+        p = np.arange(1, int(D) + 1, dtype=float) ** -skew
+        return p / p.sum()
+    if access == "uniform":
+        return np.full(int(D), 1.0 / D)
+    raise ValueError(f"no document popularity for access {access!r}")
+
+
+def shard_shares(N, D, access="uniform", skew=1.0):
+    """
+    Conflict multipliers for N clients spread over D documents (see the
+    module doc). N and D may be scalars or arrays (broadcast together).
+    Returns a ShardShares of floats or arrays.
+    """
+    if access not in ACCESS_PATTERNS:
+        raise ValueError(f"unknown access pattern {access!r} (expected one of "
+                         f"{', '.join(ACCESS_PATTERNS)})")
+    N, D = np.broadcast_arrays(np.asarray(N, dtype=float), np.asarray(D, dtype=np.int64))
+    if D.size and D.min() < 1:
+        raise ValueError("need at least one document")
+
+    if access == "partition":
+        q, r = np.divmod(N, D)
+        busiest = np.where(r > 0, q + 1, q)  # clients on the most crowded document
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Pairs of clients sharing a document, out of all pairs
+            pairs = r * (q + 1) * q + (D - r) * q * (q - 1)
+            scan = np.where(N > 1, pairs / (N * (N - 1)), 1.0)
+            peak = np.where(N > 1, (busiest - 1) / (N - 1), 1.0)
+        local = np.where((busiest > 1) | (N <= 1), 1.0, 0.0)
+        shares = ShardShares(peak, scan, peak, local, local)
+    else:
+        if access == "zipf":
+            moments = {int(d): _zipf_moments(int(d), float(skew)) for d in np.unique(D)}
+            peak = np.vectorize(lambda d: moments[int(d)][0], otypes=[float])(D)
+            scan = np.vectorize(lambda d: moments[int(d)][1], otypes=[float])(D)
+        else:
+            peak = scan = 1.0 / D
+        peak, scan = np.broadcast_arrays(np.asarray(peak, dtype=float),
+                                         np.asarray(scan, dtype=float))
+        shares = ShardShares(peak, scan, np.ones(N.shape), peak, scan)
+    return ShardShares(*(float(s) if np.ndim(s) == 0 else np.asarray(s, dtype=float)
+                         for s in shares))
@@ -0,0 +1,135 @@
+"""
+Process-pool sweep runner shared by the model scripts.
+
+A sweep is a list of independent tasks. run_sweep / iter_sweep apply a
+function to each task on a pool of worker processes and hand the results
+back in task order, so output is identical whatever the worker count.
+map_grid does the same for vectorized functions evaluated over a
+parameter grid: the grid cells are split into chunks and the per-chunk
+results are stitched back into the grid's shape.
+
+jobs=1 runs everything serially in the calling process. jobs=0 (or any
+value below 1) uses every core. If a process pool cannot be started
+(e.g. no working semaphores in a sandbox), the sweep falls back to
+serial execution.
+
+Workers only see module state that is sent to them: under spawn (the
+default on macOS and Windows) they re-import the model scripts and get
+the module defaults back, not the constants set from the CLI. Callers
+pass a snapshot of that state through initializer / initargs. The
+SWEEP_START_METHOD environment variable overrides the start method
+(fork, spawn or forkserver), so the tests can check spawn on Linux.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+
+def resolve_jobs(jobs):
+    """Map a --jobs value to a worker count (< 1 means all cores)."""
+    if jobs is None or jobs < 1:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def _apply(func, args, kwargs):
+    return func(*args, **kwargs)
+
+
+def _pool_context():
+    # fork is the cheapest start on Linux. Elsewhere, keep the platform
+    # default, which is safer on macOS.
+    import multiprocessing  # deferred: not needed for serial runs
+
+    method = os.environ.get("SWEEP_START_METHOD")
+    if method:
+        return multiprocessing.get_context(method)
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def iter_sweep(func, tasks, jobs=1, kwargs=None, initializer=None, initargs=()):
+    """
+    Yield func(*task, **kwargs) for every task, in task order.
+
+    func must be a module-level function so it can be sent to workers.
+    initializer(*initargs) runs once in each worker process; use it to
+    send the parent's module state (see the module doc).
+    """
+    tasks = [tuple(t) for t in tasks]
+    kwargs = kwargs or {}
+    jobs = min(resolve_jobs(jobs), len(tasks))
+
+    if jobs > 1:
+        try:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(
+                max_workers=jobs, mp_context=_pool_context(),
+                initializer=initializer, initargs=initargs)
+        except (ImportError, NotImplementedError, OSError) as exc:
+            print(f"  (process pool unavailable: {exc}; running serially)")
+        else:
+            with executor:
+                yield from executor.map(
+                    _apply, [func] * len(tasks), tasks, [kwargs] * len(tasks))
+            return
+
+    for task in tasks:
+        yield func(*task, **kwargs)
+
+
+def run_sweep(func, tasks, jobs=1, kwargs=None, initializer=None, initargs=()):
+    """List form of iter_sweep."""
+    return list(iter_sweep(func, tasks, jobs, kwargs, initializer, initargs))
+
+
+def split_evenly(n, parts):
+    """Split range(n) into `parts` interleaved index arrays (for load balance)."""
+    parts = max(1, min(parts, n))
+    return [np.arange(start, n, parts) for start in range(parts)]
+
+
+def map_grid(func, arrays, jobs=1, kwargs=None, chunks_per_job=4,
+             initializer=None, initargs=()):
+    """
+    Evaluate a vectorized func over broadcast parameter arrays.
+
+    The broadcast grid is flattened and split into interleaved chunks, so
+    expensive and cheap cells are spread over all workers. func is called
+    as func(*chunk_arrays, **kwargs) and must return one array, or a tuple
+    of arrays, with one entry per cell of the chunk. Returns the same
+    structure reshaped to the grid's shape.
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(a) for a in arrays))
+    shape = arrays[0].shape
+    flat = [a.ravel() for a in arrays]
+    n = flat[0].size
+    jobs = resolve_jobs(jobs)
+
+    if jobs <= 1 or n == 0:
+        return _reshape(func(*arrays, **(kwargs or {})), shape)
+
+    index_sets = split_evenly(n, jobs * chunks_per_job)
+    tasks = [tuple(a[idx] for a in flat) for idx in index_sets]
+    results = run_sweep(func, tasks, jobs, kwargs, initializer, initargs)
+
+    single = not isinstance(results[0], tuple)
+    if single:
+        results = [(r,) for r in results]
+    stitched = []
+    for k in range(len(results[0])):
+        first = np.asarray(results[0][k])
+        out = np.empty(n, dtype=first.dtype)
+        for idx, r in zip(index_sets, results):
+            out[idx] = r[k]
+        stitched.append(out.reshape(shape))
+    return stitched[0] if single else tuple(stitched)
+
+
+def _reshape(result, shape):
+    if isinstance(result, tuple):
+        return tuple(np.asarray(r).reshape(shape) for r in result)
+    return np.asarray(result).reshape(shape)
@@ -0,0 +1,82 @@
+"""
+Checks of burst-model.py against brute-force reference computations.
+
+Run from test/test-connect/src: python -m pytest -q
+"""
+
+import numpy as np
+import pytest
+
+from capacity import load_model
+
+burst_model = load_model("burst-model.py")
+
+
+def _brute_force_depth(arrivals, t):
+    """Later arrivals that came in by each processing time (the pre-bisect scan)."""
+    return [sum(1 for a in arrivals[j + 1:] if a <= t_j) for j, t_j in enumerate(t)]
+
+
+def _poll_times(T_burst):
+    polls, t = [], burst_model.T_POLL
+    while t <= T_burst + burst_model.T_POLL + 0.001:
+        polls.append(t)
+        t += burst_model.T_POLL
+    return polls
+
+
+# (N, M, T_burst, S_max, workers): idle, saturated and failing servers. An
+# idle server processes each push at its arrival time, a tie bisect_right
+# must count.
+SERVER_CASES = [
+    (1, 5.0, 10.0, 10000, 1),
+    (4, 20.0, 8.0, 1000, 1),
+    (10, 10.0, 10.0, 10000, 1),
+    (30, 20.0, 5.0, 10000, 1),
+    (20, 10.0, 10.0, 10000, 4),
+]
+
+
+@pytest.mark.parametrize("N, M, T_burst, S_max, workers", SERVER_CASES)
+def test_server_queue_depth_matches_linear_scan(N, M, T_burst, S_max, workers):
+    result = burst_model.simulate_burst_server(N, M, 25.0, T_burst, S_max,
+                                               workers=workers, dispatch="shared")
+    arrivals, _ = burst_model.as_profile(M, T_burst).push_times(N)
+    t = result["t"][:-1]  # the last point is the drained queue
+    assert len(t) == len(arrivals)
+    assert result["queue"][:-1].tolist() == _brute_force_depth(arrivals, t)
+
+
+def test_server_queue_depth_counts_tied_arrivals():
+    # Clients at 100 and 50 ops/sec push at the same instants: every push
+    # of the slower ones coincides with one of the faster ones
+    rates = np.array([100.0, 100.0, 50.0, 50.0])
+    arrivals, _, _ = burst_model.mix_push_times(rates, 5.0)
+    assert np.any(np.diff(arrivals) == 0)
+    for S_max in (10000, 10):  # an idle server (proc_t == arrival) and a backlog
+        result = burst_model.simulate_burst_server(len(rates), rates, 25.0, 5.0, S_max)
+        t = result["t"][:-1]
+        assert len(t) == len(arrivals)
+        assert result["queue"][:-1].tolist() == _brute_force_depth(arrivals, t)
+
+
+@pytest.mark.parametrize("N, M, T_burst, S_max", [
+    (4, 20.0, 8.0, 10000),
+    (10, 30.0, 10.0, 1000),
+    (50, 50.0, 30.0, 10000),
+])
+def test_client_queue_depth_matches_linear_scan(N, M, T_burst, S_max):
+    result = burst_model.simulate_burst_client(N, M, 25.0, T_burst, S_max)
+    polls = _poll_times(T_burst)
+    t = result["t"][:-1]
+    # Polls without incoming ops are skipped; a square burst only has one, the last
+    assert len(t) in (len(polls), len(polls) - 1)
+    assert result["queue"][:-1].tolist() == _brute_force_depth(polls, t)
+
+
+def test_explicit_retries_none_overrides_module_default(monkeypatch):
+    monkeypatch.setattr(burst_model, "RETRIES", 3)
+    assert "dead_letters" in burst_model.simulate_burst.__wrapped__(10, 20.0, 25.0, 10.0, 10000)
+    flagged = burst_model.simulate_burst.__wrapped__(10, 20.0, 25.0, 10.0, 10000, retries=None)
+    assert "dead_letters" not in flagged
+    assert "dead_letters" not in flagged["client"]
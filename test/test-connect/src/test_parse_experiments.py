@@ -0,0 +1,36 @@
+"""
+Checks of the log scanners in parse-experiments.py.
+
+Run from test/test-connect/src: python -m pytest -q
+"""
+
+from capacity import load_model
+
+parse_experiments = load_model("parse-experiments.py")
+
+EVENT_LINE = "[Attempt 1] Excessive reshuffle\n"
+
+
+def test_untimed_events_stream_past_the_hold_cap():
+    total = 3 * parse_experiments.EARLY_EVENTS_MAX
+    consumed = 0
+
+    def lines():
+        nonlocal consumed
+        for _ in range(total):
+            consumed += 1
+            yield EVENT_LINE
+
+    events = parse_experiments.iter_log_events(lines())
+    assert next(events) == ("reshuffle", None, 1)
+    assert consumed < total
+    assert sum(1 for _ in events) == total - 1
+
+
+def test_buffer_scanner_matches_text_scanner_past_the_hold_cap():
+    # Over the cap, events before the first timestamp lose it in both scanners
+    for early in (3, parse_experiments.EARLY_EVENTS_MAX + 1):
+        log = EVENT_LINE * early + "[10:00:00.000] " + EVENT_LINE
+        text = list(parse_experiments.iter_log_events(log.splitlines(keepends=True)))
+        assert list(parse_experiments.iter_buffer_events(log.encode())) == sorted(
+            text, key=lambda event: event[0] != "start")
@@ -0,0 +1,85 @@
+"""
+Parallel sweeps must give the same numbers as serial ones.
+
+Pool workers only see the model constants the parent sends them (see
+sweep.py), so these tests run the pools with spawn, which inherits
+nothing, and set constants away from their defaults.
+
+Run from test/test-connect/src: python -m pytest -q
+"""
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Every constant the burst CLI threads into the simulators, off its default
+BURST_ARGS = ["--json", "--no-cache", "--no-params", "--workers", "4",
+              "--documents", "4", "--access", "zipf", "--doc-skew", "1.5",
+              "--retries", "3", "--retry-base-ms", "50", "--exact-limit", "5"]
+
+
+def _run(args):
+    env = dict(os.environ, SWEEP_START_METHOD="spawn")
+    out = subprocess.run([sys.executable, *args], env=env,
+                         capture_output=True, text=True, check=True)
+    return out.stdout
+
+
+def test_burst_cli_jobs_match_serial():
+    args = [os.path.join(SRC_DIR, "burst-model.py"), *BURST_ARGS]
+    serial = json.loads(_run(args + ["--jobs", "1"]))
+    assert json.loads(_run(args + ["--jobs", "2"])) == serial
+
+
+def test_reshuffle_sweeps_match_serial(tmp_path):
+    # The reshuffle CLI only sweeps for its plots, so drive map_grid and
+    # run_sweep directly. The script is re-run by spawned workers, which is
+    # how they find the model loaded by path.
+    script = tmp_path / "drive.py"
+    script.write_text(textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {SRC_DIR!r})
+        import numpy as np
+        from capacity import load_model
+
+        model = load_model("reshuffle-model.py")
+
+        if __name__ == "__main__":
+            model.WORKERS, model.DISPATCH = 4, "affinity"
+            model.DOCUMENTS, model.ACCESS = 4, "partition"
+            N, M = np.meshgrid(np.arange(1, 21), np.linspace(0.5, 20, 40))
+            configs = [(n, m, 25.0, 30.0) for n, m in ((5, 5.0), (10, 10.0), (20, 4.0))]
+            for jobs in (1, 2):
+                ratio = model.map_grid(model.stability_ratio, (N, M, 25.0), jobs,
+                                       **model._pool_state())
+                runs = model.run_sweep(model.simulate, configs, jobs,
+                                       **model._pool_state())
+                print(repr(ratio.tolist()), [r["conflicts"].tolist() for r in runs])
+    """))
+    serial, parallel = _run([str(script)]).splitlines()
+    assert parallel == serial
+
+
+def test_burst_fitted_params_reach_workers(tmp_path):
+    params = tmp_path / "burst-params.json"
+    params.write_text(json.dumps({"K_STORE": 3.0, "X_ms": 12.0, "SCAN_COST": 0.004}))
+    args = [os.path.join(SRC_DIR, "burst-model.py"), "--json", "--no-cache",
+            "--params", str(params)]
+    serial = json.loads(_run(args + ["--jobs", "1"]))
+    assert serial["parameters"]["X_ms"] == 12.0
+    assert json.loads(_run(args + ["--jobs", "2"])) == serial
+
+
+def test_burst_calibration_jobs_match_serial(tmp_path):
+    fitted = []
+    for jobs in (1, 2):
+        path = tmp_path / f"params-{jobs}.json"
+        _run([os.path.join(SRC_DIR, "burst-model.py"), "--calibrate", "--no-cache",
+              "--workers", "4", "--documents", "2", "--params", str(path),
+              "--jobs", str(jobs)])
+        fitted.append(json.loads(path.read_text()))
+    assert fitted[1] == fitted[0]